@@ -19,6 +19,9 @@ With FDTD simulation (requires openEMS Python bindings):
 Load pre-computed FDTD data from a numpy .npz file:
     python generate_sphere_comparison.py --fdtd-data path/to/data.npz
 
+Mie coefficient tables are cached in docs/report_images/.mie_cache/ (see
+mie_cache.py); pass --no-mie-cache to recompute from scratch.
+
 Output
 ──────
 Saves the figure to:
@@ -33,8 +36,8 @@ Theory reference
 Bohren & Huffman, "Absorption and Scattering of Light by Small Particles",
 Chapter 4 (Mie theory).  For a PEC sphere:
 
-    a_n = j_n(x) / h_n^(1)(x)
-    b_n = [x j_n(x)]' / [x h_n^(1)(x)]'
+    a_n = [x j_n(x)]' / [x h_n^(1)(x)]'
+    b_n = j_n(x) / h_n^(1)(x)
 
     Q_back = σ_back / (π a²)
            = (1 / x²) |Σ_{n=1}^{N} (−1)^n (2n+1)(a_n − b_n)|²
@@ -50,7 +53,9 @@ import numpy as np
 import matplotlib
 matplotlib.use('Agg')   # headless rendering; swap for 'TkAgg' / 'Qt5Agg' for interactive
 import matplotlib.pyplot as plt
-from scipy.special import spherical_jn, spherical_yn
+
+from mie import mie_backscatter_Q, set_mie_cache
+from mie_cache import MieCache, DEFAULT_CACHE_DIR
 
 # ─── Simulation parameters (must match the openEMS sphere scripts) ─────────
 SPHERE_RAD_MM   = 200          # sphere radius [mm]
@@ -84,42 +89,8 @@ def mie_pec_backscatter_normalised(ka_values: np.ndarray, n_extra: int = 5) -> n
     -------
     Q_back : same shape as ka_values.
     """
-    ka_values = np.asarray(ka_values, dtype=float)
-    Q_back    = np.zeros_like(ka_values)
-
-    for i, ka in enumerate(ka_values):
-        if ka < 1e-9:
-            Q_back[i] = 0.0
-            continue
-
-        # Wiscombe (1980) convergence criterion
-        N = int(np.ceil(ka + 4.05 * ka ** (1.0 / 3.0) + 2.0)) + n_extra
-
-        series = 0.0 + 0.0j
-
-        for n in range(1, N + 1):
-            jn  = spherical_jn(n, ka)
-            yn  = spherical_yn(n, ka)
-            djn = spherical_jn(n, ka, derivative=True)
-            dyn = spherical_yn(n, ka, derivative=True)
-
-            # Spherical Hankel function of the first kind and its derivative
-            hn  = jn + 1j * yn
-            dhn = djn + 1j * dyn
-
-            # Mie coefficients for a PEC sphere
-            # a_n = j_n(x) / h_n^(1)(x)
-            an = jn / hn
-
-            # b_n = [x j_n(x)]' / [x h_n^(1)(x)]'
-            #     = (j_n + x j_n') / (h_n + x h_n')
-            bn = (jn + ka * djn) / (hn + ka * dhn)
-
-            series += (-1) ** n * (2 * n + 1) * (an - bn)
-
-        Q_back[i] = abs(series) ** 2 / ka ** 2
-
-    return Q_back
+    # All (ka, n) pairs are evaluated in one broadcast pass — see mie.py
+    return mie_backscatter_Q(ka_values, n_extra=n_extra)
 
 
 def mie_curve(f_start: float, f_stop: float, sphere_rad: float, n_points: int = 200):
@@ -286,8 +257,13 @@ def main():
                        help='Run the openEMS FDTD simulation (requires openEMS).')
     group.add_argument('--fdtd-data', metavar='PATH',
                        help='Path to a .npz file with pre-computed FDTD data.')
+    parser.add_argument('--no-mie-cache', action='store_true',
+                        help=f'Do not read/write Mie tables in {DEFAULT_CACHE_DIR}.')
     args = parser.parse_args()
 
+    if not args.no_mie_cache:
+        set_mie_cache(MieCache(cache_dir=DEFAULT_CACHE_DIR))
+
     # ── Analytical Mie curve (always computed) ──────────────────────────
     print("Computing Mie series …")
     mie_x, mie_y = mie_curve(F_START_HZ, F_STOP_HZ, SPHERE_RAD_M, N_FREQ_POINTS)
@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+mie.py
+──────
+Shared, vectorised Mie series engine for the sphere validation scripts
+(validate_sphere_rcs.py, generate_sphere_comparison.py).
+
+Every (ka, n) pair is evaluated as a single broadcast 2-D array operation:
+rows are ka values, columns are Mie orders n = 1 … N_max, where N_max is the
+Wiscombe bound of the largest ka.  Each row only sums up to its own Wiscombe
+order, enforced by a per-ka convergence mask, so results match the original
+scalar loops to machine precision.
+
+Two coefficient backends are available through the `backend` argument:
+    'scipy'      — SciPy spherical Bessel functions, one broadcast call.
+    'recurrence' — Riccati–Bessel functions with a logarithmic-derivative
+                   downward recurrence (Wiscombe 1980), all orders in one
+                   sweep.  Stable for ka into the thousands, which is needed
+                   for the UAV-scale geometric-optics regime.
+
+Coefficient tables are memoised through mie_cache.MieCache.  By default the
+cache is in-process only; scripts that regenerate figures install a disk-backed
+cache with `set_mie_cache` so unchanged inputs skip all Mie work across runs.
+
+Run directly to benchmark the backends against the scalar reference loop:
+    python mie.py
+
+Theory: Bohren & Huffman, "Absorption and Scattering of Light by Small Particles",
+        Chapter 4. PEC Mie coefficients (the m → ∞ limit of Eq. 4.53):
+            a_n = [x j_n(x)]' / [x h_n(x)]'
+            b_n = j_n(x) / h_n(x)
+        Amplitude functions S1/S2 via pi_n / tau_n recurrences (Appendix A).
+"""
+
+import time
+
+import numpy as np
+from scipy.special import spherical_jn, spherical_yn
+
+from mie_cache import MieCache, make_key
+
+_cache = MieCache()
+
+
+def set_mie_cache(cache):
+    """Install `cache` (a MieCache, or None to disable) for all Mie calls."""
+    global _cache
+    _cache = cache
+
+
+def get_mie_cache():
+    """Return the active MieCache (or None)."""
+    return _cache
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Truncation order
+# ═══════════════════════════════════════════════════════════════════════════
+
+def wiscombe_nmax(ka, n_extra=5):
+    """
+    Wiscombe (1980) truncation order, vectorised over ka.
+
+    Returns an int for scalar input, an int array otherwise.
+    """
+    ka = np.asarray(ka, dtype=float)
+    N = np.ceil(ka + 4.05 * np.cbrt(ka) + 2.0).astype(int) + n_extra
+    return int(N) if N.ndim == 0 else N
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Mie coefficients
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _mie_an_bn(n, ka):
+    """
+    PEC Mie coefficients a_n, b_n from SciPy spherical Bessel functions.
+
+    `n` and `ka` broadcast against each other, so passing n as a row
+    (1, N) and ka as a column (M, 1) yields the full (M, N) tables in one call.
+    Entries where y_n overflows (n ≫ ka) come back as NaN/0 and must be masked
+    by the caller.
+    """
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        jn  = spherical_jn(n, ka)
+        yn  = spherical_yn(n, ka)
+        djn = spherical_jn(n, ka, derivative=True)
+        dyn = spherical_yn(n, ka, derivative=True)
+        hn  = jn + 1j * yn
+        dhn = djn + 1j * dyn
+        an  = (jn + ka * djn) / (hn + ka * dhn)
+        bn  = jn / hn
+    return an, bn
+
+
+def log_derivative_down(n_max, z):
+    """
+    Logarithmic derivative D_n(z) = ψ_n'(z) / ψ_n(z) for n = 0 … n_max by
+    downward recurrence  D_{n-1} = n/z − 1/(D_n + n/z),  started at
+    max(n_max, |z|) + 16 so the start error has decayed (Wiscombe 1980).
+
+    `z` is a 1-D real or complex array; returns an (M, n_max + 1) table.
+    """
+    z = np.asarray(z)
+    n_start = int(max(n_max, np.max(np.abs(z)))) + 16
+
+    D = np.zeros((z.size, n_max + 1), dtype=z.dtype)
+    d = np.zeros_like(z)
+    for n in range(n_start, 0, -1):
+        d = n / z - 1.0 / (d + n / z)
+        if n - 1 <= n_max:
+            D[:, n - 1] = d
+    return D
+
+
+def riccati_bessel(n_max, x):
+    """
+    Riccati–Bessel tables for n = 0 … n_max at real arguments x:
+    ψ_n(x) = x j_n(x),  ξ_n(x) = x h_n(x) = ψ_n + i η_n  (η_n = x y_n),
+    and D_n = ψ_n' / ψ_n.
+
+        ψ_n  = ψ_{n-1} / (D_n + n/x)        (ratio form, never grows)
+        η_n  = (2n−1)/x · η_{n-1} − η_{n-2}  upward (η is the dominant solution)
+
+    Returns (psi, xi, D), each shaped (M, n_max + 1).  Entries far beyond
+    the Wiscombe order may under/overflow and must be masked by the caller.
+    """
+    x = np.asarray(x, dtype=float)
+    D = log_derivative_down(n_max, x)
+
+    psi = np.empty((x.size, n_max + 1))
+    eta = np.empty((x.size, n_max + 1))
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore', under='ignore'):
+        psi[:, 0] = np.sin(x)
+        eta[:, 0] = -np.cos(x)
+        eta_prev2 = np.sin(x)                       # η_{-1}
+        for n in range(1, n_max + 1):
+            psi[:, n] = psi[:, n - 1] / (D[:, n] + n / x)
+            eta[:, n] = (2 * n - 1) / x * eta[:, n - 1] - eta_prev2
+            eta_prev2 = eta[:, n - 1]
+        xi = psi + 1j * eta
+    return psi, xi, D
+
+
+def _mie_an_bn_recurrence(n_max, ka):
+    """
+    PEC Mie coefficients a_n, b_n for n = 1 … n_max from the Riccati–Bessel
+    tables of `riccati_bessel`:
+
+        a_n = ψ_n' / ξ_n' = D_n ψ_n / (ξ_{n-1} − n ξ_n / x)
+        b_n = ψ_n / ξ_n
+
+    `ka` is a 1-D array of strictly positive values; returns (M, n_max) tables.
+    """
+    x = np.asarray(ka, dtype=float)
+    psi, xi, D = riccati_bessel(n_max, x)
+    n = np.arange(1, n_max + 1)
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore', under='ignore'):
+        an = D[:, 1:] * psi[:, 1:] / (xi[:, :-1] - n * xi[:, 1:] / x[:, None])
+        bn = psi[:, 1:] / xi[:, 1:]
+    return an, bn
+
+
+def mie_coefficients(ka, n_extra=5, backend='scipy'):
+    """
+    Masked (M, N_max) tables of a_n, b_n for every ka in `ka`.
+
+    `backend` selects 'scipy' (spherical Bessel functions) or 'recurrence'
+    (Riccati–Bessel downward recurrence, preferred for ka ≳ 100).
+
+    Returns
+    -------
+    n    : (N_max,) int array of orders 1 … N_max.
+    an   : (M, N_max) complex, zero beyond each row's Wiscombe order.
+    bn   : (M, N_max) complex, zero beyond each row's Wiscombe order.
+    mask : (M, N_max) bool, True where the order is inside the series.
+    """
+    ka = np.atleast_1d(np.asarray(ka, dtype=float))
+    key = make_key(ka, n_extra, 'pec', backend) if _cache is not None else None
+    if key is not None:
+        hit = _cache.get(key)
+        if hit is not None:
+            return hit['n'], hit['an'], hit['bn'], hit['mask']
+
+    valid = ka >= 1e-9
+    n_row = np.where(valid, wiscombe_nmax(np.where(valid, ka, 0.0), n_extra), 0)
+    n_max = int(n_row.max()) if n_row.size else 0
+
+    n    = np.arange(1, n_max + 1)
+    mask = n[None, :] <= n_row[:, None]
+
+    # Invalid (ka ≈ 0) rows are fully masked; evaluate them at a harmless
+    # argument so SciPy does not have to deal with x = 0.
+    ka_eval = np.where(valid, ka, 1.0)
+    if backend == 'scipy':
+        an, bn = _mie_an_bn(n[None, :], ka_eval[:, None])
+    elif backend == 'recurrence':
+        an, bn = _mie_an_bn_recurrence(n_max, ka_eval)
+    else:
+        raise ValueError(f"Unknown Mie backend '{backend}' (use 'scipy' or 'recurrence')")
+    an = np.where(mask, an, 0.0)
+    bn = np.where(mask, bn, 0.0)
+
+    if key is not None:
+        _cache.put(key, {'n': n, 'an': an, 'bn': bn, 'mask': mask})
+    return n, an, bn, mask
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Backscatter efficiency
+# ═══════════════════════════════════════════════════════════════════════════
+
+def mie_backscatter_Q(ka_array, n_extra=5, backend='scipy'):
+    """
+    Normalised backscatter efficiency Q_back = σ/(π a²) for a PEC sphere.
+    Uses the classic series:  Q = |Σ (-1)^n (2n+1)(a_n - b_n)|² / ka²
+
+    Vectorised over ka; ka < 1e-9 returns 0.  See `mie_coefficients` for
+    the available backends.
+    """
+    ka = np.asarray(ka_array, dtype=float)
+    flat = ka.ravel()
+    n, an, bn, _ = mie_coefficients(flat, n_extra, backend)
+
+    weight = (-1.0) ** n * (2 * n + 1)
+    series = (an - bn) @ weight
+
+    Q = np.zeros_like(flat)
+    ok = flat >= 1e-9
+    Q[ok] = np.abs(series[ok]) ** 2 / flat[ok] ** 2
+    return Q.reshape(ka.shape)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Amplitude functions S1 / S2 and 3-D bistatic patterns
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _pi_tau(n_max, cos_alpha_vec):
+    """
+    Mie angle functions π_n(cos α) and τ_n(cos α) for n = 1…n_max,
+    vectorised over an array of cos(α) values.
+
+    Recurrences (Bohren & Huffman, App. A):
+        π_0 = 0,  π_1 = 1
+        π_n = ((2n-1)/(n-1)) cos α · π_{n-1}  −  (n/(n-1)) π_{n-2}
+        τ_n = n cos α · π_n  −  (n+1) π_{n-1}
+    """
+    n_obs = len(cos_alpha_vec)
+    pi  = np.zeros((n_obs, n_max + 1))
+    tau = np.zeros((n_obs, n_max + 1))
+    pi[:, 1]  = 1.0
+    tau[:, 1] = cos_alpha_vec
+    for n in range(2, n_max + 1):
+        pi[:, n]  = ((2*n-1)/(n-1)) * cos_alpha_vec * pi[:, n-1] - (n/(n-1)) * pi[:, n-2]
+        tau[:, n] = n * cos_alpha_vec * pi[:, n] - (n+1) * pi[:, n-1]
+    return pi, tau
+
+
+def mie_S1_S2(ka, cos_alpha, n_extra=5, backend='scipy', coefficients=None):
+    """
+    Amplitude functions S1(α), S2(α) for a single ka, any shape of cos α.
+
+        S1 = Σ (2n+1)/(n(n+1)) (a_n π_n + b_n τ_n)
+        S2 = Σ (2n+1)/(n(n+1)) (a_n τ_n + b_n π_n)
+
+    The π_n/τ_n table is built once per *unique* cos α (rounded to 1e-12),
+    so symmetric observation grids only pay for the distinct scatter angles.
+
+    `coefficients` = (n, a_n, b_n) 1-D arrays overrides the PEC tables, e.g.
+    with a row from mie_multilayer.multilayer_coefficients.
+    """
+    cos_alpha = np.clip(np.asarray(cos_alpha, dtype=float), -1.0, 1.0)
+    uniq, inverse = np.unique(np.round(cos_alpha, 12).ravel(), return_inverse=True)
+
+    if coefficients is None:
+        n, an, bn, _ = mie_coefficients(ka, n_extra, backend)
+        an, bn = an[0], bn[0]
+    else:
+        n, an, bn = coefficients
+    pi, tau = _pi_tau(len(n), uniq)
+    fn = (2 * n + 1) / (n * (n + 1))
+    pi, tau = pi[:, 1:], tau[:, 1:]
+
+    S1 = pi @ (fn * an) + tau @ (fn * bn)
+    S2 = tau @ (fn * an) + pi @ (fn * bn)
+    return S1[inverse].reshape(cos_alpha.shape), S2[inverse].reshape(cos_alpha.shape)
+
+
+def mie_far_field_grid(ka, theta_deg, phi_deg, n_extra=5, backend='scipy',
+                       coefficients=None):
+    """
+    Scattered far-field amplitudes (S_θ, S_φ) on a (theta × phi) grid.
+
+    Geometry matches the sphere scripts and openEMS NF2FF output:
+      incident wave along +x, E-field along +z, observation direction
+      r̂(θ, φ) in standard spherical coordinates.
+
+    Bohren & Huffman give the scattered field in the incident frame
+    (z' = propagation = x̂, x' = polarisation = ẑ, y' = z' × x' = −ŷ):
+
+        E_s ∝ cos φ' S2(θ') θ̂'  −  sin φ' S1(θ') φ̂'
+
+    which is rotated back to the global frame and projected onto θ̂, φ̂.
+    At the forward/back poles (sin θ' = 0) any φ' gives the same vector;
+    φ' = 0 is used.
+
+    Returns complex (S_θ, S_φ), each shaped (n_theta, n_phi), normalised so
+    that σ = (4π/k²)|S|².  With E_z incident, S_θ is co-polar and S_φ
+    cross-polar.  `coefficients` is passed through to `mie_S1_S2`.
+    """
+    th = np.deg2rad(np.atleast_1d(np.asarray(theta_deg, dtype=float)))[:, None]
+    ph = np.deg2rad(np.atleast_1d(np.asarray(phi_deg, dtype=float)))[None, :]
+    st, ct, sp, cp = np.sin(th), np.cos(th), np.sin(ph), np.cos(ph)
+
+    # Observation direction in the incident frame
+    u_x, u_y, u_z = ct * np.ones_like(ph), -st * sp, st * cp
+    sin_tp = np.hypot(u_x, u_y)
+    pole   = sin_tp < 1e-12
+    safe   = np.where(pole, 1.0, sin_tp)
+    cos_pp = np.where(pole, 1.0, u_x / safe)
+    sin_pp = np.where(pole, 0.0, u_y / safe)
+    cos_tp = u_z
+
+    S1, S2 = mie_S1_S2(ka, cos_tp, n_extra, backend, coefficients)
+    E_tp = cos_pp * S2      # θ' component
+    E_pp = -sin_pp * S1     # φ' component
+
+    # θ̂', φ̂' in primed Cartesian components, then to global (x, y, z):
+    # global = (primed_z, −primed_y, primed_x)
+    Ex_p = E_tp * cos_tp * cos_pp - E_pp * sin_pp
+    Ey_p = E_tp * cos_tp * sin_pp + E_pp * cos_pp
+    Ez_p = -E_tp * sin_tp
+    Ex, Ey, Ez = Ez_p, -Ey_p, Ex_p
+
+    S_theta = Ex * ct * cp + Ey * ct * sp - Ez * st
+    S_phi   = -Ex * sp + Ey * cp
+    return S_theta, S_phi
+
+
+def mie_bistatic_rcs_grid(ka, radius_m, theta_deg, phi_deg, n_extra=5, backend='scipy',
+                          coefficients=None):
+    """
+    Co-polar and cross-polar bistatic RCS [m²] on a (theta × phi) grid
+    in one batched call (see `mie_far_field_grid` for the geometry).
+
+    Returns (sigma_co, sigma_cross), each shaped (n_theta, n_phi).
+    """
+    k = ka / radius_m
+    S_theta, S_phi = mie_far_field_grid(ka, theta_deg, phi_deg, n_extra, backend,
+                                        coefficients)
+    scale = 4 * np.pi / k ** 2
+    return scale * np.abs(S_theta) ** 2, scale * np.abs(S_phi) ** 2
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Benchmark
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _mie_backscatter_Q_loop(ka_array, n_extra=5):
+    """Scalar reference: one SciPy call per (ka, n), as the scripts used to do."""
+    Q = np.zeros_like(ka_array, dtype=float)
+    for i, ka in enumerate(ka_array):
+        if ka < 1e-9:
+            continue
+        N = wiscombe_nmax(ka, n_extra)
+        series = 0 + 0j
+        for n in range(1, N + 1):
+            an, bn = _mie_an_bn(n, ka)
+            series += (-1) ** n * (2 * n + 1) * (an - bn)
+        Q[i] = abs(series) ** 2 / ka ** 2
+    return Q
+
+
+def _time(fn, *args, repeat=3, **kwargs):
+    best = np.inf
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(*args, **kwargs)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+if __name__ == '__main__':
+    set_mie_cache(None)   # time the raw backends, not cache hits
+
+    # Dense curve used by validate_sphere_rcs.py (a = 200 mm, 50 MHz – 1 GHz)
+    C0 = 299_792_458.0
+    ka = 2 * np.pi * 0.2 * np.linspace(50e6, 1_000e6, 600) / C0
+
+    t_loop, Q_loop = _time(_mie_backscatter_Q_loop, ka, repeat=1)
+    t_vec,  Q_vec  = _time(mie_backscatter_Q, ka)
+    rel = np.max(np.abs(Q_vec - Q_loop) / Q_loop)
+
+    print(f'{len(ka)} ka points, ka = {ka[0]:.3f} … {ka[-1]:.3f}')
+    print(f'  scalar loop : {t_loop * 1e3:8.2f} ms')
+    print(f'  vectorised  : {t_vec  * 1e3:8.2f} ms   ({t_loop / t_vec:.0f}x)')
+    print(f'  max rel. difference : {rel:.2e}')
+
+    t_rec, Q_rec = _time(mie_backscatter_Q, ka, backend='recurrence')
+    rel = np.max(np.abs(Q_rec - Q_loop) / Q_loop)
+    print(f'  recurrence  : {t_rec  * 1e3:8.2f} ms   ({t_loop / t_rec:.0f}x)'
+          f'   max rel. difference {rel:.2e}')
+
+    # Electrically large spheres — geometric-optics regime (Q_back → 1)
+    ka = np.linspace(10.0, 2000.0, 200)
+    t_sp,  Q_sp  = _time(mie_backscatter_Q, ka, repeat=1)
+    t_rec, Q_rec = _time(mie_backscatter_Q, ka, repeat=1, backend='recurrence')
+    print(f'{len(ka)} ka points, ka = {ka[0]:.0f} … {ka[-1]:.0f}')
+    print(f'  scipy       : {t_sp  * 1e3:8.2f} ms   '
+          f'Q_back(ka={ka[-1]:.0f}) = {Q_sp[-1]:.6f}')
+    print(f'  recurrence  : {t_rec * 1e3:8.2f} ms   '
+          f'Q_back(ka={ka[-1]:.0f}) = {Q_rec[-1]:.6f}')
+    print(f'  max |ΔQ| scipy vs recurrence : {np.max(np.abs(Q_sp - Q_rec)):.2e}')
+
+    # Full 4π bistatic pattern at 1° resolution (f0 = 525 MHz, a = 200 mm)
+    ka = 2 * np.pi * 0.2 * 525e6 / C0
+    theta, phi = np.arange(0, 181.0), np.arange(-180, 180.0)
+    t_grid, (co, cross) = _time(mie_bistatic_rcs_grid, ka, 0.2, theta, phi)
+    Q_grid = co[90, 0] / (np.pi * 0.2 ** 2)
+    print(f'4π grid {len(theta)}×{len(phi)} at ka = {ka:.2f}: {t_grid * 1e3:.1f} ms   '
+          f'Q_back = {Q_grid:.6f} (series {mie_backscatter_Q(ka):.6f})')
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+mie_cache.py
+────────────
+Memoisation layer for Mie coefficient tables (used by mie.py).
+
+The store is the two-tier LRUCache shared with the far-field cache
+(test_simulations/common/disk_cache.py): an in-process tier capped by entry
+count and bytes, and one .npz per key in `cache_dir` capped by total bytes,
+evicted oldest-mtime first so the directory behaves as an LRU across runs.
+
+Keys are SHA-1 digests of (ka values, truncation, material, backend), so a
+re-run with identical parameters reuses the stored a_n / b_n tables and skips
+all Mie work.
+
+Usage:
+    from mie import set_mie_cache
+    from mie_cache import MieCache
+    set_mie_cache(MieCache(cache_dir='.mie_cache', max_disk_bytes=256e6))
+
+Inspect or clear a cache directory:
+    python mie_cache.py [--clear] [cache_dir]
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..', 'test_simulations', 'common'))
+from disk_cache import LRUCache
+
+SCRIPT_DIR        = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_DIR = os.path.join(SCRIPT_DIR, '.mie_cache')
+
+
+def make_key(ka, n_extra, material='pec', backend='scipy'):
+    """
+    Stable cache key for a coefficient table.
+
+    `material` is any object with a deterministic repr() — 'pec' for the
+    perfectly-conducting sphere, or a tuple describing a layered sphere.
+    """
+    ka = np.ascontiguousarray(np.atleast_1d(ka), dtype=float)
+    h = hashlib.sha1()
+    h.update(ka.tobytes())
+    h.update(repr((ka.shape, int(n_extra), material, backend)).encode())
+    return h.hexdigest()
+
+
+class MieCache(LRUCache):
+    """
+    Two-tier LRU store of Mie coefficient tables ({name: ndarray} dicts
+    keyed by make_key); see disk_cache.LRUCache for the parameters.
+    """
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Inspect or clear a Mie cache directory.')
+    parser.add_argument('cache_dir', nargs='?', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--clear', action='store_true', help='Delete every cached table.')
+    args = parser.parse_args()
+
+    cache = MieCache(cache_dir=args.cache_dir)
+    files, size = cache.disk_usage()
+    print(f'{args.cache_dir}: {files} tables, {size / 1e6:.1f} MB')
+    if args.clear:
+        cache.clear()
+        print('Cleared.')
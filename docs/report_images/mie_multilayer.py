@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+mie_multilayer.py
+─────────────────
+Vectorised Mie solver for lossy and coated spheres: a core plus any number of
+concentric shells, each with complex permittivity and conductivity, batched
+over frequency.  Provides the analytic reference for
+test_simulations/RCS_Sphere/rcs_sphere_aluinmum_v3.py (hollow aluminium
+shell), coated spheres and CFRP-skinned spheres.
+
+Layers are listed from the core outwards as (outer_radius_m, eps_r, sigma_S_m).
+eps_r may be complex; a conductivity of np.inf marks a PEC core.  The
+surrounding medium is vacuum.
+
+Convention (Bohren & Huffman, e^{-iωt}): the relative refractive index of a
+layer is  m = sqrt(eps_r + i σ / (ω ε0)),  Im m ≥ 0.
+
+Algorithm: Yang (2003), "Improved recursive algorithm for light scattering by
+a multilayered sphere", Appl. Opt. 42, 1710.  Per layer it needs
+    D1_n(z) = ψ_n'/ψ_n       — downward recurrence (mie.log_derivative_down);
+                               for Im z > 30 the ψ_n are dominated by
+                               z h_n^(2)(z), whose log-derivative is computed
+                               by stable upward recurrence instead (skin depth
+                               ≪ layer thickness, e.g. aluminium at MHz).
+    D3_n(z) = ξ_n'/ξ_n       — upward via the product ψ_n ξ_n.
+    Q_n     = ψ_n(z1) ξ_n(z2) / (ξ_n(z1) ψ_n(z2))  — ratio recurrence.
+The outer-boundary Riccati–Bessel functions come from mie.riccati_bessel, the
+same recurrence path as the PEC backend, and results go through the active
+mie cache.
+
+Run directly for self-checks and the hollow-aluminium reference:
+    python mie_multilayer.py
+"""
+
+import numpy as np
+
+from mie import get_mie_cache, riccati_bessel, log_derivative_down, wiscombe_nmax
+from mie_cache import make_key
+
+C0   = 299_792_458.0
+EPS0 = 8.854_187_8128e-12
+
+# Above this Im(z) the e^{-iz} part of ψ_n(z) exceeds the other by e^{60}
+_IM_Z_UPWARD = 30.0
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Logarithmic derivatives at complex arguments
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _D1(n_max, z):
+    """D1_n(z) = ψ_n'/ψ_n, n = 0 … n_max, for a 1-D complex array z."""
+    z = np.asarray(z, dtype=complex)
+    D = np.empty((z.size, n_max + 1), dtype=complex)
+
+    up = z.imag > _IM_Z_UPWARD
+    if np.any(~up):
+        D[~up] = log_derivative_down(n_max, z[~up])
+    if np.any(up):
+        zu = z[up]
+        d = np.full(zu.shape, -1j)          # z h_0^(2)(z) = i e^{-iz}
+        D[up, 0] = d
+        for n in range(1, n_max + 1):
+            d = 1.0 / (n / zu - d) - n / zu
+            D[up, n] = d
+    return D
+
+
+def _D3(n_max, z, D1):
+    """
+    D3_n(z) = ξ_n'/ξ_n from the Wronskian  D3_n − D1_n = i / (ψ_n ξ_n)  and
+    ψ_n ξ_n = ψ_{n-1} ξ_{n-1} (n/z − D1_{n-1})(n/z − D3_{n-1}).
+    """
+    z = np.asarray(z, dtype=complex)
+    D3 = np.empty_like(D1)
+    with np.errstate(over='ignore', under='ignore'):
+        psi_xi = 0.5 * (1.0 - np.exp(2j * z))
+    D3[:, 0] = 1j
+    for n in range(1, n_max + 1):
+        psi_xi = psi_xi * (n / z - D1[:, n - 1]) * (n / z - D3[:, n - 1])
+        D3[:, n] = D1[:, n] + 1j / psi_xi
+    return D3
+
+
+def _Q(n_max, z1, z2, D1_1, D3_1, D1_2, D3_2):
+    """Q_n = ψ_n(z1) ξ_n(z2) / (ξ_n(z1) ψ_n(z2)) for n = 0 … n_max."""
+    Q = np.empty_like(D1_1)
+    with np.errstate(over='ignore', under='ignore', invalid='ignore'):
+        # Q_0 = (1 − e^{−2i z1}) / (1 − e^{−2i z2}), rewritten to decay for Im z ≥ 0
+        Q[:, 0] = (np.exp(2j * (z2 - z1)) * (np.exp(2j * z1) - 1.0)
+                   / (np.exp(2j * z2) - 1.0))
+        for n in range(1, n_max + 1):
+            Q[:, n] = Q[:, n - 1] * (
+                (D3_1[:, n] + n / z1) * (D1_2[:, n] + n / z2)
+                / ((D1_1[:, n] + n / z1) * (D3_2[:, n] + n / z2)))
+    return Q
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Coefficients
+# ═══════════════════════════════════════════════════════════════════════════
+
+def refractive_index(freq_hz, eps_r, sigma):
+    """m = sqrt(eps_r + i σ/(ω ε0)) vectorised over frequency (Im m ≥ 0)."""
+    omega = 2 * np.pi * np.asarray(freq_hz, dtype=float)
+    return np.sqrt(eps_r + 1j * sigma / (omega * EPS0))
+
+
+def multilayer_coefficients(freq_hz, layers, n_extra=5):
+    """
+    Mie coefficients a_n, b_n of a layered sphere for every frequency.
+
+    Parameters
+    ----------
+    freq_hz : 1-D array of frequencies [Hz].
+    layers  : sequence of (outer_radius_m, eps_r, sigma_S_m), core first.
+              sigma = np.inf on the core makes it PEC.
+
+    Returns
+    -------
+    Same layout as mie.mie_coefficients: (n, an, bn, mask) with (M, N_max)
+    tables zeroed beyond each frequency's Wiscombe order of the outer radius.
+    """
+    freq = np.atleast_1d(np.asarray(freq_hz, dtype=float))
+    layers = [(float(r), complex(e), float(sg)) for r, e, sg in layers]
+    k = 2 * np.pi * freq / C0
+    x = np.array([k * r for r, _, _ in layers])          # (L, M) size parameters
+
+    material = ('multilayer',) + tuple(layers)
+    cache = get_mie_cache()
+    key = make_key(x[-1], n_extra, material, 'recurrence') if cache is not None else None
+    if key is not None:
+        hit = cache.get(key)
+        if hit is not None:
+            return hit['n'], hit['an'], hit['bn'], hit['mask']
+
+    n_row = wiscombe_nmax(x[-1], n_extra)
+    n_max = int(n_row.max())
+    n     = np.arange(1, n_max + 1)
+    mask  = n[None, :] <= n_row[:, None]
+
+    pec_core = np.isinf(layers[0][2])
+    m = [None if (l == 0 and pec_core) else refractive_index(freq, e, sg)
+         for l, (_, e, sg) in enumerate(layers)]
+
+    with np.errstate(over='ignore', under='ignore', invalid='ignore', divide='ignore'):
+        # ── core ──────────────────────────────────────────────────────────
+        if pec_core:
+            Ha = Hb = None
+        else:
+            Ha = Hb = _D1(n_max, m[0] * x[0])
+
+        # ── shells ────────────────────────────────────────────────────────
+        for l in range(1, len(layers)):
+            z1, z2 = m[l] * x[l - 1], m[l] * x[l]
+            D1_1, D1_2 = _D1(n_max, z1), _D1(n_max, z2)
+            D3_1, D3_2 = _D3(n_max, z1, D1_1), _D3(n_max, z2, D1_2)
+            Q = _Q(n_max, z1, z2, D1_1, D3_1, D1_2, D3_2)
+            if Ha is None:
+                # PEC core: limit m_{l-1} → ∞ of Yang's Eqs. (14)–(17)
+                Ha = (D3_1 * D1_2 - Q * D1_1 * D3_2) / (D3_1 - Q * D1_1)
+                Hb = (D1_2 - Q * D3_2) / (1.0 - Q)
+            else:
+                ml, mp = m[l][:, None], m[l - 1][:, None]
+                G1, G2 = ml * Ha - mp * D1_1, ml * Ha - mp * D3_1
+                Ha = (G2 * D1_2 - Q * G1 * D3_2) / (G2 - Q * G1)
+                G1, G2 = mp * Hb - ml * D1_1, mp * Hb - ml * D3_1
+                Hb = (G2 * D1_2 - Q * G1 * D3_2) / (G2 - Q * G1)
+
+        # ── outer boundary (vacuum) ───────────────────────────────────────
+        xL = x[-1][:, None]
+        psi, xi, _ = riccati_bessel(n_max, x[-1])
+        if Ha is None:
+            # Bare PEC sphere: m → ∞ limit
+            ta = np.broadcast_to(n / xL, psi[:, 1:].shape)
+            tb = None
+        else:
+            mL = m[-1][:, None]
+            ta = Ha[:, 1:] / mL + n / xL
+            tb = mL * Hb[:, 1:] + n / xL
+        an = (ta * psi[:, 1:] - psi[:, :-1]) / (ta * xi[:, 1:] - xi[:, :-1])
+        bn = (psi[:, 1:] / xi[:, 1:] if tb is None else
+              (tb * psi[:, 1:] - psi[:, :-1]) / (tb * xi[:, 1:] - xi[:, :-1]))
+
+    an = np.where(mask, an, 0.0)
+    bn = np.where(mask, bn, 0.0)
+    if key is not None:
+        cache.put(key, {'n': n, 'an': an, 'bn': bn, 'mask': mask})
+    return n, an, bn, mask
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Observables
+# ═══════════════════════════════════════════════════════════════════════════
+
+def multilayer_backscatter_rcs(freq_hz, layers, n_extra=5):
+    """
+    Monostatic RCS σ_back [m²] of a layered sphere vs frequency:
+        σ = (π / k²) |Σ (-1)^n (2n+1)(a_n − b_n)|²
+    """
+    freq = np.atleast_1d(np.asarray(freq_hz, dtype=float))
+    k = 2 * np.pi * freq / C0
+    n, an, bn, _ = multilayer_coefficients(freq, layers, n_extra)
+    series = (an - bn) @ ((-1.0) ** n * (2 * n + 1))
+    return np.pi / k ** 2 * np.abs(series) ** 2
+
+
+def multilayer_bistatic_rcs_grid(f_hz, layers, theta_deg, phi_deg, n_extra=5):
+    """
+    Co-pol / cross-pol bistatic RCS [m²] of a layered sphere at one frequency
+    on a (theta × phi) grid — same geometry as mie.mie_bistatic_rcs_grid.
+    """
+    from mie import mie_bistatic_rcs_grid
+    n, an, bn, mask = multilayer_coefficients([f_hz], layers, n_extra)
+    keep = mask[0]
+    radius = layers[-1][0]
+    ka = 2 * np.pi * f_hz / C0 * radius
+    return mie_bistatic_rcs_grid(ka, radius, theta_deg, phi_deg, n_extra,
+                                 coefficients=(n[keep], an[0, keep], bn[0, keep]))
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Self-checks and aluminium-sphere reference
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _homogeneous_scipy(freq, radius, eps_r, sigma, n_extra=5):
+    """Independent single-sphere check: B&H Eq. 4.53 via SciPy, one layer."""
+    from scipy.special import spherical_jn, spherical_yn
+    k  = 2 * np.pi * freq / C0
+    x  = k * radius
+    mm = refractive_index(freq, eps_r, sigma)
+    N  = wiscombe_nmax(x.max(), n_extra)
+    n  = np.arange(1, N + 1)[None, :]
+    xx, mx, m = x[:, None], (mm * x)[:, None], mm[:, None]
+
+    def psi(nn, z, d=False):
+        j = spherical_jn(nn, z)
+        return j + z * spherical_jn(nn, z, derivative=True) if d else z * j
+
+    def xi(nn, z, d=False):
+        return psi(nn, z, d) + 1j * (spherical_yn(nn, z) + z * spherical_yn(nn, z, derivative=True)
+                                     if d else z * spherical_yn(nn, z))
+
+    an = ((m * psi(n, mx) * psi(n, xx, True) - psi(n, xx) * psi(n, mx, True))
+          / (m * psi(n, mx) * xi(n, xx, True) - xi(n, xx) * psi(n, mx, True)))
+    bn = ((psi(n, mx) * psi(n, xx, True) - m * psi(n, xx) * psi(n, mx, True))
+          / (psi(n, mx) * xi(n, xx, True) - m * xi(n, xx) * psi(n, mx, True)))
+    series = (an - bn) @ ((-1.0) ** n[0] * (2 * n[0] + 1))
+    return np.pi / k ** 2 * np.abs(series) ** 2
+
+
+if __name__ == '__main__':
+    import time
+    from mie import mie_backscatter_Q, set_mie_cache
+    set_mie_cache(None)
+
+    a    = 0.2                                   # outer radius [m]
+    freq = np.linspace(50e6, 1_000e6, 200)
+    ka   = 2 * np.pi * a * freq / C0
+    pec  = np.pi * a ** 2 * mie_backscatter_Q(ka)
+
+    def rel(x, y):
+        return float(np.max(np.abs(x - y) / np.abs(y)))
+
+    # 1. Homogeneous lossy dielectric vs independent SciPy formula
+    ref = _homogeneous_scipy(freq, a, 4.0, 0.01)
+    print(f'homogeneous ε=4, σ=0.01     vs SciPy B&H    : {rel(multilayer_backscatter_rcs(freq, [(a, 4.0, 0.01)]), ref):.1e}')
+
+    # 2. Vacuum shell around a dielectric core == bare core
+    core = [(0.15, 4.0, 0.01)]
+    rc = 2 * np.pi * 0.15 * freq / C0
+    print(f'vacuum-coated core          vs bare core    : '
+          f'{rel(multilayer_backscatter_rcs(freq, core + [(a, 1.0, 0.0)]), multilayer_backscatter_rcs(freq, core)):.1e}')
+
+    # 3. PEC limits
+    print(f'PEC core (σ=inf)            vs PEC series   : {rel(multilayer_backscatter_rcs(freq, [(a, 1.0, np.inf)]), pec):.1e}')
+    print(f'solid aluminium (σ=3.77e7)  vs PEC series   : {rel(multilayer_backscatter_rcs(freq, [(a, 1.0, 3.77e7)]), pec):.1e}')
+
+    # 4. Hollow aluminium shell, as in rcs_sphere_aluinmum_v3.py (t = λ0/20)
+    t = C0 / 525e6 / 20
+    hollow = [(a - t, 1.0, 0.0), (a, 1.0, 3.77e7)]
+    t0 = time.perf_counter()
+    rcs = multilayer_backscatter_rcs(freq, hollow)
+    dt = time.perf_counter() - t0
+    print(f'hollow Al shell t={t*1e3:.1f} mm  vs PEC series   : {rel(rcs, pec):.1e}'
+          f'   ({len(freq)} freqs in {dt*1e3:.0f} ms)')
+
+    # 5. PEC sphere with a lossy (CFRP-like) skin — should differ from PEC
+    skinned = [(a - 0.01, 1.0, np.inf), (a, 3.0 + 0.3j, 1e2)]
+    print(f'PEC + 10 mm lossy skin      vs PEC series   : {rel(multilayer_backscatter_rcs(freq, skinned), pec):.1e}')
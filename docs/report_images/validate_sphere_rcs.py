@@ -14,18 +14,26 @@ Outputs (saved to docs/report_images/):
 
 Theory: Bohren & Huffman, "Absorption and Scattering of Light by Small Particles",
         Chapter 4. PEC Mie coefficients:
-            a_n = j_n(x) / h_n(x)
-            b_n = [x j_n(x)]' / [x h_n(x)]'
+            a_n = [x j_n(x)]' / [x h_n(x)]'
+            b_n = j_n(x) / h_n(x)
         Amplitude functions via pi_n / tau_n recurrences (Appendix A).
 """
 
 import os
+import sys
 import numpy as np
 import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import matplotlib.gridspec as gridspec
-from scipy.special import spherical_jn, spherical_yn
+
+from mie import mie_S1_S2, mie_backscatter_Q, mie_bistatic_rcs_grid, set_mie_cache
+from mie_cache import MieCache, DEFAULT_CACHE_DIR
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..', 'test_simulations', 'common'))
+from nf2ff_cache import cached_nf2ff
+from nf2ff_parallel import parallel_nf2ff
 
 # ── openEMS ──────────────────────────────────────────────────────────────────
 try:
@@ -58,70 +66,25 @@ OUT_POLAR    = os.path.join(SCRIPT_DIR, 'sphere_validation_polar.png')
 # Expected FDTD error < 5 %, giving clean Mie vs FDTD agreement.
 F_POLAR_2    = 150e6          # Hz
 
+# Compare the full 4π NF2FF sphere (1° grid) against the 3-D Mie reference.
+# Off by default: the openEMS NF2FF evaluation of 65 k directions is slow.
+FULL_SPHERE  = False
+
+# 'numpy'    : nf2ff_numpy.calc_nf2ff straight from the nf2ff_E*/H* dumps
+# 'numpy-fft': same, radiation integrals by per-face FFT (dense grids)
+# 'openems'  : nf2ff.CalcNF2FF on a rebuilt geometry (writes val_*.h5)
+NF2FF_BACKEND = 'numpy'
+# Worker processes for the NumPy backends (1 = in-process)
+NF2FF_WORKERS = 1
+
 SPHERE_RAD_M = SPHERE_RAD * unit   # 0.2 m
 
 
 # ═══════════════════════════════════════════════════════════════════════════
-# Mie series (analytical, PEC sphere)
+# Mie series (analytical, PEC sphere) — coefficients and Q_back live in mie.py
 # ═══════════════════════════════════════════════════════════════════════════
 
-def _wiscombe_nmax(ka, n_extra=5):
-    return int(np.ceil(ka + 4.05 * ka ** (1.0 / 3.0) + 2.0)) + n_extra
-
-
-def _mie_an_bn(n, ka):
-    """PEC Mie coefficients a_n, b_n."""
-    jn  = spherical_jn(n, ka)
-    yn  = spherical_yn(n, ka)
-    djn = spherical_jn(n, ka, derivative=True)
-    dyn = spherical_yn(n, ka, derivative=True)
-    hn  = jn + 1j * yn
-    dhn = djn + 1j * dyn
-    an  = jn / hn
-    bn  = (jn + ka * djn) / (hn + ka * dhn)
-    return an, bn
-
-
-def mie_backscatter_Q(ka_array):
-    """
-    Normalised backscatter efficiency Q_back = σ/(π a²) for a PEC sphere.
-    Uses the classic series:  Q = |Σ (-1)^n (2n+1)(a_n - b_n)|² / ka²
-    """
-    Q = np.zeros_like(ka_array, dtype=float)
-    for i, ka in enumerate(ka_array):
-        if ka < 1e-9:
-            continue
-        N = _wiscombe_nmax(ka)
-        series = 0 + 0j
-        for n in range(1, N + 1):
-            an, bn = _mie_an_bn(n, ka)
-            series += (-1) ** n * (2 * n + 1) * (an - bn)
-        Q[i] = abs(series) ** 2 / ka ** 2
-    return Q
-
-
-def _pi_tau(n_max, cos_alpha_vec):
-    """
-    Mie angle functions π_n(cos α) and τ_n(cos α) for n = 1…n_max,
-    vectorised over an array of cos(α) values.
-
-    Recurrences (Bohren & Huffman, App. A):
-        π_0 = 0,  π_1 = 1
-        π_n = ((2n-1)/(n-1)) cos α · π_{n-1}  −  (n/(n-1)) π_{n-2}
-        τ_n = n cos α · π_n  −  (n+1) π_{n-1}
-    """
-    n_obs = len(cos_alpha_vec)
-    pi  = np.zeros((n_obs, n_max + 1))
-    tau = np.zeros((n_obs, n_max + 1))
-    pi[:, 1]  = 1.0
-    tau[:, 1] = cos_alpha_vec
-    for n in range(2, n_max + 1):
-        pi[:, n]  = ((2*n-1)/(n-1)) * cos_alpha_vec * pi[:, n-1] - (n/(n-1)) * pi[:, n-2]
-        tau[:, n] = n * cos_alpha_vec * pi[:, n] - (n+1) * pi[:, n-1]
-    return pi, tau
-
-
-def mie_S1_vectorised(ka, phi_obs_deg):
+def mie_S1_vectorised(ka, phi_obs_deg, backend='scipy'):
     """
     Mie amplitude function S1(α) for s-polarisation, equatorial plane.
 
@@ -134,27 +97,31 @@ def mie_S1_vectorised(ka, phi_obs_deg):
 
     Verification at φ=180° (backscatter):
       S1(π) = series/2  →  σ_back = (4π/k²)|series/2|² = π a² Q_back  ✓
+
+    `backend` selects the Mie coefficient backend (see mie.mie_coefficients).
     """
     cos_alpha = np.cos(np.deg2rad(phi_obs_deg))
-    N = _wiscombe_nmax(ka)
-    pi, tau = _pi_tau(N, cos_alpha)
-
-    S1 = np.zeros(len(phi_obs_deg), dtype=complex)
-    for n in range(1, N + 1):
-        an, bn = _mie_an_bn(n, ka)
-        fn = (2 * n + 1) / (n * (n + 1))
-        S1 += fn * (an * pi[:, n] + bn * tau[:, n])
+    S1, _ = mie_S1_S2(ka, cos_alpha, backend=backend)
     return S1
 
 
-def mie_bistatic_rcs(f_hz, phi_obs_deg):
+def mie_bistatic_rcs(f_hz, phi_obs_deg, backend='scipy'):
     """Bistatic RCS σ(φ) [m²] from Mie theory in the equatorial plane."""
     k  = 2 * np.pi * f_hz / C0
     ka = k * SPHERE_RAD_M
-    S1 = mie_S1_vectorised(ka, phi_obs_deg)
+    S1 = mie_S1_vectorised(ka, phi_obs_deg, backend)
     return (4 * np.pi / k ** 2) * np.abs(S1) ** 2
 
 
+def mie_bistatic_rcs_3d(f_hz, theta_deg, phi_deg, backend='scipy'):
+    """
+    Co-pol (E_θ) and cross-pol (E_φ) bistatic RCS [m²] on a full
+    (theta × phi) grid — the Mie counterpart of a 4π NF2FF evaluation.
+    """
+    ka = 2 * np.pi * f_hz / C0 * SPHERE_RAD_M
+    return mie_bistatic_rcs_grid(ka, SPHERE_RAD_M, theta_deg, phi_deg, backend=backend)
+
+
 # ═══════════════════════════════════════════════════════════════════════════
 # FDTD post-processing (re-uses existing simulation data, no re-run)
 # ═══════════════════════════════════════════════════════════════════════════
@@ -193,6 +160,44 @@ def _rebuild_nf2ff():
     return FDTD.CreateNF2FFBox(), E_dir
 
 
+def _calc_nf2ff(freq, theta, phi, outfile):
+    """
+    Far field from the stored NF2FF dumps using NF2FF_BACKEND, served from
+    the nf2ff_cache result cache while the dumps are unchanged.
+    """
+    if NF2FF_BACKEND == 'openems':
+        def compute(*args, **kw):
+            nf2ff, _ = _rebuild_nf2ff()
+            return nf2ff.CalcNF2FF(SIM_PATH, *args, **kw,
+                                   outfile=os.path.join(SIM_PATH, outfile))
+        return cached_nf2ff(SIM_PATH, freq, theta, phi, method='openems', compute=compute)
+    method = 'fft' if NF2FF_BACKEND == 'numpy-fft' else 'direct'
+    compute = None
+    if NF2FF_WORKERS > 1:
+        def compute(*args, **kw):
+            return parallel_nf2ff(SIM_PATH, *args, **kw, workers=NF2FF_WORKERS,
+                                  method=method)
+    return cached_nf2ff(SIM_PATH, freq, theta, phi, method=method, compute=compute)
+
+
+def nf2ff_fft_accuracy(f_hz=F0, step_deg=1.0):
+    """
+    Accuracy of the FFT far-field path against the direct radiation integral
+    on the 4π grid: max |ΔE| relative to the pattern peak, and the dB-RMS
+    of the co-pol RCS difference above −40 dB.
+    """
+    theta = np.arange(0, 180 + step_deg / 2, step_deg)
+    phi   = np.arange(-180, 180, step_deg)
+    ref = cached_nf2ff(SIM_PATH, f_hz, theta, phi, method='direct')
+    fft = cached_nf2ff(SIM_PATH, f_hz, theta, phi, method='fft')
+    peak = ref.E_norm.max()
+    err = max(np.abs(fft.E_theta - ref.E_theta).max(),
+              np.abs(fft.E_phi - ref.E_phi).max()) / peak
+    mask = np.abs(ref.E_theta) > peak * 1e-2
+    db = 20 * np.log10(np.abs(fft.E_theta[mask]) / np.abs(ref.E_theta[mask]))
+    return float(err), float(np.sqrt(np.mean(db ** 2)))
+
+
 def fdtd_freq_sweep():
     """Backscatter RCS vs frequency from NF2FF post-processing."""
     E_dir = [0, 0, 1]
@@ -200,9 +205,7 @@ def fdtd_freq_sweep():
     ef    = UI_data('et', SIM_PATH, freq)
     Pin   = 0.5 * np.linalg.norm(E_dir) ** 2 / Z0 * abs(np.array(ef.ui_f_val[0])) ** 2
 
-    nf2ff, _ = _rebuild_nf2ff()
-    res = nf2ff.CalcNF2FF(SIM_PATH, freq, 90, 180 + INC_ANGLE,
-                          outfile=os.path.join(SIM_PATH, 'val_freq.h5'))
+    res = _calc_nf2ff(freq, 90, 180 + INC_ANGLE, 'val_freq.h5')
     rcs = np.array([4 * np.pi / Pin[i] * res.P_rad[i][0][0]
                     for i in range(len(freq))])
     return freq, rcs
@@ -216,13 +219,47 @@ def fdtd_polar(f_single=F0):
     ef  = UI_data('et', SIM_PATH, freq=f_single)
     Pin = 0.5 * np.linalg.norm(E_dir) ** 2 / Z0 * abs(ef.ui_f_val[0]) ** 2
 
-    nf2ff, _ = _rebuild_nf2ff()
-    res = nf2ff.CalcNF2FF(SIM_PATH, f_single, 90, phi_deg,
-                          outfile=os.path.join(SIM_PATH, 'val_polar.h5'))
+    res = _calc_nf2ff(f_single, 90, phi_deg, 'val_polar.h5')
     rcs = 4 * np.pi / Pin[0] * res.P_rad[0]
     return phi_deg, rcs[0]   # rcs[0] → shape (n_phi,)
 
 
+def fdtd_full_sphere(f_single=F0, step_deg=1.0):
+    """
+    Co-pol (E_θ) and cross-pol (E_φ) bistatic RCS over the full 4π sphere.
+
+    Returns theta_deg (n_theta,), phi_deg (n_phi,), and two
+    (n_theta, n_phi) RCS arrays in m².
+    """
+    E_dir     = [0, 0, 1]
+    theta_deg = np.arange(0, 180 + step_deg / 2, step_deg)
+    phi_deg   = np.arange(-180, 180, step_deg)
+
+    ef  = UI_data('et', SIM_PATH, freq=f_single)
+    Pin = 0.5 * np.linalg.norm(E_dir) ** 2 / Z0 * abs(ef.ui_f_val[0]) ** 2
+
+    res = _calc_nf2ff(f_single, theta_deg, phi_deg, 'val_sphere.h5')
+    # |E|² r² / (2 Z0) per component, normalised like P_rad
+    scale = 4 * np.pi / Pin[0] * res.r ** 2 / (2 * Z0)
+    rcs_co    = scale * np.abs(res.E_theta[0]) ** 2
+    rcs_cross = scale * np.abs(res.E_phi[0]) ** 2
+    return theta_deg, phi_deg, rcs_co, rcs_cross
+
+
+def full_sphere_db_rms(f_hz, theta_deg, phi_deg, rcs_co_fdtd, floor_db=-60.0):
+    """
+    dB-RMS error of the FDTD co-pol pattern against the 3-D Mie reference
+    over the whole grid, plus the peak cross-pol level of each (dB rel. to
+    the co-pol peak).  Values below `floor_db` are clipped, as in _polar_panel.
+    """
+    co_mie, cross_mie = mie_bistatic_rcs_3d(f_hz, theta_deg, phi_deg)
+    floor = co_mie.max() * 10 ** (floor_db / 10)
+    db_err = (10 * np.log10(np.maximum(rcs_co_fdtd, floor))
+              - 10 * np.log10(np.maximum(co_mie, floor)))
+    return (float(np.sqrt(np.mean(db_err ** 2))),
+            10 * np.log10(max(cross_mie.max(), floor) / co_mie.max()))
+
+
 # ═══════════════════════════════════════════════════════════════════════════
 # Figures
 # ═══════════════════════════════════════════════════════════════════════════
@@ -406,7 +443,7 @@ def _polar_panel(fig, gs_row, gs_col, phi_fdtd, rcs_fdtd_pattern, f_hz, label_re
 
     # Backscatter annotations
     bs_fdtd = float(np.interp(180.0, phi_fdtd, rcs_fdtd_pattern))
-    bs_mie  = float(mie_bistatic_rcs(f_hz, np.array([180.0]))[0])
+    bs_mie  = float(np.interp(180.0, phi_mie, rcs_mie))   # 180° is a grid node
 
     # dB-RMS error vs Mie  (avoids division-by-near-zero at pattern nulls;
     # percentage error explodes at nulls even when the absolute agreement is good)
@@ -528,6 +565,9 @@ if __name__ == '__main__':
         print('Run test_simulations/RCS_Sphere/rcs_sphere_full_sim.py first.')
         raise SystemExit(1)
 
+    # Persist Mie coefficient tables so figure regeneration skips Mie work
+    set_mie_cache(MieCache(cache_dir=DEFAULT_CACHE_DIR))
+
     print('─── Step 1/4: Post-processing frequency sweep (backscatter RCS) …')
     freq_fdtd, rcs_fdtd = fdtd_freq_sweep()
 
@@ -543,4 +583,16 @@ if __name__ == '__main__':
     print('─── Step 4/4: Generating dual-frequency polar comparison figure …')
     fig_polar_comparison(phi_fdtd, rcs_polar, phi_fdtd_2, rcs_polar_2)
 
+    if FULL_SPHERE:
+        print('─── Extra: 4π co-pol comparison at f0 (1° grid) …')
+        theta_s, phi_s, co_s, cross_s = fdtd_full_sphere(F0)
+        rms_db, cross_mie_db = full_sphere_db_rms(F0, theta_s, phi_s, co_s)
+        cross_fdtd_db = 10 * np.log10(cross_s.max() / co_s.max())
+        print(f'    co-pol dB-RMS over 4π = {rms_db:.2f} dB')
+        print(f'    peak cross-pol: FDTD {cross_fdtd_db:.1f} dB, Mie {cross_mie_db:.1f} dB')
+        if NF2FF_BACKEND != 'openems':
+            err, rms_db = nf2ff_fft_accuracy(F0)
+            print(f'    FFT vs direct NF2FF: max |ΔE| = {err:.1e} of peak, '
+                  f'co-pol {rms_db:.3f} dB-RMS')
+
     print('Done.')
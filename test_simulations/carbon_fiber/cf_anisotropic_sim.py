@@ -27,7 +27,9 @@ Two polarisations compared
   Ey (⊥ fiber): E-field perpendicular   → slab nearly transparent
 
 Three runs
-  1. Reference (no slab, Ex excitation) — transmission normalisation
+  1. Reference (no slab, Ex excitation) — transmission normalisation, taken
+     from the shared empty-domain library (common/reference_library.py) and
+     simulated only if no earlier job had the same mesh / excitation / dumps
   2. Ex polarisation with CFRP slab
   3. Ey polarisation with CFRP slab
 
@@ -67,12 +69,14 @@ from CSXCAD import ContinuousStructure
 from openEMS import openEMS
 from openEMS.physical_constants import C0
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from reference_library import reference_path, run_reference
+
 # ─── Paths ─────────────────────────────────────────────────────────────────────
 REPO_ROOT = Path(__file__).resolve().parents[2]
 SIM_BASE  = Path('/tmp/CF_Anisotropic')
 FIG_DIR   = REPO_ROOT / 'docs' / 'report_images'
 
-SIM_PATH_REF = SIM_BASE / 'reference'
 SIM_PATH_EX  = SIM_BASE / 'Ex_pol'
 SIM_PATH_EY  = SIM_BASE / 'Ey_pol'
 
@@ -105,6 +109,15 @@ f0       = 0.5 * (f_start + f_stop)
 F_MAPS   = [1.0e9, 2.0e9]      # Hz — field-map snapshots
 F_PROBE  = np.linspace(f_start, f_stop, 100)   # Hz — transmission curve
 
+# Solver settings outside the CSX XML; part of the reference-run key
+# EndCriteria=1e-3 (-30 dB): practical for plane-wave sims; DFT results are
+# accumulated throughout so accuracy doesn't depend on running until -50 dB.
+FDTD_SETTINGS = {
+    'EndCriteria': 1e-3,
+    'GaussExcite': [f0, 0.5 * (f_stop - f_start)],
+    'BoundaryCond': ['PML_8'] * 6,
+}
+
 # Probe location
 PROBE_Z    = 120.0    # mm behind slab (well inside domain, ~65 mm from PML)
 PROBE_HALF = 4.0      # mm — probe box half-size in x and y
@@ -155,16 +168,12 @@ def expected_transmission(sigma: float, freq: float,
 #  SIMULATION BUILDER
 # ══════════════════════════════════════════════════════════════════════════════
 
-def _build_and_run(sim_path: Path, e_dir: list, slab: bool, label: str):
-    """Build and run one openEMS simulation."""
-    os.makedirs(str(sim_path), exist_ok=True)
-
+def _build(e_dir: list, slab: bool):
+    """Build one openEMS simulation; returns (FDTD, CSX)."""
     # ── FDTD ──────────────────────────────────────────────────────────────────
-    # EndCriteria=1e-3 (-30 dB): practical for plane-wave sims; DFT results are
-    # accumulated throughout so accuracy doesn't depend on running until -50 dB.
-    FDTD = openEMS(EndCriteria=1e-3)
-    FDTD.SetGaussExcite(f0, 0.5 * (f_stop - f_start))
-    FDTD.SetBoundaryCond(['PML_8'] * 6)
+    FDTD = openEMS(EndCriteria=FDTD_SETTINGS['EndCriteria'])
+    FDTD.SetGaussExcite(*FDTD_SETTINGS['GaussExcite'])
+    FDTD.SetBoundaryCond(FDTD_SETTINGS['BoundaryCond'])
 
     CSX  = ContinuousStructure()
     FDTD.SetCSX(CSX)
@@ -234,13 +243,31 @@ def _build_and_run(sim_path: Path, e_dir: list, slab: bool, label: str):
         np.array([-PROBE_HALF, -PROBE_HALF, PROBE_Z]),
         np.array([ PROBE_HALF,  PROBE_HALF, PROBE_Z]),
     )
+    return FDTD, CSX
+
 
-    # ── Run ───────────────────────────────────────────────────────────────────
+def _build_and_run(sim_path: Path, e_dir: list, slab: bool, label: str):
+    """Build and run one openEMS simulation."""
+    os.makedirs(str(sim_path), exist_ok=True)
+    FDTD, _ = _build(e_dir, slab)
     print(f'  [{label}]  running openEMS …')
     FDTD.Run(str(sim_path), cleanup=False, verbose=0)
     print(f'  [{label}]  done.')
 
 
+def _reference_run(post_only: bool = False) -> Path:
+    """
+    Empty-domain Ex run from the shared reference library, simulated only
+    if the library has none for this mesh / excitation / dumps.
+    """
+    FDTD, CSX = _build([1, 0, 0], slab=False)
+    if post_only:
+        return Path(reference_path(CSX, FDTD_SETTINGS, target=['CFRP'])[0])
+    print('  [REF  no-slab  Ex]  from the reference library …')
+    return Path(run_reference(FDTD, CSX, FDTD_SETTINGS, target=['CFRP'],
+                              cleanup=False, verbose=0))
+
+
 # ══════════════════════════════════════════════════════════════════════════════
 #  HDF5 READERS
 # ══════════════════════════════════════════════════════════════════════════════
@@ -384,9 +411,9 @@ def plot_field_maps():
     print(f'  Saved: {out}')
 
 
-def plot_transmission():
+def plot_transmission(ref_path: Path):
     """Transmission coefficient vs frequency — FDTD vs analytical estimate."""
-    E_ref = _read_probe_h5(SIM_PATH_REF)
+    E_ref = _read_probe_h5(ref_path)
     E_ex  = _read_probe_h5(SIM_PATH_EX)
     E_ey  = _read_probe_h5(SIM_PATH_EY)
 
@@ -594,10 +621,10 @@ def main():
     print(f'  max_cell={max_cell:.1f} mm,  fine_cell={fine_cell} mm')
     print()
 
+    # Run 1: reference — no slab, Ex polarisation (shared, usually already done)
+    ref_path = _reference_run(post_only)
+    print(f'  Reference run: {ref_path}')
     if not post_only:
-        # Run 1: reference — no slab, Ex polarisation
-        _build_and_run(SIM_PATH_REF, e_dir=[1, 0, 0], slab=False,
-                       label='REF  no-slab  Ex')
         # Run 2: Ex polarisation with slab (E ∥ fiber → high σ∥)
         _build_and_run(SIM_PATH_EX,  e_dir=[1, 0, 0], slab=True,
                        label='Ex pol  ∥ fiber')
@@ -611,7 +638,7 @@ def main():
     plot_field_maps()
 
     print('  Generating transmission curve …')
-    plot_transmission()
+    plot_transmission(ref_path)
 
     print('  Generating CW animation — Ex polarisation …')
     _make_cw_animation(SIM_PATH_EX, 'E∥ fiber (σ∥=2.5 S/m)', comp_idx=0,
@@ -14,12 +14,16 @@ Tested with:
 """
 
 import os
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib
 from field_processing import read_vtr_file, calculate_poynting_vector  # Import the necessary functions
 import tempfile
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from sim_cache import latest_sim_path
+
 matplotlib.use('Agg')  # Use non-interactive backend suitable for headless servers
 
 
@@ -114,7 +118,8 @@ def accumulate_poynting_magnitude(sim_path, desired_direction=[-1, 0, 0], bias_f
 
 if __name__ == '__main__':
     # Set the simulation path and base filename
-    sim_path = os.path.join(tempfile.gettempdir(), 'RCS_Little_Plane_Al_hi_frq')
+    # Most recent keyed run of the little_plane script (common/sim_cache.py)
+    sim_path = latest_sim_path(os.path.join(tempfile.gettempdir(), 'RCS_Little_Plane_Al_hi_frq'))
 
     if not os.path.exists(sim_path):
         print(f"Simulation directory not found: {sim_path}")
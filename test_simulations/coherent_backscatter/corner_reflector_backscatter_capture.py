@@ -15,6 +15,7 @@ Tested with:
 
 ### Import Libraries
 import os
+import sys
 import numpy as np
 import pickle  # For saving simulation parameters
 from CSXCAD import ContinuousStructure
@@ -23,6 +24,10 @@ from openEMS.physical_constants import *
 from openEMS.ports import UI_data
 import tempfile
 
+# NumPy NF2FF for the batched phase-centre sweep (see common/nf2ff_numpy.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from nf2ff_numpy import NF2FFSurfaces, phase_center_sweep
+
 ### Setup the simulation
 # Define the simulation path
 Sim_Path = os.path.join(tempfile.gettempdir(), 'RCS_Corner_Reflector_Simulation')
@@ -196,24 +201,27 @@ if not post_proc_only:
 
     if calc_reflected_image:
         # Set up the grid parameters
-        num_points_y = 3  # Number of points along y-axis
-        num_points_z = 3  # Number of points along z-axis
+        num_points_y = 64  # Number of points along y-axis
+        num_points_z = 64  # Number of points along z-axis
 
         y_range = np.linspace(-PW_Box_y / 2, PW_Box_y / 2, num_points_y)
         z_range = np.linspace(-PW_Box_z / 2, PW_Box_z / 2, num_points_z)
 
-        nf2ff_grid = np.zeros((num_points_y, num_points_z))
+        # Every phase centre in one pass: the surface currents are read once and
+        # each centre only adds a phase term (x fixed to 0 for the y z plane)
+        Y, Z = np.meshgrid(y_range, z_range, indexing='ij')
+        centers = np.stack([np.zeros(Y.size), Y.ravel(), Z.ravel()], axis=1)
+        surfaces = NF2FFSurfaces.from_sim(Sim_Path, f0)
+        E_theta, E_phi = phase_center_sweep(surfaces, 90, 180, centers, radius=2)
 
-        # Loop over grid points and calculate NF2FF
-        for iy, y in enumerate(y_range):
-            print("Calculating NF2FF at y = ", y, " of ", y_range[-1])
-            for iz, z in enumerate(z_range):
-                center = [0, y, z]  # Fix x to 0 for the y z plane
-                nf2ff_res = nf2ff.CalcNF2FF(Sim_Path, f0, 90, 180, center=center, radius=2)
-                nf2ff_grid[iy, iz] = nf2ff_res.P_rad[0][0][0]  # Save the calculated RCS value to the grid
+        E_theta = E_theta[0, :, 0, 0].reshape(num_points_y, num_points_z)
+        E_phi = E_phi[0, :, 0, 0].reshape(num_points_y, num_points_z)
+        nf2ff_grid = 2 ** 2 * (np.abs(E_theta) ** 2 + np.abs(E_phi) ** 2) / (2 * Z0)  # P_rad
 
-        # Save the grid data to a numpy file for post-processing
+        # Save the grid data to numpy files for post-processing
         np.save(os.path.join(Sim_Path, 'nf2ff_grid.npy'), nf2ff_grid)
+        np.save(os.path.join(Sim_Path, 'nf2ff_grid_E_theta.npy'), E_theta)
+        np.save(os.path.join(Sim_Path, 'nf2ff_grid_E_phi.npy'), E_phi)
 
         print(f"NF2FF grid data saved as: {os.path.join(Sim_Path, 'nf2ff_grid.npy')}")
 
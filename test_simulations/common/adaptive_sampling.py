@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+adaptive_sampling.py
+────────────────────
+Adaptive aspect-angle sampling of backscatter: start from a coarse grid and
+add incidence angles only where the pattern is not yet resolved, until
+linear interpolation in dB reproduces it to a tolerance.
+
+Each round estimates, for every interval between neighbouring samples, the
+error of interpolating linearly in dB at its midpoint: the difference
+between that linear value and a cubic through the four surrounding samples
+(one-sided at the ends of an open range, wrapped for a full 360° turn),
+maximised over frequencies and channels. This is the curvature term of the
+interpolation error, so flat regions stop refining after the first round
+while lobes and specular flashes keep getting split. Intervals above
+`tol_db` are bisected — the worst first, up to `batch` per round so a round
+is one parallel batch of FDTD runs — until all are below it, narrower than
+`min_step`, or the run budget is spent. Levels are clipped `dynamic_range`
+dB below each channel's peak so deep nulls do not attract samples.
+
+A flash narrower than the coarse step can fall between two samples that do
+not see it; lobe_width() gives the angular scale of the narrowest lobe of a
+target of a given extent, which the coarse step should not exceed.
+
+Usage:
+    from adaptive_sampling import refine_aspects, lobe_width
+    sweep = refine_aspects(simulate, 0, 360, step=lobe_width(f_max, 1.2),
+                           tol_db=1.0, min_step=0.05, periodic=True)
+    sweep.angles, sweep.S                        # (N,), (N, ..., F)
+    sweep.pattern(np.arange(0, 360, 0.1))        # dB, interpolated as certified
+
+simulate(angles) → complex S (n, ..., F), |S|² = RCS.
+
+Self-check (flat-plate flash, sphere and an edge pair, vs uniform sampling):
+    python adaptive_sampling.py
+"""
+
+import numpy as np
+
+C0 = 299792458.0
+
+
+def lobe_width(f_max, extent):
+    """Angular spacing [deg] of pattern lobes of a target `extent` [m] long at f_max."""
+    return np.rad2deg(C0 / f_max / (2.0 * extent))
+
+
+def _db(S, dynamic_range):
+    rcs = np.abs(S.reshape(len(S), -1)) ** 2
+    db = 10 * np.log10(np.maximum(rcs, 1e-300))
+    return np.maximum(db, db.max(axis=0) - dynamic_range)
+
+
+def _midpoint_error(angles, db, periodic, period):
+    """(mid (I,), error (I,)) of linear-in-dB interpolation on each interval."""
+    n = len(angles)
+    if periodic:
+        x = np.concatenate([angles[-1:] - period, angles, angles[:2] + period])
+        y = np.concatenate([db[-1:], db, db[:2]])
+        lo = np.arange(n) + 1                   # interval (x[lo], x[lo+1]), window lo-1 .. lo+2
+        start = lo - 1
+    else:
+        x, y = angles, db
+        lo = np.arange(n - 1)
+        start = np.clip(lo - 1, 0, max(n - 4, 0))
+    m = min(4, len(x))
+    idx = start[:, None] + np.arange(m)         # (I, m) cubic stencil
+    xs, ys = x[idx], y[idx]                     # (I, m), (I, m, C)
+    mid = 0.5 * (x[lo] + x[lo + 1])
+
+    # Lagrange polynomial through the stencil, evaluated at the midpoint
+    basis = np.ones_like(xs)
+    for j in range(m):
+        for k in range(m):
+            if j != k:
+                basis[:, j] *= (mid - xs[:, k]) / (xs[:, j] - xs[:, k])
+    poly = np.einsum('im,imc->ic', basis, ys)
+    linear = 0.5 * (y[lo] + y[lo + 1])
+    return mid, np.abs(poly - linear).max(axis=1)
+
+
+class AdaptiveSweep:
+    """
+    Samples of an adaptive sweep.
+
+    angles  : (N,) deg, sorted
+    S       : (N, ..., F) complex
+    rounds  : list of (n_samples, max_error_db) after each round
+    """
+
+    def __init__(self, angles, S, rounds, periodic=False, period=360.0, dynamic_range=40.0):
+        self.angles        = angles
+        self.S             = S
+        self.rounds        = rounds
+        self.periodic      = periodic
+        self.period        = period
+        self.dynamic_range = dynamic_range
+
+    def pattern(self, angles):
+        """RCS [dBsm] (len(angles), ..., F), linear in dB between samples."""
+        db = _db(self.S, self.dynamic_range)
+        x, period = self.angles, self.period if self.periodic else None
+        out = np.stack([np.interp(angles, x, col, period=period) for col in db.T], axis=-1)
+        return out.reshape((len(angles),) + self.S.shape[1:])
+
+    def save(self, path):
+        np.savez(path, angles=self.angles, S=self.S, rounds=np.array(self.rounds),
+                 periodic=self.periodic, period=self.period, dynamic_range=self.dynamic_range)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as d:
+            return cls(d['angles'], d['S'], [tuple(r) for r in d['rounds']], bool(d['periodic']),
+                       float(d['period']), float(d['dynamic_range']))
+
+
+def refine_aspects(sample, start, stop, step, tol_db=1.0, min_step=0.05, max_samples=None,
+                   batch=None, periodic=False, dynamic_range=40.0, verbose=True):
+    """
+    Adaptively sample `sample(angles) → S (n, ..., F)` on [start, stop] deg
+    (stop excluded and wrapped onto start if `periodic`), starting from a
+    grid of spacing `step`. Returns an AdaptiveSweep.
+    """
+    period = stop - start
+    n0 = max(int(np.ceil(period / step - 1e-9)), 3 if periodic else 1)
+    angles = start + period * np.arange(n0 + (0 if periodic else 1)) / n0
+    S = np.asarray(sample(angles))
+    rounds = []
+    while True:
+        db = _db(S, dynamic_range)
+        mid, err = _midpoint_error(angles, db, periodic, period)
+        width = np.diff(np.append(angles, angles[0] + period) if periodic else angles)
+        rounds.append((len(angles), float(err.max())))
+        if verbose:
+            print(f'  {len(angles):5d} aspects, worst interval error {err.max():6.2f} dB')
+        open_ = np.flatnonzero((err > tol_db) & (width / 2 >= min_step))
+        if open_.size == 0:
+            break
+        budget = len(open_) if max_samples is None else max_samples - len(angles)
+        if budget <= 0:
+            break
+        pick = open_[np.argsort(err[open_])[::-1][:min(budget, batch or len(open_))]]
+        new = np.sort(mid[pick])
+        new = np.where(new >= stop, new - period, new) if periodic else new
+        S_new = np.asarray(sample(new))
+        order = np.argsort(np.concatenate([angles, new]), kind='stable')
+        angles = np.concatenate([angles, new])[order]
+        S = np.concatenate([S, S_new])[order]
+    return AdaptiveSweep(angles, S, rounds, periodic, period, dynamic_range)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Self-check: analytic target with a narrow specular flash
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _self_check():
+    import time
+
+    freq = np.linspace(1e9, 2e9, 5)
+    k = 2 * np.pi * freq / C0
+
+    def target(angles):
+        """Sphere, 0.6 m plate broadside at 90° (flash), two edges 0.15 m apart."""
+        a = np.deg2rad(np.asarray(angles, float))[:, None]
+        off = np.sin(a - np.pi / 2)
+        plate = 2 * np.sqrt(np.pi) * 0.6 * 0.1 / (C0 / freq) * np.sinc(2 * k * 0.3 * off / np.pi)
+        edges = 0.05 * (np.exp(2j * k * 0.075 * np.cos(a)) + np.exp(-2j * k * 0.075 * np.cos(a)))
+        return (plate * (np.cos(a - np.pi / 2) > 0) + np.sqrt(np.pi) * 0.05 + edges).astype(complex)
+
+    runs = [0]
+
+    def sample(angles):
+        runs[0] += len(angles)
+        return target(angles)
+
+    dense = np.arange(0, 360, 0.01)
+    truth = _db(target(dense), 40.0)
+    seen = truth > truth.max(axis=0) - 30              # score within 30 dB of each peak
+    flash = (np.abs(dense - 90) < 10)[:, None] & seen
+
+    def score(sweep):
+        e = np.abs(sweep.pattern(dense).reshape(truth.shape) - truth)
+        return np.percentile(e[seen], 99), e[flash].max()
+
+    print(f'lobe width at 2 GHz, 0.6 m target: {lobe_width(2e9, 0.6):.2f}°')
+    t0 = time.perf_counter()
+    sweep = refine_aspects(sample, 0, 360, step=5.0, tol_db=1.0, min_step=0.02, batch=32,
+                           periodic=True, verbose=False)
+    dt = time.perf_counter() - t0
+    p99, fmax = score(sweep)
+    print(f'adaptive 1 dB: {runs[0]:5d} runs in {len(sweep.rounds)} rounds ({dt * 1e3:.0f} ms); '
+          f'99th pct error {p99:.2f} dB, flash max {fmax:.2f} dB')
+    for step in (2.0, 1.0, 0.5, 0.25):
+        ang = np.arange(0, 360, step)
+        p99, fmax = score(AdaptiveSweep(ang, target(ang), [], periodic=True))
+        print(f'uniform {step:4.2f}°:  {len(ang):5d} runs; 99th pct error {p99:.2f} dB, '
+              f'flash max {fmax:.2f} dB')
+
+
+if __name__ == '__main__':
+    _self_check()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+disk_cache.py
+─────────────
+Two-tier least-recently-used store of {name: ndarray} dicts, shared by the
+far-field result cache (nf2ff_cache.py) and the Mie coefficient tables
+(docs/report_images/mie_cache.py).
+
+    • in-process  — OrderedDict of array dicts, capped by entry count and bytes.
+    • on disk     — one .npz per key in `cache_dir`, capped by total bytes.
+                    A hit refreshes the file's mtime; eviction removes the
+                    oldest mtimes first, so the directory behaves as an LRU
+                    across runs.
+
+Keys are caller-chosen hex digests; files are written then renamed, so
+concurrent readers never see a partial entry, and a corrupt file is
+dropped and counted as a miss.
+
+Usage:
+    from disk_cache import LRUCache
+    cache = LRUCache(cache_dir='.my_cache', max_disk_bytes=256e6)
+    arrays = cache.get(key)                    # None on a miss
+    cache.put(key, {'E_theta': E_theta, 'freq': freq})
+    cache.disk_usage()                         # (files, bytes)
+
+Self-check (memory / disk eviction, corrupt entries):
+    python disk_cache.py
+"""
+
+import os
+import tempfile
+import zipfile
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+
+class LRUCache:
+    """
+    Two-tier LRU store of {name: ndarray} dicts.
+
+    Parameters
+    ----------
+    cache_dir      : directory for .npz files, or None for memory only.
+    max_entries    : in-process entry cap.
+    max_mem_bytes  : in-process byte cap.
+    max_disk_bytes : on-disk byte cap for `cache_dir`.
+    """
+
+    def __init__(self, cache_dir=None, max_entries=64,
+                 max_mem_bytes=256e6, max_disk_bytes=512e6):
+        self.cache_dir      = cache_dir
+        self.max_entries    = int(max_entries)
+        self.max_mem_bytes  = int(max_mem_bytes)
+        self.max_disk_bytes = int(max_disk_bytes)
+        self._mem       = OrderedDict()
+        self._mem_bytes = 0
+        self.hits = self.misses = 0
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    # ── lookup ────────────────────────────────────────────────────────────
+    def get(self, key):
+        """Return the cached array dict for `key`, or None."""
+        if key in self._mem:
+            self._mem.move_to_end(key)
+            self.hits += 1
+            return self._mem[key]
+
+        path = self._path(key)
+        if path is not None and os.path.exists(path):
+            try:
+                with np.load(path) as data:
+                    arrays = {name: data[name] for name in data.files}
+            except FileNotFoundError:
+                pass                    # evicted by another process meanwhile
+            except (OSError, ValueError, EOFError, zipfile.BadZipFile, zlib.error):
+                # Truncated / corrupt file — drop it and recompute
+                _remove(path)
+            else:
+                try:
+                    os.utime(path)
+                except FileNotFoundError:
+                    pass
+                self._remember(key, arrays)
+                self.hits += 1
+                return arrays
+
+        self.misses += 1
+        return None
+
+    def put(self, key, arrays):
+        """Store `arrays` (dict of ndarrays) under `key` in both tiers."""
+        self._remember(key, arrays)
+        path = self._path(key)
+        if path is None:
+            return
+        # Write-then-rename so concurrent readers never see a partial file;
+        # the .tmp suffix keeps eviction away from files still being written
+        fd, tmp = tempfile.mkstemp(suffix='.npz.tmp', dir=self.cache_dir)
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, path)
+        self._evict_disk()
+
+    def clear(self):
+        """Empty both tiers."""
+        self._mem.clear()
+        self._mem_bytes = 0
+        for path, _, _ in self._disk_entries():
+            _remove(path)
+
+    def disk_usage(self):
+        """(number of files, total bytes) in `cache_dir`."""
+        entries = self._disk_entries()
+        return len(entries), sum(size for _, size, _ in entries)
+
+    # ── internals ─────────────────────────────────────────────────────────
+    def _path(self, key):
+        if self.cache_dir is None:
+            return None
+        return os.path.join(self.cache_dir, f'{key}.npz')
+
+    def _remember(self, key, arrays):
+        size = sum(a.nbytes for a in arrays.values())
+        if key in self._mem:
+            self._mem_bytes -= sum(a.nbytes for a in self._mem.pop(key).values())
+        self._mem[key] = arrays
+        self._mem_bytes += size
+        while self._mem and (len(self._mem) > self.max_entries
+                             or self._mem_bytes > self.max_mem_bytes):
+            _, old = self._mem.popitem(last=False)
+            self._mem_bytes -= sum(a.nbytes for a in old.values())
+
+    def _disk_entries(self):
+        """(path, size, mtime) for every cached file, oldest first."""
+        if self.cache_dir is None or not os.path.isdir(self.cache_dir):
+            return []
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.npz'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((path, st.st_size, st.st_mtime))
+        return sorted(entries, key=lambda e: e[2])
+
+    def _evict_disk(self):
+        entries = self._disk_entries()
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_disk_bytes:
+                break
+            _remove(path)
+            total -= size
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Self-check: both tiers evict least-recently-used entries
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _self_check():
+    import time
+
+    block = {'a': np.zeros(1000)}                       # 8 kB per entry
+    mem = LRUCache(max_entries=2)
+    for k in 'xyz':
+        mem.put(k, block)
+    checks = {'memory keeps the 2 newest': list(mem._mem) == ['y', 'z']}
+
+    cache_dir = tempfile.mkdtemp()
+    disk = LRUCache(cache_dir, max_entries=0, max_disk_bytes=20e3)
+    for k in ('k1', 'k2'):
+        disk.put(k, block)
+        time.sleep(0.01)
+    disk.get('k1')                                      # refresh k1
+    time.sleep(0.01)
+    disk.put('k3', block)
+    checks['disk evicts the least recently read'] = (disk.get('k2') is None
+                                                     and disk.get('k1') is not None)
+    checks['disk usage within the cap'] = disk.disk_usage()[1] <= 20e3
+
+    with open(os.path.join(cache_dir, 'bad.npz'), 'wb') as f:
+        f.write(b'truncated')
+    checks['corrupt entry is a miss and removed'] = (
+        disk.get('bad') is None and not os.path.exists(os.path.join(cache_dir, 'bad.npz')))
+    disk.put('half', {'a': np.arange(1000.0)})
+    half = os.path.join(cache_dir, 'half.npz')
+    with open(half, 'rb') as f:
+        data = f.read()
+    with open(half, 'wb') as f:
+        f.write(data[:len(data) // 2])
+    checks['truncated entry is a miss and removed'] = (disk.get('half') is None
+                                                       and not os.path.exists(half))
+    partial = os.path.join(cache_dir, 'writer.npz.tmp')
+    open(partial, 'wb').close()
+    disk.put('k4', block)
+    checks['eviction leaves files being written'] = os.path.exists(partial)
+    os.remove(partial)
+    disk.clear()
+    checks['clear empties the directory'] = disk.disk_usage() == (0, 0)
+    for name, ok in checks.items():
+        print(f'  {"ok  " if ok else "FAIL"} {name}')
+
+
+if __name__ == '__main__':
+    _self_check()
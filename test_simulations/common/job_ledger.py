@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+job_ledger.py
+─────────────
+SQLite job ledger for long sweep campaigns: which runs finished, which
+failed, which were lost with a dead node — and a runner that resumes only
+those.
+
+One row per job: campaign, a key derived from its parameters (so adding
+the same grid twice is a no-op), the parameters as JSON, state
+(pending → running → done | failed), attempts, worker, heartbeat,
+created / started / finished times, output hash and the last error.
+
+SQLite has no row locks, so a claim is one short BEGIN IMMEDIATE
+transaction (the database write lock) that picks a claimable row and
+marks it running under the worker's name; updates afterwards only touch
+rows the worker still owns. A running job is a lease: run_worker()
+heartbeats it from a background thread, and a job whose heartbeat is older
+than `lease` seconds (its worker died) becomes claimable again, as do
+failed jobs with attempts left; one whose worker died on its last attempt
+is marked failed.
+
+Journal: the default rollback journal (DELETE) works wherever SQLite's
+POSIX file locks work, which includes a ledger shared by several nodes on
+NFS / SMB only if that filesystem implements locking correctly (many NFS
+setups do not: give each campaign a ledger on a filesystem with working
+locks, or use work_queue.FileBroker). wal=True switches to WAL, which lets
+readers (summary(), other workers) proceed while one worker claims but
+needs shared memory on one host — single-node use only, never on a
+network filesystem.
+
+Usage:
+    from job_ledger import JobLedger, run_worker
+    ledger = JobLedger('campaign.sqlite')
+    ledger.add_jobs('plane_sweep', [{'azimuth': a, 'pol': p} for a in az for p in 'HV'])
+    run_worker('campaign.sqlite', 'plane_sweep', simulate)    # on every worker / node
+    ledger.summary('plane_sweep')                             # {'done': 70, 'failed': 2}
+
+simulate(params) returns the output file path(s); their SHA-256 is stored.
+
+Self-check (threads standing in for nodes, one of them dying):
+    python job_ledger.py
+"""
+
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+LEASE = 600.0                           # s without heartbeat before a running job is reclaimed
+MAX_ATTEMPTS = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          INTEGER PRIMARY KEY,
+    campaign    TEXT NOT NULL,
+    key         TEXT NOT NULL,
+    params      TEXT NOT NULL,
+    state       TEXT NOT NULL DEFAULT 'pending',
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    worker      TEXT,
+    heartbeat   REAL,
+    created     REAL NOT NULL,
+    started     REAL,
+    finished    REAL,
+    output_hash TEXT,
+    error       TEXT,
+    UNIQUE (campaign, key)
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (campaign, state);
+"""
+
+
+def params_key(params):
+    """Stable key of a JSON-serialisable parameter dict."""
+    return hashlib.sha256(json.dumps(params, sort_keys=True, default=float).encode()).hexdigest()
+
+
+def hash_outputs(paths):
+    """SHA-256 over the contents of one or more output files (None if no paths)."""
+    if paths is None:
+        return None
+    paths = [paths] if isinstance(paths, (str, os.PathLike)) else list(paths)
+    h = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+    return h.hexdigest()
+
+
+def default_worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+
+
+class Job:
+    """A claimed job: ledger row id, campaign and parameters."""
+
+    def __init__(self, id, campaign, params, attempts):
+        self.id       = id
+        self.campaign = campaign
+        self.params   = params
+        self.attempts = attempts
+
+
+class JobLedger:
+    """
+    Connection to the ledger at `path` (one per thread / process). wal=True
+    only for a ledger on a local disk used from one host.
+    """
+
+    def __init__(self, path, timeout=60.0, wal=False):
+        self.path = path
+        self.wal = wal
+        self.db = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        if wal:
+            self.db.execute('PRAGMA journal_mode=WAL')
+            self.db.execute('PRAGMA synchronous=NORMAL')
+        else:
+            self.db.execute('PRAGMA journal_mode=DELETE')
+        self.db.executescript(_SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def add_jobs(self, campaign, params_list):
+        """Register jobs; those already in the campaign are left as they are."""
+        now = time.time()
+        rows = [(campaign, params_key(p), json.dumps(p, sort_keys=True, default=float), now)
+                for p in params_list]
+        with self.db:
+            self.db.execute('BEGIN IMMEDIATE')
+            before = self.db.total_changes
+            self.db.executemany('INSERT OR IGNORE INTO jobs (campaign, key, params, created) '
+                                'VALUES (?, ?, ?, ?)', rows)
+            return self.db.total_changes - before
+
+    def claim(self, campaign, worker, lease=LEASE, max_attempts=MAX_ATTEMPTS):
+        """
+        Atomically take one claimable job (pending, failed with attempts
+        left, or running with an expired lease and attempts left) and mark
+        it running; None when nothing is left to claim.
+        """
+        now = time.time()
+        with self.db:
+            self.db.execute('BEGIN IMMEDIATE')
+            self.db.execute("UPDATE jobs SET state = 'failed', finished = ?, "
+                            "error = 'lease expired on the last attempt' WHERE campaign = ? "
+                            "AND state = 'running' AND heartbeat < ? AND attempts >= ?",
+                            (now, campaign, now - lease, max_attempts))
+            row = self.db.execute(
+                "SELECT id, params, attempts FROM jobs WHERE campaign = ? AND ("
+                "  state = 'pending'"
+                "  OR (state = 'failed' AND attempts < ?)"
+                "  OR (state = 'running' AND heartbeat < ?)) "
+                "ORDER BY state = 'running', attempts, id LIMIT 1",
+                (campaign, max_attempts, now - lease)).fetchone()
+            if row is None:
+                return None
+            self.db.execute("UPDATE jobs SET state = 'running', worker = ?, heartbeat = ?, "
+                            "started = ?, finished = NULL, attempts = attempts + 1 WHERE id = ?",
+                            (worker, now, now, row[0]))
+        return Job(row[0], campaign, json.loads(row[1]), row[2] + 1)
+
+    def _update(self, job_id, worker, sql, args):
+        with self.db:
+            cur = self.db.execute(f"UPDATE jobs SET {sql} WHERE id = ? AND worker = ? "
+                                  "AND state = 'running'", (*args, job_id, worker))
+        return cur.rowcount == 1
+
+    def heartbeat(self, job_id, worker):
+        """Extend the lease; False if the job was reclaimed by another worker."""
+        return self._update(job_id, worker, 'heartbeat = ?', (time.time(),))
+
+    def complete(self, job_id, worker, output_hash=None):
+        return self._update(job_id, worker,
+                            "state = 'done', finished = ?, output_hash = ?, error = NULL",
+                            (time.time(), output_hash))
+
+    def fail(self, job_id, worker, error):
+        return self._update(job_id, worker, "state = 'failed', finished = ?, error = ?",
+                            (time.time(), str(error)[:2000]))
+
+    def reset(self, campaign, states=('failed',)):
+        """Return jobs in `states` to pending with fresh attempts."""
+        marks = ','.join('?' * len(states))
+        with self.db:
+            return self.db.execute(f"UPDATE jobs SET state = 'pending', attempts = 0, worker = NULL "
+                                   f"WHERE campaign = ? AND state IN ({marks})",
+                                   (campaign, *states)).rowcount
+
+    def summary(self, campaign):
+        """{state: count} of a campaign."""
+        return dict(self.db.execute('SELECT state, COUNT(*) FROM jobs WHERE campaign = ? '
+                                    'GROUP BY state', (campaign,)).fetchall())
+
+    def jobs(self, campaign, state=None):
+        """Rows of a campaign as dicts (params decoded), optionally of one state."""
+        sql = 'SELECT * FROM jobs WHERE campaign = ?' + (' AND state = ?' if state else '')
+        cur = self.db.execute(sql + ' ORDER BY id', (campaign, state) if state else (campaign,))
+        names = [d[0] for d in cur.description]
+        rows = [dict(zip(names, r)) for r in cur.fetchall()]
+        for r in rows:
+            r['params'] = json.loads(r['params'])
+        return rows
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Runner
+# ═══════════════════════════════════════════════════════════════════════════
+
+def run_worker(path, campaign, func, worker=None, lease=LEASE, max_attempts=MAX_ATTEMPTS,
+               max_jobs=None, wal=False):
+    """
+    Claim and run jobs of `campaign` until none are left (or `max_jobs`
+    have run): func(params) → output path(s) or None. The lease is renewed
+    every lease / 4 s while func runs. Returns the number of jobs run.
+    Safe to start any number of times, on any number of nodes sharing
+    the ledger file (on a filesystem with working locks; see above).
+    """
+    worker = worker or default_worker_name()
+    ledger = JobLedger(path, wal=wal)
+    n = 0
+    try:
+        while max_jobs is None or n < max_jobs:
+            job = ledger.claim(campaign, worker, lease, max_attempts)
+            if job is None:
+                break
+            stop = threading.Event()
+
+            def beat(job_id=job.id):
+                beater = JobLedger(path, wal=wal)
+                try:
+                    while not stop.wait(lease / 4):
+                        if not beater.heartbeat(job_id, worker):
+                            break
+                finally:
+                    beater.close()
+
+            thread = threading.Thread(target=beat, daemon=True)
+            thread.start()
+            try:
+                output = func(job.params)
+                ledger.complete(job.id, worker, hash_outputs(output))
+            except Exception as exc:
+                ledger.fail(job.id, worker, f'{type(exc).__name__}: {exc}')
+            finally:
+                stop.set()
+                thread.join()
+            n += 1
+    finally:
+        ledger.close()
+    return n
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Self-check: concurrent workers, failures, a dead worker, resume
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _self_check():
+    import tempfile
+    from collections import Counter
+
+    path = os.path.join(tempfile.mkdtemp(), 'ledger.sqlite')
+    ledger = JobLedger(path)
+    grid = [{'azimuth': a, 'pol': p} for a in range(0, 360, 10) for p in 'HV']
+    print(f'added {ledger.add_jobs("sweep", grid)} jobs, '
+          f're-adding adds {ledger.add_jobs("sweep", grid)}')
+
+    # A worker that claims one job and dies without finishing it
+    dead = ledger.claim('sweep', 'dead-node')
+
+    runs, lock = Counter(), threading.Lock()
+
+    def simulate(params):
+        with lock:
+            runs[params['azimuth'], params['pol']] += 1
+        time.sleep(0.002)
+        if params['azimuth'] == 90 and params['pol'] == 'H':
+            raise RuntimeError('solver diverged')
+        return None
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=run_worker, args=(path, 'sweep', simulate),
+                                kwargs={'worker': f'w{i}', 'lease': 0.5, 'max_attempts': 2})
+               for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    print(f'8 workers: {ledger.summary("sweep")} in {time.perf_counter() - t0:.2f} s; '
+          f'double runs: {sum(c > 1 for k, c in runs.items() if k != (90, "H"))}, '
+          f'dead job {dead.params} still running')
+
+    # Resume: the dead node's lease expires, failed job retried once more
+    time.sleep(0.6)
+    run_worker(path, 'sweep', simulate, worker='resume', lease=0.5, max_attempts=3)
+    failed = ledger.jobs('sweep', 'failed')
+    print(f'resume: {ledger.summary("sweep")}; failed job attempts {failed[0]["attempts"]}, '
+          f'error "{failed[0]["error"]}"')
+    print(f'dead job rerun: {runs[dead.params["azimuth"], dead.params["pol"]] == 1}')
+
+    # A job that kills its worker every time: failed after max_attempts claims
+    ledger.add_jobs('crash', [{'azimuth': 0}])
+    claims = 0
+    while ledger.claim('crash', f'crash{claims}', lease=0.05, max_attempts=3):
+        claims += 1
+        time.sleep(0.06)
+    print(f'crashing job: {claims} claims, then {ledger.summary("crash")}, '
+          f'"{ledger.jobs("crash")[0]["error"]}"')
+    ledger.close()
+
+
+if __name__ == '__main__':
+    _self_check()
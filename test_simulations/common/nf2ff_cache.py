@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+nf2ff_cache.py
+──────────────
+Content-addressed cache of far-field results, so repeated post-processing of
+the same simulation skips the NF2FF transform entirely.
+
+A result is keyed on
+    • a fingerprint of the sim's nf2ff_E* / nf2ff_H* dump files
+      (name, size and mtime of each — a re-run rewrites them, which changes
+      the key, so stale results are never served),
+    • the frequencies, θ / φ grids, radius, phase centre, box name and the
+      method that produced the result ('direct', 'fft', 'openems', …).
+The complex E_θ / E_φ blocks (plus freq, θ, φ, r) are stored through the
+two-tier LRUCache of disk_cache.py, giving size-bounded in-memory and
+on-disk eviction.
+
+Usage:
+    from nf2ff_cache import cached_nf2ff
+    res = cached_nf2ff(Sim_Path, freq, 90, 180)                     # NumPy engine
+    res = cached_nf2ff(Sim_Path, freq, 90, 180, method='openems',   # openEMS engine
+                       compute=lambda *a, **kw: nf2ff.CalcNF2FF(Sim_Path, *a, **kw))
+
+Inspect or clear the cache:
+    python nf2ff_cache.py [--clear] [cache_dir]
+"""
+
+import argparse
+import hashlib
+import os
+
+import numpy as np
+
+from disk_cache import LRUCache
+from nf2ff_numpy import NF2FFResult, find_nf2ff_dumps, calc_nf2ff
+
+SCRIPT_DIR        = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_DIR = os.path.join(SCRIPT_DIR, '.nf2ff_cache')
+
+
+def dump_fingerprint(sim_path, name='nf2ff'):
+    """SHA-1 over (file name, size, mtime) of every nf2ff dump in `sim_path`."""
+    h = hashlib.sha1()
+    for pair in find_nf2ff_dumps(sim_path, name):
+        for path in pair:
+            st = os.stat(path)
+            h.update(repr((os.path.basename(path), st.st_size, st.st_mtime_ns)).encode())
+    return h.hexdigest()
+
+
+def nf2ff_key(sim_path, freq, theta, phi, radius=1.0, center=(0, 0, 0), name='nf2ff',
+              method='direct'):
+    """Cache key for one far-field request against the current dump files."""
+    h = hashlib.sha1(dump_fingerprint(sim_path, name).encode())
+    for arr in (freq, theta, phi, radius, center):
+        arr = np.ascontiguousarray(np.atleast_1d(arr), dtype=float)
+        h.update(repr(arr.shape).encode())
+        h.update(arr.tobytes())
+    h.update(repr((name, method)).encode())
+    return h.hexdigest()
+
+
+_cache = None
+
+
+def set_nf2ff_cache(cache):
+    """Install an LRUCache (or None to disable caching) for cached_nf2ff()."""
+    global _cache
+    _cache = cache
+
+
+def get_nf2ff_cache():
+    return _cache
+
+
+def cached_nf2ff(sim_path, freq, theta, phi, radius=1.0, center=(0, 0, 0),
+                 name='nf2ff', method='direct', compute=None, cache=None):
+    """
+    Far field of `sim_path` on the (freq, θ, φ) grid, served from the cache
+    when the dumps and parameters are unchanged.
+
+    `compute(freq, theta, phi, radius=, center=)` produces the result on a
+    miss; it defaults to nf2ff_numpy.calc_nf2ff with `method` and may be any
+    callable returning an object with E_theta, E_phi and r (e.g.
+    nf2ff.CalcNF2FF). `method` is part of the key, so give custom callables
+    their own label.
+    `cache` defaults to the one installed with set_nf2ff_cache(), or a
+    DEFAULT_CACHE_DIR cache on first use.
+    """
+    if cache is None:
+        if _cache is None:
+            set_nf2ff_cache(LRUCache(cache_dir=DEFAULT_CACHE_DIR))
+        cache = _cache
+
+    freq  = np.atleast_1d(np.asarray(freq, dtype=float))
+    theta = np.atleast_1d(np.asarray(theta, dtype=float))
+    phi   = np.atleast_1d(np.asarray(phi, dtype=float))
+    key = nf2ff_key(sim_path, freq, theta, phi, radius, center, name, method)
+
+    stored = cache.get(key)
+    if stored is None:
+        if compute is None:
+            res = calc_nf2ff(sim_path, freq, theta, phi, radius=radius,
+                             center=center, name=name, method=method)
+        else:
+            res = compute(freq, theta, phi, radius=radius, center=center)
+        shape = (len(freq), len(theta), len(phi))
+        stored = {'freq': freq, 'theta': theta, 'phi': phi,
+                  'r': np.array(float(res.r)),
+                  'E_theta': np.asarray(res.E_theta, dtype=complex).reshape(shape),
+                  'E_phi': np.asarray(res.E_phi, dtype=complex).reshape(shape)}
+        cache.put(key, stored)
+
+    return NF2FFResult(stored['freq'], stored['theta'], stored['phi'],
+                       float(stored['r']), stored['E_theta'], stored['E_phi'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Inspect or clear an NF2FF result cache.')
+    parser.add_argument('cache_dir', nargs='?', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--clear', action='store_true', help='Delete every cached result.')
+    args = parser.parse_args()
+
+    cache = LRUCache(cache_dir=args.cache_dir)
+    files, size = cache.disk_usage()
+    print(f'{args.cache_dir}: {files} results, {size / 1e6:.1f} MB')
+    if args.clear:
+        cache.clear()
+        print('Cleared.')
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+nf2ff_chunked.py
+────────────────
+Dense (e.g. 0.5° full-sphere, 100-frequency) far-field evaluation under a
+fixed RAM budget, streamed into a chunked HDF5 file.
+
+The (freq × θ × φ) block is split two ways:
+    • frequency blocks — sized so the block's surface currents (and the
+      E/H fields they are built from) fit in half of `ram_bytes`;
+    • θ-row tiles      — each task evaluates full φ rows for a run of θ
+      values with nf2ff_numpy.far_field, whose phase matrix is held under
+      the remaining budget split across workers.
+Tiles run serially, on a thread pool (NumPy's exp / matmul release the
+GIL), or on a process pool (surfaces sent once per frequency block via the
+pool initialiser). The main process writes each finished tile straight
+into /E_theta, /E_phi and /P_rad, chunked (1, rows, n_phi), so the full
+result never has to be in memory.
+
+Output layout (readable with read_far_field_h5):
+    /freq (F,)  /theta (T,)  /phi (P,)            — Hz, deg, deg
+    /E_theta, /E_phi (F, T, P) complex            — at attrs['radius'] [m]
+    /P_rad (F, T, P) float                        — radiation intensity
+
+Usage:
+    python nf2ff_chunked.py SIM_PATH OUT.h5 --f-start 1e9 --f-stop 10e9 \\
+        --n-freq 100 --step 0.5 --ram-gb 8 --workers 16
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import h5py
+import numpy as np
+
+from nf2ff_numpy import NF2FFResult, NF2FFSurfaces, Z0, far_field, find_nf2ff_dumps
+
+# Bytes held per (frequency, surface point) while NF2FFSurfaces is built:
+# complex E and H (3 each) read per face, then J and M (3 each)
+_SURFACE_BYTES = 4 * 3 * 16
+
+
+def surface_points(sim_path, name='nf2ff'):
+    """Total number of NF2FF surface cells, from the dump meshes alone."""
+    total = 0
+    for e_file, _ in find_nf2ff_dumps(sim_path, name):
+        with h5py.File(e_file, 'r') as f:
+            total += int(np.prod([len(f['Mesh'][a]) for a in 'xyz']))
+    return total
+
+
+def plan_blocks(n_freq, n_theta, n_phi, n_points, ram_bytes=2e9, workers=1):
+    """
+    (frequencies per block, θ rows per tile, far_field max_bytes) that keep
+    one frequency block plus `workers` concurrent tiles within `ram_bytes`.
+    Raises MemoryError if a single frequency and θ row do not fit.
+    """
+    half = ram_bytes / 2
+    f_block = int(min(n_freq, half // (_SURFACE_BYTES * n_points)))
+    if f_block < 1:
+        raise MemoryError(f'{n_points} surface points need '
+                          f'{_SURFACE_BYTES * n_points / 1e9:.2f} GB per frequency; '
+                          f'raise ram_bytes above {2 * _SURFACE_BYTES * n_points / 1e9:.2f} GB')
+    per_worker = half / max(1, workers)
+    # Output rows: E_theta + E_phi (complex) + P_rad per (f, θ, φ), plus the
+    # one-direction phase row far_field needs at minimum
+    row_bytes = f_block * n_phi * (2 * 16 + 8)
+    min_phase = 16 * f_block * n_points
+    # At least one tile per worker, otherwise as many rows as fit
+    rows = int(min(-(-n_theta // max(1, workers)),
+                   (per_worker - min_phase) // max(row_bytes, 1)))
+    if rows < 1:
+        raise MemoryError('ram_bytes too small for one θ row per worker; '
+                          'lower workers or raise ram_bytes')
+    max_bytes = per_worker - rows * row_bytes
+    return f_block, rows, max_bytes
+
+
+# ── worker side ──────────────────────────────────────────────────────────────
+_surfaces = None
+
+
+def _init_worker(surfaces):
+    global _surfaces
+    _surfaces = surfaces
+
+
+def _tile(theta, phi, radius, center, max_bytes, surfaces=None):
+    res = far_field(_surfaces if surfaces is None else surfaces,
+                    theta, phi, radius, center, max_bytes)
+    return res.E_theta, res.E_phi
+
+
+# ── driver ───────────────────────────────────────────────────────────────────
+def far_field_to_h5(sim_path, freq, theta, phi, out_file, radius=1.0,
+                    center=(0, 0, 0), name='nf2ff', ram_bytes=2e9, workers=1,
+                    executor='thread', verbose=True):
+    """
+    Evaluate the far field of `sim_path` on (freq × θ × φ) [Hz, deg, deg]
+    and stream it into `out_file`. `executor` is 'thread' or 'process'
+    (ignored when workers == 1). Returns `out_file`.
+    """
+    freq  = np.atleast_1d(np.asarray(freq, dtype=float))
+    theta = np.atleast_1d(np.asarray(theta, dtype=float))
+    phi   = np.atleast_1d(np.asarray(phi, dtype=float))
+    F, T, P = len(freq), len(theta), len(phi)
+    f_block, rows, max_bytes = plan_blocks(F, T, P, surface_points(sim_path, name),
+                                           ram_bytes, workers)
+    if verbose:
+        print(f'{F} freq × {T}×{P} directions: blocks of {f_block} freq, '
+              f'tiles of {rows} θ rows, {workers} {executor} worker(s)')
+
+    tiles = [slice(t0, min(t0 + rows, T)) for t0 in range(0, T, rows)]
+    t_start = time.perf_counter()
+    with h5py.File(out_file, 'w') as h5:
+        h5['freq'], h5['theta'], h5['phi'] = freq, theta, phi
+        h5.attrs['radius'] = radius
+        h5.attrs['center'] = np.asarray(center, dtype=float)
+        chunks = (1, rows, P)
+        E_theta = h5.create_dataset('E_theta', (F, T, P), complex, chunks=chunks)
+        E_phi   = h5.create_dataset('E_phi', (F, T, P), complex, chunks=chunks)
+        P_rad   = h5.create_dataset('P_rad', (F, T, P), float, chunks=chunks)
+
+        def store(fs, ts, et, ep):
+            E_theta[fs, ts] = et
+            E_phi[fs, ts] = ep
+            P_rad[fs, ts] = radius ** 2 * (np.abs(et) ** 2 + np.abs(ep) ** 2) / (2 * Z0)
+
+        for f0 in range(0, F, f_block):
+            fs = slice(f0, min(f0 + f_block, F))
+            surfaces = NF2FFSurfaces.from_sim(sim_path, freq[fs], name)
+
+            if workers == 1:
+                for ts in tiles:
+                    store(fs, ts, *_tile(theta[ts], phi, radius, center, max_bytes, surfaces))
+            else:
+                if executor == 'process':
+                    pool = ProcessPoolExecutor(workers, initializer=_init_worker,
+                                               initargs=(surfaces,))
+                    args = {}
+                else:
+                    pool = ThreadPoolExecutor(workers)
+                    args = {'surfaces': surfaces}
+                with pool:
+                    futures = {pool.submit(_tile, theta[ts], phi, radius, center,
+                                           max_bytes, **args): ts for ts in tiles}
+                    for fut, ts in futures.items():
+                        store(fs, ts, *fut.result())
+            del surfaces
+
+            if verbose:
+                print(f'  {fs.stop}/{F} frequencies  '
+                      f'({time.perf_counter() - t_start:.1f} s)')
+    return out_file
+
+
+def read_far_field_h5(path, freq_index=slice(None)):
+    """NF2FFResult for the selected frequencies of a far_field_to_h5 file."""
+    with h5py.File(path, 'r') as h5:
+        freq = np.atleast_1d(h5['freq'][freq_index])
+        sel = np.atleast_1d(np.arange(len(h5['freq']))[freq_index])
+        return NF2FFResult(freq, h5['theta'][()], h5['phi'][()],
+                           float(h5.attrs['radius']),
+                           h5['E_theta'][sel], h5['E_phi'][sel])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Chunked full-sphere NF2FF into HDF5.')
+    parser.add_argument('sim_path')
+    parser.add_argument('out_file')
+    parser.add_argument('--f-start', type=float, required=True)
+    parser.add_argument('--f-stop', type=float, required=True)
+    parser.add_argument('--n-freq', type=int, default=100)
+    parser.add_argument('--step', type=float, default=0.5, help='Angular step [deg].')
+    parser.add_argument('--radius', type=float, default=1.0)
+    parser.add_argument('--ram-gb', type=float, default=2.0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--executor', choices=['thread', 'process'], default='thread')
+    parser.add_argument('--name', default='nf2ff')
+    args = parser.parse_args()
+
+    far_field_to_h5(args.sim_path,
+                    np.linspace(args.f_start, args.f_stop, args.n_freq),
+                    np.arange(0, 180 + args.step / 2, args.step),
+                    np.arange(-180, 180, args.step),
+                    args.out_file, radius=args.radius, name=args.name,
+                    ram_bytes=args.ram_gb * 1e9, workers=args.workers,
+                    executor=args.executor)
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+nf2ff_transient.py
+──────────────────
+Time-domain near-to-far-field transform: the far-field waveform (e.g. the
+backscattered impulse response) straight from the time-domain nf2ff_E* /
+nf2ff_H* dumps of CreateNF2FFBox() (no `frequency=` given), for every
+requested direction in one pass over the dumps.
+
+With retarded time τ = t − R/c and delays d = r̂·(r′ − c)/c, the e^{+jωt}
+formulas of nf2ff_numpy become
+    N(τ) = Σ J(r′, τ + d)          L(τ) = Σ M(r′, τ + d)
+    R·E_θ(τ) = −1/(4πc) · d/dτ [L_φ + Z0 N_θ]
+    R·E_φ(τ) = +1/(4πc) · d/dτ [L_θ − Z0 N_φ]
+openEMS samples time-domain dumps near the Nyquist rate of the excitation,
+so the delays cannot be applied by interpolating the samples directly.
+Instead each cell's delay is split into
+    • a fine bin on a grid of Δt / `upsample` (linear weights between the
+      two nearest bins), accumulated for all directions at once as one
+      sparse (bins × 3S) @ (3S × time block) product per dump block;
+    • the integer part of each bin, a shift-and-add at the dump rate;
+    • the `upsample` fractional bin offsets and d/dτ, applied exactly as
+      FFT phase factors.
+Every snapshot is read once per direction chunk and the cost does not grow
+with the number of frequencies, unlike a DFT of the dumps followed by one
+frequency-domain NF2FF per frequency. E and H may be dumped at staggered
+times; each keeps its own time axis.
+
+`TransientNF2FFResult.spectrum()` returns an NF2FFResult with the same
+2·Δt·Σ x(t) e^{−jωt} scaling as nf2ff_numpy.calc_nf2ff on the same dumps,
+so RCS = 4π P_rad / Pin holds at every frequency of the band.
+
+Usage:
+    from nf2ff_transient import transient_nf2ff
+    res = transient_nf2ff(Sim_Path, 90, 180, oversample=4)
+    plt.plot(res.t * 1e9, res.rE_theta[:, 0, 0])          # backscatter waveform
+    RCS = 4 * np.pi / Pin * res.spectrum(freq).P_rad[:, 0, 0]
+
+Self-check against an analytic Hertzian-dipole pulse (no openEMS needed):
+    python nf2ff_transient.py
+Evaluate an existing simulation:
+    python nf2ff_transient.py SIM_PATH --theta 90 --phi 180 --out waveform.npz
+"""
+
+import argparse
+import os
+import time
+
+import h5py
+import numpy as np
+from scipy import sparse
+
+from nf2ff_numpy import (C0, Z0, NF2FFResult, _directions, _face_mesh, _outward_normals,
+                         _td_index, _to_points, find_nf2ff_dumps)
+
+_TILE = 16                              # samples per sparse product (cache-sized)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Time-domain surface currents
+# ═══════════════════════════════════════════════════════════════════════════
+
+class _TDSurfaces:
+    """Geometry and time axes of the time-domain dumps of one NF2FF box."""
+
+    def __init__(self, sim_path, name='nf2ff'):
+        self.pairs = find_nf2ff_dumps(sim_path, name)
+        meshes = [_face_mesh(e_file) for e_file, _ in self.pairs]
+        self.pos    = np.concatenate([m[0] for m in meshes])
+        self.weight = np.concatenate([m[1] for m in meshes])
+        self.normal = np.concatenate(_outward_normals([m[0] for m in meshes],
+                                                      [m[2] for m in meshes]))
+        # Per field: dataset names of every face, and the common time axis
+        self.names, self.t = {}, {}
+        for i, tag in enumerate('EH'):
+            names, times = [], None
+            for pair in self.pairs:
+                with h5py.File(pair[i], 'r') as f:
+                    if 'TD' not in f['FieldData']:
+                        raise ValueError(f'{pair[i]}: no time-domain dump '
+                                         '(CreateNF2FFBox was given frequency=)')
+                    n, t = _td_index(f['FieldData/TD'])
+                if times is not None and (len(t) != len(times) or not np.allclose(t, times)):
+                    raise ValueError(f'{pair[i]}: time axis differs from the other faces')
+                names.append(n)
+                times = t
+            self.names[tag], self.t[tag] = names, times
+
+        steps = np.concatenate([np.diff(t) for t in self.t.values()])
+        self.dt = float(np.median(steps))
+        if np.abs(steps - self.dt).max() > 1e-3 * self.dt:
+            raise ValueError('time-domain dumps are not uniformly sampled')
+
+    def read(self, n0, n1):
+        """
+        (S, 6, n1 − n0) float32 area-weighted currents [M = −n̂ × E, J = n̂ × H]
+        for samples n0 … n1 − 1 of each field's own time axis (zero past its end).
+        """
+        cur = np.zeros((len(self.pos), 6, n1 - n0), dtype=np.float32)
+        for c, (tag, sign) in enumerate((('E', -1.0), ('H', 1.0))):
+            m = min(n1, len(self.t[tag])) - n0
+            if m <= 0:
+                continue
+            fields = []
+            for pair, names in zip(self.pairs, self.names[tag]):
+                with h5py.File(pair['EH'.index(tag)], 'r') as f:
+                    group = f['FieldData/TD']
+                    fields.append(_to_points(np.stack(
+                        [group[n][()] for n in names[n0:n0 + m]]).astype(float)))
+            field = sign * np.cross(self.normal, np.concatenate(fields, axis=1)) \
+                * self.weight[:, None]
+            cur[:, 3 * c:3 * c + 3, :m] = field.transpose(1, 2, 0)
+        return cur
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Transform
+# ═══════════════════════════════════════════════════════════════════════════
+
+class TransientNF2FFResult:
+    """
+    Far-field waveforms R·E_θ(τ), R·E_φ(τ) [V] against retarded time
+    τ = t − R/c [s] (τ = 0 is a plane wavefront through `center`).
+
+    t                : (M,) s
+    theta / phi      : degrees, as passed
+    rE_theta, rE_phi : (M, n_theta, n_phi)
+    """
+
+    def __init__(self, t, theta, phi, rE_theta, rE_phi):
+        self.t        = t
+        self.theta    = theta
+        self.phi      = phi
+        self.rE_theta = rE_theta
+        self.rE_phi   = rE_phi
+        self.dt       = t[1] - t[0]
+
+    def spectrum(self, freq, radius=1.0):
+        """
+        NF2FFResult at `freq` [Hz] and `radius` [m], with the DFT scaling
+        openEMS and nf2ff_numpy use for time-domain dumps.
+        """
+        freq = np.atleast_1d(np.asarray(freq, dtype=float))
+        kernel = 2 * self.dt * np.exp(-2j * np.pi * np.outer(freq, self.t))
+        k = 2 * np.pi * freq / C0
+        scale = (np.exp(-1j * k * radius) / radius)[:, None, None]
+        shape = (len(freq), len(self.theta), len(self.phi))
+        E = [scale * (kernel @ w.reshape(len(self.t), -1)).reshape(shape)
+             for w in (self.rE_theta, self.rE_phi)]
+        return NF2FFResult(freq, self.theta, self.phi, radius, *E)
+
+
+def _delay_bins(q, n_bins):
+    """
+    Sparse (A·n_bins, S) matrix spreading each cell over the two fine delay
+    bins around q (A, S) [fine samples], with linear weights.
+    """
+    A, S = q.shape
+    kf = np.floor(q).astype(np.int64)
+    beta = q - kf
+    rows = np.arange(A)[:, None, None] * n_bins + kf[..., None] + np.arange(2)
+    cols = np.broadcast_to(np.arange(S)[None, :, None], rows.shape)
+    vals = np.stack([1 - beta, beta], axis=-1)
+    return sparse.csr_matrix((vals.ravel(), (rows.ravel(), cols.ravel())),
+                             shape=(A * n_bins, S))
+
+
+def transient_nf2ff(sim_path, theta, phi, center=(0, 0, 0), name='nf2ff',
+                    upsample=8, oversample=1, max_bytes=256e6, time_block=256):
+    """
+    Far-field waveforms of `sim_path` for every (θ, φ) [deg] from the
+    time-domain dumps of box `name`, about phase centre `center` [m].
+
+    `upsample` sets the fine delay grid (Δt / upsample; the linear weights
+    between bins are accurate to ~(ω Δt / upsample)² / 8), `oversample`
+    returns the waveforms on a Δt / oversample grid (band-limited). Direction
+    chunks keep the delay matrices and accumulators within `max_bytes`.
+    """
+    theta = np.atleast_1d(np.asarray(theta, dtype=float))
+    phi   = np.atleast_1d(np.asarray(phi, dtype=float))
+    center = np.asarray(center, dtype=float)
+    surf = _TDSurfaces(sim_path, name)
+    r_hat, theta_hat, phi_hat = _directions(theta, phi)
+    A, S, dt = len(r_hat), len(surf.pos), surf.dt
+
+    # Output axis τ_m = tau0 + m Δt on the E samples; H's offset from them
+    # is applied later as a phase factor
+    d_ref = np.linalg.norm(surf.pos - center, axis=1).max() / C0
+    tau0 = surf.t['E'][0] - d_ref
+    t_offset = surf.t['H'][0] - surf.t['E'][0]
+    n_shift = int(np.ceil(2 * d_ref / dt)) + 2
+    n_bins = n_shift * upsample
+    n_in = max(len(t) for t in surf.t.values())
+    n_out = n_in + n_shift + int(np.ceil(abs(t_offset) / dt))
+    n_fft = 2 * n_out                   # zero padding against circular wrap
+
+    # Currents are read once if they fit in half the budget, else per chunk
+    # in blocks of `time_block` samples
+    cached = surf.read(0, n_in) if S * 6 * n_in * 4 <= max_bytes / 2 else None
+    budget = max_bytes / 2 if cached is not None else max_bytes - S * 6 * time_block * 4
+    # Per direction: delay matrix (~4× for COO construction), one tile of
+    # binned currents, the shift-and-add accumulator and its spectrum
+    per_dir = 2 * S * 12 * 4 + 6 * n_bins * _TILE * 4 + 6 * upsample * n_fft * 8 * 2
+    chunk = int(max(1, min(A, budget // per_dir)))
+
+    omega = 2 * np.pi * np.fft.rfftfreq(n_fft, dt)
+    frac = np.exp(-1j * np.outer(np.arange(upsample) / upsample * dt, omega))   # (U, W)
+    # Potentials from [M, J] (with H's time offset), then d/dτ
+    stagger = np.exp(-1j * omega * t_offset)
+    deriv = 1j * omega / (4 * np.pi * C0) * np.array([-1.0, 1.0])[:, None]     # (2, W)
+
+    out = np.empty((2, A, n_out * oversample))
+    for a0 in range(0, A, chunk):
+        sel = slice(a0, min(a0 + chunk, A))
+        n_a = sel.stop - sel.start
+        d = r_hat[sel] @ (surf.pos - center).T / C0                 # (A, S)
+        B = _delay_bins((d_ref - d) / dt * upsample, n_bins).astype(np.float32)
+
+        acc = np.zeros((n_a, upsample, 6, n_fft))
+        for r0 in range(0, n_in, time_block):
+            cur = (cached[..., r0:r0 + time_block] if cached is not None
+                   else surf.read(r0, min(r0 + time_block, n_in)))
+            for n0 in range(0, cur.shape[-1], _TILE):
+                tile = np.ascontiguousarray(cur[..., n0:n0 + _TILE])
+                m = tile.shape[-1]
+                Y = (B @ tile.reshape(S, -1)).reshape(n_a, n_shift, upsample, 6, m)
+                for k in range(n_shift):
+                    acc[..., r0 + n0 + k:r0 + n0 + k + m] += Y[:, k]
+
+        # Fractional bins and the H stagger as phase factors, then project
+        # [M, J] onto (P_θ, P_φ) and differentiate
+        spec = np.einsum('auiw,uw->aiw', np.fft.rfft(acc, axis=-1), frac)
+        spec[:, 3:] *= stagger
+        proj = np.concatenate([np.stack([phi_hat[sel], theta_hat[sel]], axis=1),
+                               Z0 * np.stack([theta_hat[sel], -phi_hat[sel]], axis=1)],
+                              axis=2)                               # (A, 2, 6)
+        spec = np.einsum('api,aiw->apw', proj, spec) * deriv
+        wave = np.fft.irfft(spec, n=n_fft * oversample, axis=-1) * oversample
+        out[:, sel] = wave[..., :n_out * oversample].transpose(1, 0, 2)
+
+    t = tau0 + np.arange(n_out * oversample) * dt / oversample
+    shape = (len(t), len(theta), len(phi))
+    rE_theta, rE_phi = (o.T.reshape(shape) for o in out)
+    return TransientNF2FFResult(t, theta, phi, rE_theta, rE_phi)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Self-check: Hertzian-dipole pulse written as time-domain dumps
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _pulse_spectrum(freq, f0, fc, t_delay):
+    """One-sided spectrum of a Gaussian-modulated pulse centred on f0."""
+    return np.exp(-((freq - f0) / fc) ** 2) * np.exp(-2j * np.pi * freq * t_delay)
+
+
+def _write_dipole_box_td(sim_path, dt, n_t, f0, fc, t_delay, half=0.3, n=31):
+    """
+    Write nf2ff_{E,H}_<i>.h5 time-domain face dumps of a z-directed dipole
+    driven by the pulse of _pulse_spectrum(), with H staggered by Δt/2 as in
+    openEMS. Returns the bin frequencies and the pulse spectrum I(f).
+    """
+    from nf2ff_numpy import _dipole_fields
+    fb = np.fft.rfftfreq(n_t, dt)
+    I = _pulse_spectrum(fb, f0, fc, t_delay)
+    I[0] = 0.0
+    u = np.linspace(-half, half, n)
+    for i, (axis, side) in enumerate([(a, s) for a in range(3) for s in (-1, 1)]):
+        lines = [u, u, u]
+        lines[axis] = np.array([side * half])
+        grid = np.meshgrid(*lines, indexing='ij')
+        pos = np.stack([g.ravel() for g in grid], axis=1)
+        shape = [len(l) for l in lines]
+        E, H = (np.zeros((len(fb), len(pos), 3), dtype=complex) for _ in range(2))
+        E[1:], H[1:] = _dipole_fields(pos, fb[1:])
+        for tag, field, t_off in (('E', E, 0.0), ('H', H, dt / 2)):
+            # Samples whose 2·Δt-scaled DFT is field · I(f), taken at t_n + t_off
+            spec = field * (I * np.exp(2j * np.pi * fb * t_off))[:, None, None] / (2 * dt)
+            samples = np.fft.irfft(spec, n=n_t, axis=0)                 # (T, S, 3)
+            with h5py.File(os.path.join(sim_path, f'nf2ff_{tag}_{i}.h5'), 'w') as f:
+                for a, l in zip('xyz', lines):
+                    f[f'Mesh/{a}'] = l
+                for m, s in enumerate(samples):
+                    ds = f.create_dataset(f'FieldData/TD/{m:08d}',
+                                          data=s.reshape(shape + [3]).transpose(3, 2, 1, 0))
+                    ds.attrs['time'] = [m * dt + t_off]
+    return fb, I
+
+
+def _self_check():
+    import tempfile
+    from nf2ff_numpy import calc_nf2ff
+    f0, fc = 500e6, 200e6
+    dt, n_t = 1 / 2.4e9, 256                    # Nyquist 1.2 GHz, like openEMS dumps
+    t_delay = 4 / (np.pi * fc)
+    theta = np.arange(0, 181, 10.0)
+    phi = np.arange(-180, 180, 10.0)
+    radius = 10.0
+
+    with tempfile.TemporaryDirectory() as sim_path:
+        fb, I = _write_dipole_box_td(sim_path, dt, n_t, f0, fc, t_delay)
+        t0 = time.perf_counter()
+        res = transient_nf2ff(sim_path, theta, phi, oversample=4)
+        t_td = time.perf_counter() - t0
+        band = fb[(fb > f0 - 2 * fc) & (fb < f0 + 2 * fc)]
+        t0 = time.perf_counter()
+        ref = calc_nf2ff(sim_path, band, theta, phi, radius=radius)
+        t_fd = time.perf_counter() - t0
+        # Single backscatter direction, the range-profile use case
+        t0 = time.perf_counter()
+        transient_nf2ff(sim_path, 90, 0)
+        t_td1 = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        calc_nf2ff(sim_path, band, 90, 0)
+        t_fd1 = time.perf_counter() - t0
+
+    print(f'{len(theta)}×{len(phi)} directions: transient ({n_t} samples) {t_td * 1e3:.0f} ms, '
+          f'calc_nf2ff ({len(band)} frequencies) {t_fd * 1e3:.0f} ms')
+    print(f'1 direction      : transient {t_td1 * 1e3:.0f} ms, calc_nf2ff {t_fd1 * 1e3:.0f} ms')
+
+    spec = res.spectrum(band, radius)
+    peak = np.abs(ref.E_theta).max()
+    print(f'  spectrum vs calc_nf2ff : max |ΔE_θ| / peak = '
+          f'{np.abs(spec.E_theta - ref.E_theta).max() / peak:.1e}, '
+          f'max |E_φ| / peak = {np.abs(spec.E_phi).max() / peak:.1e}')
+
+    # Analytic waveform: R·E_θ(τ) = sinθ · Z0/(4πc) · d/dτ Il(τ), band-limited
+    dIl = np.real(np.exp(2j * np.pi * np.outer(res.t, fb)) @ (2j * np.pi * fb * I)) / (n_t * dt)
+    exact = Z0 / (4 * np.pi * C0) * dIl[:, None] * np.sin(np.deg2rad(theta))[None, :]
+    # The synthetic dumps are periodic; compare away from the wrap-around
+    m = res.t < n_t * dt / 2
+    err = np.abs(res.rE_theta[m] - exact[m, :, None]).max() / np.abs(exact).max()
+    print(f'  waveform vs analytic   : max |Δ(R·E_θ)| / peak = {err:.1e}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Time-domain NF2FF from openEMS nf2ff dumps.')
+    parser.add_argument('sim_path', nargs='?', help='Simulation directory (omit for self-check).')
+    parser.add_argument('--theta', type=float, nargs='+', default=[90.0])
+    parser.add_argument('--phi', type=float, nargs='+', default=[180.0])
+    parser.add_argument('--name', default='nf2ff')
+    parser.add_argument('--oversample', type=int, default=4)
+    parser.add_argument('--out', help='Save t, theta, phi, rE_theta, rE_phi to this .npz.')
+    args = parser.parse_args()
+
+    if args.sim_path is None:
+        _self_check()
+    else:
+        t0 = time.perf_counter()
+        res = transient_nf2ff(args.sim_path, args.theta, args.phi, name=args.name,
+                              oversample=args.oversample)
+        print(f'Transient NF2FF in {time.perf_counter() - t0:.2f} s: '
+              f'{len(res.t)} samples, τ = {res.t[0] * 1e9:.2f} … {res.t[-1] * 1e9:.2f} ns')
+        if args.out:
+            np.savez(args.out, t=res.t, theta=res.theta, phi=res.phi,
+                     rE_theta=res.rE_theta, rE_phi=res.rE_phi)
+            print(f'Saved {args.out}')
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+polarimetry.py
+──────────────
+Full polarimetric scattering matrix from two orthogonally polarised runs,
+and synthesis of any transmit / receive polarisation from it.
+
+FDTD is linear, so the backscatter of any incident polarisation is a
+combination of the H- and V-polarised runs. Each run gives (S_θ, S_φ), the
+far field along the observation direction divided by the incident
+amplitude; projecting onto the receive basis vectors gives
+    S = [[S_HH, S_HV],
+         [S_VH, S_VV]]        (rows: receive, columns: transmit)
+in the backscatter-alignment (BSA) convention: transmit and receive use
+the same unit vectors ĥ, v̂, with (ĥ, v̂, k̂_inc) right-handed (as
+wave_calculations.calculate_polarization gives them). A polarisation is a
+Jones vector (h, v) built from tilt τ (from ĥ towards v̂) and ellipticity
+χ; with e^{+jωt}, χ = −45° is right-hand and +45° left-hand circular
+(IEEE). The received voltage is the BSA form
+    S(rx, tx) = rx^T · S · tx
+so a sphere (S ∝ I) gives zero for same-sense circular, as it should.
+
+Usage:
+    from polarimetry import ScatteringMatrix
+    sm = ScatteringMatrix.from_runs(freq, S_h, S_v, theta_hat, phi_hat, h_dir, v_dir)
+    sm.vv, sm.hv                                   # linear channels (..., F)
+    sm.circular()                                  # (..., F, 2, 2) in (R, L)
+    sm.synthesize(jones(30, 10), jones(30, 10))    # tilted, elliptical co-pol
+    sm.rcs(jones(0, -45), jones(0, -45))           # |S_RR|²
+
+Self-check on canonical scatterers:
+    python polarimetry.py
+"""
+
+import numpy as np
+
+RHC = -45.0                             # ellipticity of right-hand circular [deg]
+LHC = 45.0
+
+
+def jones(tilt_deg, ellipticity_deg=0.0):
+    """Unit Jones vector (h, v) of tilt τ and ellipticity χ [deg]."""
+    t, c = np.deg2rad(tilt_deg), np.deg2rad(ellipticity_deg)
+    return np.array([np.cos(t) * np.cos(c) - 1j * np.sin(t) * np.sin(c),
+                     np.sin(t) * np.cos(c) + 1j * np.cos(t) * np.sin(c)])
+
+
+class ScatteringMatrix:
+    """
+    Backscatter scattering matrices over frequency.
+
+    freq : (F,) Hz
+    S    : (..., F, 2, 2) complex, basis (H, V), [receive, transmit],
+           |S_rt|² = RCS of that channel
+    """
+
+    def __init__(self, freq, S):
+        self.freq = freq
+        self.S    = S
+
+    @classmethod
+    def from_runs(cls, freq, S_h, S_v, theta_hat, phi_hat, h_dir, v_dir):
+        """
+        Matrix from the (S_θ, S_φ) pairs (..., 2, F) of the H- and V-
+        transmit runs, with θ̂, φ̂ (..., 3) at the observation direction and
+        the transmit / receive unit vectors ĥ, v̂ (..., 3).
+        """
+        S_h, S_v = np.asarray(S_h, dtype=complex), np.asarray(S_v, dtype=complex)
+        theta_hat, phi_hat = np.asarray(theta_hat, float), np.asarray(phi_hat, float)
+
+        def receive(e, S_run):
+            e = np.asarray(e, dtype=float)
+            return (np.sum(e * theta_hat, axis=-1)[..., None] * S_run[..., 0, :]
+                    + np.sum(e * phi_hat, axis=-1)[..., None] * S_run[..., 1, :])
+
+        S = np.stack([np.stack([receive(h_dir, S_h), receive(h_dir, S_v)], axis=-1),
+                      np.stack([receive(v_dir, S_h), receive(v_dir, S_v)], axis=-1)], axis=-2)
+        return cls(np.asarray(freq, dtype=float), S)
+
+    hh = property(lambda self: self.S[..., 0, 0])
+    hv = property(lambda self: self.S[..., 0, 1])
+    vh = property(lambda self: self.S[..., 1, 0])
+    vv = property(lambda self: self.S[..., 1, 1])
+
+    def synthesize(self, rx, tx):
+        """Complex backscatter (..., F) for Jones vectors rx, tx (BSA)."""
+        return np.einsum('i,...ij,j->...', np.asarray(rx), self.S, np.asarray(tx))
+
+    def rcs(self, rx, tx):
+        """RCS (..., F) [m²] of the rx / tx polarisation pair."""
+        return np.abs(self.synthesize(rx, tx)) ** 2
+
+    def change_basis(self, a, b):
+        """S (..., F, 2, 2) in the orthonormal basis of Jones vectors (a, b)."""
+        P = np.stack([np.asarray(a), np.asarray(b)], axis=1)
+        return P.T @ self.S @ P
+
+    def circular(self):
+        """S (..., F, 2, 2) in the (R, L) circular basis: [[RR, RL], [LR, LL]]."""
+        return self.change_basis(jones(0, RHC), jones(0, LHC))
+
+    def save(self, path):
+        np.savez(path, freq=self.freq, S=self.S)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as d:
+            return cls(d['freq'], d['S'])
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Self-check: canonical scatterers
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _self_check():
+    from nf2ff_numpy import _directions
+
+    # Incident along +x (heading 0, elevation 0): v̂ = ŷ, ĥ = −ẑ, (ĥ, v̂, k̂) right-handed
+    k_dir, v_dir, h_dir = np.array([1., 0, 0]), np.array([0., 1, 0]), np.array([0., 0, -1])
+    assert np.allclose(np.cross(h_dir, v_dir), k_dir)
+    _, theta_hat, phi_hat = (d[0] for d in _directions(90.0, 180.0))   # backscatter −x
+    freq = np.linspace(1e9, 2e9, 3)
+
+    def runs(M):
+        """(S_θ, S_φ) of the H and V runs for a BSA matrix M in (H, V)."""
+        out = []
+        for tx in range(2):
+            E = M[0, tx] * h_dir + M[1, tx] * v_dir                     # scattered field
+            out.append(np.array([[E @ theta_hat] * len(freq), [E @ phi_hat] * len(freq)]))
+        return out
+
+    c, s = np.cos(np.deg2rad(22.5)), np.sin(np.deg2rad(22.5))
+    targets = {
+        'sphere':          np.eye(2),
+        'dihedral 0°':     np.diag([1.0, -1.0]),
+        'dihedral 22.5°':  np.array([[c * c - s * s, 2 * s * c], [2 * s * c, s * s - c * c]]),
+        'horizontal wire': np.diag([1.0, 0.0]),
+    }
+    print(f'{"target":16s}  {"HH":>5s} {"HV":>5s} {"VV":>5s}   {"RR":>5s} {"RL":>5s} {"LL":>5s}'
+          f'   {"45°/45°":>7s}')
+    for name, M in targets.items():
+        sm = ScatteringMatrix.from_runs(freq, *runs(M), theta_hat, phi_hat, h_dir, v_dir)
+        assert np.allclose(sm.S[0], M)
+        C = sm.circular()[0]
+        print(f'{name:16s}  {abs(sm.hh[0]):5.2f} {abs(sm.hv[0]):5.2f} {abs(sm.vv[0]):5.2f}   '
+              f'{abs(C[0, 0]):5.2f} {abs(C[0, 1]):5.2f} {abs(C[1, 1]):5.2f}   '
+              f'{abs(sm.synthesize(jones(45), jones(45))[0]):7.2f}')
+
+
+if __name__ == '__main__':
+    _self_check()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+reference_library.py
+────────────────────
+Shared library of empty-domain reference runs: the incident-field probes and
+dumps that transmission and background-subtraction studies divide by or
+subtract depend only on mesh, excitation, boundaries and the dumps
+themselves — not on the target — so each distinct one is simulated once
+and reused by every job that matches it.
+
+The reference key is the sim_cache.py key of the setup with the target
+removed from the Write2XML output — its properties, with their primitives
+and STL readers — along with the property ID attributes that shift when
+they go. A target job and its empty-domain counterpart therefore have the
+same key, and either can look the reference up. The caller names the
+target's properties (target=['stl_object']); everything else, e.g. a
+dielectric slab or ground plane the target sits on, stays in the key.
+Without target= every material-type property (Material, Metal,
+ConductingSheet, LumpedElement, dispersive materials) is dropped, which is
+only right for a target alone in vacuum: a background with its own
+materials would then share the key of an empty box.
+
+Runs live in LIBRARY/<key[:16]> with sim_cache's COMPLETE marker; a lock
+on <key>.lock (flock, msvcrt on Windows) makes concurrent jobs needing the
+same reference wait for one run instead of each starting one. LIBRARY is
+$OPENEMS_REFERENCE_LIBRARY, falling back to <tmp>/openEMS_reference_runs,
+which is private to each machine: set the variable to a shared directory
+for nodes to reuse each other's references.
+
+Usage:
+    from reference_library import run_reference, find_reference
+    ref_path = run_reference(FDTD_empty, CSX_empty, settings, cleanup=False)  # once per key
+    ref_path = find_reference(CSX_target, settings, target=['stl_object'])   # None if absent
+
+Self-check (XML keys and concurrent builds with a stand-in solver):
+    python reference_library.py
+"""
+
+import os
+import tempfile
+import xml.etree.ElementTree as ET
+
+from sim_cache import KEY_LENGTH, csx_xml, is_complete, run_once, xml_key
+
+try:
+    import fcntl
+except ImportError:                     # Windows
+    import msvcrt
+    fcntl = None
+
+LIBRARY = os.environ.get('OPENEMS_REFERENCE_LIBRARY',
+                         os.path.join(tempfile.gettempdir(), 'openEMS_reference_runs'))
+
+# CSXCAD property elements taken as the target when the caller names none
+TARGET_PROPERTIES = {'Material', 'Metal', 'ConductingSheet', 'LumpedElement', 'DebyeMaterial',
+                     'LorentzMaterial', 'DiscMaterial', 'ConductingSheetMaterial'}
+
+
+def empty_domain_xml(xml, target=None):
+    """
+    CSX XML bytes with the properties named in `target` (default: all of
+    TARGET_PROPERTIES' types) and the property IDs removed.
+    """
+    root = ET.fromstring(xml)
+    for props in root.iter('Properties'):
+        for prop in list(props):
+            if (prop.tag in TARGET_PROPERTIES if target is None
+                    else prop.get('Name') in target):
+                props.remove(prop)
+            else:
+                prop.attrib.pop('ID', None)
+    return ET.tostring(root)
+
+
+def reference_key(CSX, settings=None, target=None):
+    """Key of the empty domain of a (target or empty) ContinuousStructure."""
+    return xml_key(empty_domain_xml(csx_xml(CSX), target), settings)
+
+
+def reference_path(CSX, settings=None, library=None, target=None):
+    """(LIBRARY/<key[:16]>, key) of the reference run for CSX; not created."""
+    key = reference_key(CSX, settings, target)
+    return os.path.join(library or LIBRARY, key[:KEY_LENGTH]), key
+
+
+def find_reference(CSX, settings=None, library=None, target=None):
+    """Directory of the finished reference run matching CSX, or None."""
+    path, key = reference_path(CSX, settings, library, target)
+    return path if is_complete(path, key) else None
+
+
+def _lock(f):
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        return
+    while True:                         # LK_LOCK gives up after ~10 s
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            pass
+
+
+def _unlock(f):
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def run_reference(FDTD, CSX, settings=None, library=None, target=None, **run_kwargs):
+    """
+    Directory of the reference run for the empty-domain FDTD / CSX,
+    simulating it first (FDTD.Run(path, **run_kwargs)) unless the library
+    already has it. Concurrent callers with the same key run it once.
+    """
+    path, key = reference_path(CSX, settings, library, target)
+    os.makedirs(path, exist_ok=True)
+    with open(path + '.lock', 'w') as lock:
+        _lock(lock)
+        try:
+            run_once(FDTD, path, key, settings, **run_kwargs)
+        finally:
+            _unlock(lock)
+    return path
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Self-check: keys of target vs empty setups, one run under concurrency
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _self_check():
+    import threading
+    import time
+
+    domain = ('<Excitation ID="{i}" Name="plane_wave" Type="10" Excite="{e}"/>'
+              '<DumpBox ID="{j}" Name="probe" DumpType="10"><Primitives><Box/></Primitives></DumpBox>')
+    ground = '<Metal ID="9" Name="ground"><Primitives><Box Priority="1"/></Primitives></Metal>'
+
+    target = ('<Material ID="0" Name="CFRP"><Property Epsilon="4"/><Primitives><Box Priority="10"/>'
+              '</Primitives></Material><Metal ID="1" Name="stl"><Primitives>'
+              '<PolyhedronReader FileName="plane.stl"/></Primitives></Metal>')
+
+    def xml(with_target, excite='1,0,0', background=''):
+        props = background + (target + domain.format(i=2, j=3, e=excite) if with_target
+                              else domain.format(i=0, j=1, e=excite))
+        return (f'<openEMS><ContinuousStructure><Properties>{props}</Properties>'
+                f'<RectilinearGrid DeltaUnit="0.001"><XLines>-190,0,190</XLines>'
+                f'</RectilinearGrid></ContinuousStructure></openEMS>').encode()
+
+    class _CSX:
+        def __init__(self, data):
+            self.data = data
+
+        def Write2XML(self, path):
+            with open(path, 'wb') as f:
+                f.write(self.data)
+
+    settings = {'EndCriteria': 1e-3, 'BoundaryCond': ['PML_8'] * 6}
+    empty = reference_key(_CSX(xml(False)), settings)
+    checks = {
+        'target and empty setups share the key': reference_key(_CSX(xml(True)), settings) == empty,
+        'excitation changes the key':
+            reference_key(_CSX(xml(False, '0,1,0')), settings) != empty,
+        'boundaries change the key':
+            reference_key(_CSX(xml(False)), {**settings, 'BoundaryCond': ['MUR'] * 6}) != empty,
+        'named target over a ground plane keeps the ground':
+            reference_key(_CSX(xml(True, background=ground)), settings, ['CFRP', 'stl'])
+            == reference_key(_CSX(xml(False, background=ground)), settings, ['CFRP', 'stl'])
+            != empty,
+    }
+
+    class _Solver:
+        runs = 0
+
+        def Run(self, sim_path, **kw):
+            _Solver.runs += 1
+            time.sleep(0.05)
+
+    library = tempfile.mkdtemp()
+    threads = [threading.Thread(target=run_reference,
+                                args=(_Solver(), _CSX(xml(False)), settings, library))
+               for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    checks['6 concurrent jobs run the reference once'] = _Solver.runs == 1
+    checks['target job finds the reference'] = (find_reference(_CSX(xml(True)), settings, library)
+                                                 == reference_path(_CSX(xml(False)), settings,
+                                                                   library)[0])
+    checks['other polarisation has none'] = find_reference(_CSX(xml(True, '0,1,0')), settings,
+                                                           library) is None
+    for name, ok in checks.items():
+        print(f'  {"ok  " if ok else "FAIL"} {name}')
+
+
+if __name__ == '__main__':
+    _self_check()
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+scattering_centers.py
+─────────────────────
+Scattering-centre extraction from swept complex backscatter: which
+geometric features dominate the RCS, as a compact point-scatterer model.
+
+Each centre is a point at position r with complex amplitude a at the
+centre frequency f_c and a frequency dependence (f / f_c)^α (α = 1 flat
+plate, ½ singly curved, 0 point / doubly curved, −½ edge, −1 corner tip),
+so a sweep is modelled as
+    S(f, û) = Σ_n a_n (f / f_c)^{α_n} e^{j2k û·r_n}
+with |S|² = RCS when S is a scattering amplitude.
+
+    clean_isar()     — CLEAN on the ISAR image of a (freq × aspect) sweep:
+                       take the brightest pixel, refine it to sub-pixel and
+                       polish it by a matched-filter pattern search,
+                       fit its amplitude per frequency in the data domain and
+                       subtract it there, re-image, repeat; finally refit all amplitudes
+                       per frequency to get a_n and α_n. → ScatteringCenters
+                       (positions in the plane of rotation).
+    matrix_pencil()  — matrix-pencil fit of each aspect's sweep as a sum of
+                       damped exponentials in frequency, batched over aspects
+                       (stacked SVD / eig). The poles give down-range and α,
+                       a Vandermonde least-squares fit gives a. → RangeCenters
+                       (one 1-D model per aspect).
+
+Both models reconstruct a sweep with a handful of exponentials per sample,
+orders of magnitude faster than a new NF2FF pass.
+
+Usage:
+    from scattering_centers import clean_isar, matrix_pencil
+    sc = clean_isar(freq, isar_phi, S_theta[:, 0, :], bistatic_center=180)
+    for (x, y), a, alpha in zip(sc.position, sc.amplitude, sc.alpha): ...
+    S_model = sc.reconstruct(freq, phi)                        # (F, A)
+    rc = matrix_pencil(freq, S_aspects)                        # (A, F) → (A, M)
+
+Self-check on synthetic scatterers with frequency dependence:
+    python scattering_centers.py
+"""
+
+import time
+
+import numpy as np
+
+from isar import isar_image, point_scatterer_response
+
+C0 = 299_792_458.0
+UNIFORM_RTOL = 1e-6                     # tolerance on the frequency-step spread
+
+
+def _freq_dependence(freq, amp, freq_center):
+    """
+    (a, α) of per-frequency amplitudes amp (F, N) under a (f / f_c)^α:
+    α from a |amp|-weighted log-log fit, a from the projection at that α.
+    """
+    logf = np.log(freq / freq_center)[:, None]
+    w = np.abs(amp) ** 2
+    wsum = w.sum(axis=0)
+    lf = (w * logf).sum(axis=0) / wsum
+    la = (w * np.log(np.abs(amp) + 1e-300)).sum(axis=0) / wsum
+    alpha = ((w * (logf - lf) * (np.log(np.abs(amp) + 1e-300) - la)).sum(axis=0)
+             / (w * (logf - lf) ** 2).sum(axis=0))
+    shape = np.exp(alpha * logf)                                        # (F, N)
+    a = (amp * shape).sum(axis=0) / (shape ** 2).sum(axis=0)
+    return a, alpha
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CLEAN on ISAR images
+# ═══════════════════════════════════════════════════════════════════════════
+
+class ScatteringCenters:
+    """
+    Point scatterers in the plane of rotation.
+
+    position    : (N, 2) m, target-frame (x, y)
+    amplitude   : (N,) complex at freq_center, |a|² = RCS contribution
+    alpha       : (N,) frequency exponent, S ∝ (f / f_c)^α
+    freq_center : f_c [Hz]
+    """
+
+    def __init__(self, position, amplitude, alpha, freq_center):
+        self.position    = position
+        self.amplitude   = amplitude
+        self.alpha       = alpha
+        self.freq_center = freq_center
+
+    def reconstruct(self, freq, aspect_deg, bistatic_center=None):
+        """Model sweep (F, A), in the conventions of isar.isar_image()."""
+        freq = np.asarray(freq, dtype=float)
+        aspect = np.atleast_1d(aspect_deg)
+        out = np.zeros((len(freq), len(aspect)), dtype=complex)
+        for (x, y), a, alpha in zip(self.position, self.amplitude, self.alpha):
+            out += (a * (freq / self.freq_center) ** alpha)[:, None] * \
+                point_scatterer_response(freq, aspect, [(x, y, 1.0)], bistatic_center)
+        return out
+
+    def save(self, path):
+        np.savez(path, position=self.position, amplitude=self.amplitude, alpha=self.alpha,
+                 freq_center=self.freq_center)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as d:
+            return cls(d['position'], d['amplitude'], d['alpha'], float(d['freq_center']))
+
+
+def _refine(mag, i, axis):
+    """Sub-pixel offset of the peak at index i along `axis` (parabolic)."""
+    n = mag.shape[axis]
+    if i == 0 or i == n - 1:
+        return 0.0
+    y0, y1, y2 = np.take(mag, [i - 1, i, i + 1], axis=axis)
+    den = y0 - 2 * y1 + y2
+    return 0.0 if den == 0 else float(np.clip(0.5 * (y0 - y2) / den, -0.5, 0.5))
+
+
+def _polish(freq, aspect, residual, x, y, step, bistatic_center, n_halve=6):
+    """
+    Pattern search from (x, y) for the position whose coherent matched
+    filter over (freq × aspect) peaks in the residual; the steering vector
+    there.
+    """
+    def energy(x, y):
+        u = point_scatterer_response(freq, aspect, [(x, y, 1.0)], bistatic_center)
+        return np.abs(np.vdot(u, residual)), u
+
+    best, u = energy(x, y)
+    for _ in range(n_halve):
+        moved = True
+        while moved:
+            moved = False
+            for dx, dy in ((step, 0), (-step, 0), (0, step), (0, -step)):
+                e, v = energy(x + dx, y + dy)
+                if e > best:
+                    best, u, x, y, moved = e, v, x + dx, y + dy, True
+        step *= 0.5
+    return x, y, u
+
+
+def clean_isar(freq, aspect_deg, data, n_max=20, threshold_db=30.0, bistatic_center=None,
+               n_fft=256, window='taylor', gain=1.0):
+    """
+    CLEAN the ISAR image of `data` (F, A) at `freq` [Hz] × `aspect_deg`
+    (isar.isar_image() conventions) into at most `n_max` point scatterers,
+    stopping when the residual peak falls `threshold_db` below the first.
+    `gain` < 1 subtracts only part of each fitted scatterer per iteration.
+    """
+    freq = np.asarray(freq, dtype=float)
+    aspect = np.asarray(aspect_deg, dtype=float)
+    residual = np.array(data, dtype=complex)
+    positions, first = [], None
+
+    for _ in range(n_max):
+        img = isar_image(freq, aspect, residual, n_fft=n_fft, window=window,
+                         bistatic_center=bistatic_center)
+        mag = np.abs(img.image)
+        i, j = np.unravel_index(mag.argmax(), mag.shape)
+        first = mag[i, j] if first is None else first
+        if mag[i, j] < first * 10 ** (-threshold_db / 20):
+            break
+        down = np.interp(i + _refine(mag[:, j], i, 0), np.arange(mag.shape[0]), img.down_range)
+        cross = np.interp(j + _refine(mag[i, :], j, 0), np.arange(mag.shape[1]),
+                          img.cross_range)
+        pixel = min(img.down_range[1] - img.down_range[0],
+                    img.cross_range[1] - img.cross_range[0])
+        x, y, u = _polish(freq, aspect, residual, *img.to_xy(down, cross), 0.5 * pixel,
+                          bistatic_center)
+        # Per-frequency amplitude, so a frequency-dependent centre leaves no residue
+        a_f = np.einsum('fa,fa->f', u.conj(), residual) / np.einsum('fa,fa->f', u.conj(), u).real
+        residual -= gain * a_f[:, None] * u
+        positions.append((x, y))
+
+    position = np.array(positions, dtype=float).reshape(-1, 2)
+    if not len(position):
+        return ScatteringCenters(position, np.zeros(0, complex), np.zeros(0),
+                                 0.5 * (freq[0] + freq[-1]))
+    # Joint least-squares amplitudes per frequency (F, N), then a and α
+    U = np.stack([point_scatterer_response(freq, aspect, [(x, y, 1.0)], bistatic_center)
+                  for x, y in position], axis=-1)                       # (F, A, N)
+    amp = (np.linalg.pinv(U, rcond=1e-6) @ np.asarray(data, dtype=complex)[..., None])[..., 0]
+    fc = 0.5 * (freq[0] + freq[-1])
+    a, alpha = _freq_dependence(freq, amp, fc)
+    order = np.argsort(-np.abs(a))
+    return ScatteringCenters(position[order], a[order], alpha[order], fc)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Matrix pencil on range profiles
+# ═══════════════════════════════════════════════════════════════════════════
+
+class RangeCenters:
+    """
+    Per-aspect 1-D scattering centres (down-range positive towards the
+    radar, hrrp.py convention); unused slots have range NaN, amplitude 0.
+
+    range       : (A, M) m
+    amplitude   : (A, M) complex at freq_center
+    alpha       : (A, M) frequency exponent
+    freq_center : f_c [Hz]
+    """
+
+    def __init__(self, range_m, amplitude, alpha, freq_center):
+        self.range       = range_m
+        self.amplitude   = amplitude
+        self.alpha       = alpha
+        self.freq_center = freq_center
+
+    def reconstruct(self, freq):
+        """Model sweeps (A, F)."""
+        freq = np.asarray(freq, dtype=float)
+        k = 2 * np.pi * freq / C0
+        used = np.isfinite(self.range)
+        x = np.where(used, self.range, 0.0)[..., None]
+        terms = (self.amplitude[..., None] * (freq / self.freq_center) ** self.alpha[..., None]
+                 * np.exp(2j * k * x))
+        return np.where(used[..., None], terms, 0).sum(axis=-2)
+
+    def save(self, path):
+        np.savez(path, range=self.range, amplitude=self.amplitude, alpha=self.alpha,
+                 freq_center=self.freq_center)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as d:
+            return cls(d['range'], d['amplitude'], d['alpha'], float(d['freq_center']))
+
+
+def matrix_pencil(freq, data, n_max=10, tol_db=40.0, pencil=None):
+    """
+    Matrix-pencil scattering centres of `data` (..., F) on the uniform
+    frequency grid `freq` [Hz], all leading dimensions in one batch.
+
+    The model order per sweep is the number of singular values of the
+    Hankel matrix within `tol_db` of the largest (at most `n_max`);
+    `pencil` is the pencil parameter L (default F // 3).
+    """
+    freq = np.asarray(freq, dtype=float)
+    data = np.asarray(data, dtype=complex)
+    lead = data.shape[:-1]
+    data = data.reshape(-1, data.shape[-1])
+    F = len(freq)
+    df = np.diff(freq)
+    if F < 3 or np.ptp(df) > UNIFORM_RTOL * abs(df.mean()):
+        raise ValueError('matrix pencil needs a uniform frequency grid of at least 3 points')
+    df = df.mean()
+    fc = 0.5 * (freq[0] + freq[-1])
+    L = pencil or F // 3
+    n_max = min(n_max, L, F - L)
+
+    # Hankel matrices (A, F − L, L + 1); the leading rows of Vh span their
+    # row space, i.e. the shifted Vandermonde vectors of the poles
+    Y = data[:, np.arange(F - L)[:, None] + np.arange(L + 1)]
+    _, s, Vh = np.linalg.svd(Y, full_matrices=False)
+    order = np.minimum((s > s[:, :1] * 10 ** (-tol_db / 20)).sum(axis=1), n_max)
+
+    A = len(data)
+    rng = np.full((A, n_max), np.nan)
+    amplitude = np.zeros((A, n_max), dtype=complex)
+    alpha = np.zeros((A, n_max))
+    m = np.arange(F)
+    for M in np.unique(order):
+        sel = np.flatnonzero(order == M)
+        if M == 0:
+            continue
+        V = Vh[sel, :M, :].swapaxes(-1, -2)                             # (n, L + 1, M)
+        z = np.linalg.eigvals(np.linalg.pinv(V[:, :-1]) @ V[:, 1:])     # (n, M) poles
+        # Residues c: data[m] = Σ c z^m  (Vandermonde least squares)
+        Z = z[:, None, :] ** m[None, :, None]                           # (n, F, M)
+        G = Z.conj().swapaxes(-1, -2) @ Z
+        c = np.linalg.solve(G, (Z.conj().swapaxes(-1, -2) @ data[sel, :, None]))[..., 0]
+        # z = |z| e^{j2Δk x}; |z|^m ≈ (f / f_c)^α with α = f_c ln|z| / Δf
+        x = np.angle(z) * C0 / (4 * np.pi * df)
+        al = fc * np.log(np.abs(z)) / df
+        a = c * np.exp(-2j * (2 * np.pi * freq[0] / C0) * x) * np.abs(z) ** ((fc - freq[0]) / df)
+        idx = np.argsort(-np.abs(a), axis=1)
+        take = lambda v: np.take_along_axis(v, idx, axis=1)
+        rng[sel, :M], amplitude[sel, :M], alpha[sel, :M] = take(x), take(a), take(al)
+
+    shape = lead + (n_max,)
+    return RangeCenters(rng.reshape(shape), amplitude.reshape(shape), alpha.reshape(shape), fc)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Self-check: point scatterers with frequency dependence
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _self_check():
+    # (x, y, a, α): plate, curved surface, edge
+    points = [(0.0, 0.0, 1.0, 1.0), (0.6, 0.2, 0.5, 0.0), (-0.4, -0.5, 0.3, -0.5)]
+    freq = np.linspace(2e9, 4e9, 128)
+    fc = 0.5 * (freq[0] + freq[-1])
+    truth = ScatteringCenters(np.array([p[:2] for p in points]), np.array([p[2] for p in points]),
+                              np.array([p[3] for p in points]), fc)
+
+    for label, kw, span in (('monostatic', {}, (170, 190)),
+                            ('bistatic  ', {'bistatic_center': 180.0}, (160, 200))):
+        aspect = np.linspace(*span, 128)
+        data = truth.reconstruct(freq, aspect, **kw)
+        t0 = time.perf_counter()
+        sc = clean_isar(freq, aspect, data, n_max=10, **kw)
+        dt = time.perf_counter() - t0
+        err = np.abs(sc.reconstruct(freq, aspect, **kw) - data).max() / np.abs(data).max()
+        print(f'CLEAN {label}: {len(sc.amplitude)} centres in {dt:.2f} s, '
+              f'reconstruction error {err:.1e}')
+        for (x, y), a, al in zip(sc.position[:3], sc.amplitude[:3], sc.alpha[:3]):
+            print(f'  ({x:+.3f}, {y:+.3f})  |a| = {abs(a):.3f}  α = {al:+.2f}')
+
+    # Matrix pencil over 2001 aspects, checked against the true down-ranges
+    aspect = np.linspace(170, 190, 2001)
+    data = truth.reconstruct(freq, aspect).T                           # (A, F)
+    t0 = time.perf_counter()
+    rc = matrix_pencil(freq, data)
+    dt = time.perf_counter() - t0
+    err = np.abs(rc.reconstruct(freq) - data).max() / np.abs(data).max()
+    print(f'matrix pencil: {len(aspect)} aspects × {len(freq)} frequencies in {dt * 1e3:.0f} ms, '
+          f'reconstruction error {err:.1e}')
+    mid = len(aspect) // 2                                             # φ = 180°: down = −x
+    for x, _, a, al in points:
+        n = np.nanargmin(np.abs(rc.range[mid] + x))
+        print(f'  x = {x:+.2f}, a = {a:.2f}, α = {al:+.1f}  →  down-range {rc.range[mid, n]:+.3f} m, '
+              f'|a| = {abs(rc.amplitude[mid, n]):.3f}, α = {rc.alpha[mid, n]:+.2f}')
+
+    # Reconstruction speed of the compact model
+    aspect = np.linspace(0, 360, 3601)
+    t0 = time.perf_counter()
+    truth.reconstruct(freq, aspect)
+    dt = time.perf_counter() - t0
+    print(f'model reconstruction: {len(freq)} × {len(aspect)} samples in {dt * 1e3:.0f} ms')
+
+
+if __name__ == '__main__':
+    _self_check()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+sim_cache.py
+────────────
+Content-addressed simulation directories: identical setups share one solver
+run, different setups never overwrite each other.
+
+The key is a SHA-256 over
+    • the XML that CSX.Write2XML produces (geometry, materials, mesh,
+      excitation vector / direction, dumps, NF2FF boxes), with every
+      FileName="..." attribute (e.g. STL polyhedron readers) replaced by the
+      hash of the referenced file's content, so copying the STL to another
+      directory does not change the key but editing it does;
+    • the FDTD settings that live outside the CSX (excitation signal,
+      boundary conditions, end criteria, time-step limits), passed as a
+      JSON-serialisable dict.
+keyed_sim_path(root, ...) returns root/<key[:16]> and records it in
+root/LATEST for post-processing scripts. run_once() runs the solver only
+when that directory has no COMPLETE marker for the same key, then writes
+the marker — so re-running a script after changing only its
+post-processing skips straight to it.
+
+Usage:
+    from sim_cache import keyed_sim_path, run_once
+    settings = {'EndCriteria': 1e-3, 'GaussExcite': [f0, fc], 'BoundaryCond': ['PML_8'] * 6}
+    Sim_Path, key = keyed_sim_path(Sim_Root, CSX, settings)
+    run_once(FDTD, Sim_Path, key, settings, cleanup=False)
+    ...
+    sim_path = latest_sim_path(Sim_Root)                   # in post-processing
+
+Self-check (no openEMS needed):
+    python sim_cache.py
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+
+KEY_LENGTH = 16                         # hex digits of the key in directory names
+MARKER = 'COMPLETE'
+LATEST = 'LATEST'
+
+_FILENAME = re.compile(rb'FileName="([^"]*)"')
+
+
+def _file_digest(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def xml_key(xml, settings=None):
+    """SHA-256 hex key of CSX XML bytes and an FDTD settings dict."""
+    def content(m):
+        path = m.group(1).decode()
+        digest = _file_digest(path) if os.path.exists(path) else 'missing:' + os.path.basename(path)
+        return b'FileName="sha256:' + digest.encode() + b'"'
+
+    h = hashlib.sha256(_FILENAME.sub(content, xml))
+    h.update(json.dumps(settings or {}, sort_keys=True, default=float).encode())
+    return h.hexdigest()
+
+
+def csx_xml(CSX):
+    """XML bytes of a CSXCAD ContinuousStructure (via Write2XML)."""
+    fd, path = tempfile.mkstemp(suffix='.xml')
+    os.close(fd)
+    try:
+        CSX.Write2XML(path)
+        with open(path, 'rb') as f:
+            return f.read()
+    finally:
+        os.remove(path)
+
+
+def setup_key(CSX, settings=None):
+    """Key of a CSXCAD ContinuousStructure and FDTD settings."""
+    return xml_key(csx_xml(CSX), settings)
+
+
+def keyed_sim_path(root, CSX, settings=None):
+    """(root/<key[:16]>, key), creating the directory and updating root/LATEST."""
+    key = setup_key(CSX, settings)
+    path = os.path.join(root, key[:KEY_LENGTH])
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(root, LATEST), 'w') as f:
+        f.write(key[:KEY_LENGTH] + '\n')
+    return path, key
+
+
+def latest_sim_path(root):
+    """Directory of the most recent keyed run under `root` (root itself if none)."""
+    try:
+        with open(os.path.join(root, LATEST)) as f:
+            return os.path.join(root, f.read().strip())
+    except FileNotFoundError:
+        return root
+
+
+def is_complete(sim_path, key):
+    """True if `sim_path` holds a finished solver run for `key`."""
+    try:
+        with open(os.path.join(sim_path, MARKER)) as f:
+            return json.load(f).get('key') == key
+    except (FileNotFoundError, ValueError):
+        return False
+
+
+def mark_complete(sim_path, key, settings=None):
+    with open(os.path.join(sim_path, MARKER), 'w') as f:
+        json.dump({'key': key, 'settings': settings or {}, 'finished': time.time()}, f,
+                  default=float, indent=1)
+
+
+def run_once(FDTD, sim_path, key, settings=None, **run_kwargs):
+    """
+    FDTD.Run(sim_path, **run_kwargs) unless the run for `key` is already
+    complete there. Returns True if the solver ran.
+    """
+    if is_complete(sim_path, key):
+        print(f'Solver skipped: complete result for {key[:KEY_LENGTH]} in {sim_path}')
+        return False
+    FDTD.Run(sim_path, **run_kwargs)
+    mark_complete(sim_path, key, settings)
+    return True
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Self-check: key stability and skip logic with a stand-in solver
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _self_check():
+    root = tempfile.mkdtemp()
+    stl_a, stl_b = os.path.join(root, 'a', 'm.stl'), os.path.join(root, 'b', 'm.stl')
+    for p in (stl_a, stl_b):
+        os.makedirs(os.path.dirname(p))
+        with open(p, 'w') as f:
+            f.write('solid m\nendsolid m\n')
+    xml = '<CSX><PolyhedronReader FileName="{}"/><Excitation E="0,0,1"/></CSX>'
+    base = {'EndCriteria': 1e-3, 'GaussExcite': [525e6, 475e6]}
+    key = xml_key(xml.format(stl_a).encode(), base)
+    checks = {
+        'same STL copied elsewhere': xml_key(xml.format(stl_b).encode(), base) == key,
+        'settings order ignored': xml_key(xml.format(stl_a).encode(),
+                                          dict(reversed(list(base.items())))) == key,
+        'end criteria changes key': xml_key(xml.format(stl_a).encode(),
+                                            {**base, 'EndCriteria': 1e-4}) != key,
+        'excitation changes key': xml_key(xml.format(stl_a).replace('0,0,1', '0,1,0').encode(),
+                                          base) != key,
+    }
+    with open(stl_b, 'a') as f:
+        f.write('\n')
+    checks['STL edit changes key'] = xml_key(xml.format(stl_b).encode(), base) != key
+
+    class _Solver:
+        runs = 0
+
+        def Run(self, sim_path, **kw):
+            self.runs += 1
+
+    class _CSX:
+        def Write2XML(self, path):
+            with open(path, 'w') as f:
+                f.write(xml.format(stl_a))
+
+    solver = _Solver()
+    sim_path, k = keyed_sim_path(os.path.join(root, 'runs'), _CSX(), base)
+    run_once(solver, sim_path, k, base)
+    run_once(solver, sim_path, k, base)
+    checks['second run skipped'] = solver.runs == 1
+    checks['LATEST resolves'] = latest_sim_path(os.path.join(root, 'runs')) == sim_path
+    for name, ok in checks.items():
+        print(f'  {"ok  " if ok else "FAIL"} {name}')
+
+
+if __name__ == '__main__':
+    _self_check()
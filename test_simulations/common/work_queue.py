@@ -0,0 +1,539 @@
+#!/usr/bin/env python3
+"""
+work_queue.py
+─────────────
+Multi-node work queue for simulation jobs: a submitter enqueues parameter
+dicts, workers on any number of nodes pull them, run them with thread
+counts chosen from their own hardware, and push back only the reduced
+results (far-field arrays, probe spectra — a dict of NumPy arrays), never
+the raw field dumps.
+
+Brokers (all with put / get / heartbeat / ack / nack / results / summary):
+    SQLiteBroker — jobs and leases in the job_ledger.py schema, results
+                   as npz blobs in the same database; rollback journal,
+                   so several nodes can share it on a filesystem whose
+                   POSIX locks work (many NFS / SMB mounts do not — use
+                   FileBroker there; wal=True only for one host).
+                   URL sqlite:///path/queue.sqlite?queue=name
+    FileBroker   — one JSON file per job in pending/ running/ done/ failed/
+                   under a shared directory; a claim is an atomic rename
+                   into running/<job>@<worker>, results are npz files
+                   in results/, written only after the worker has moved
+                   its job out of running/ (so a worker whose lease
+                   expired cannot overwrite the new owner's result).
+                   URL file:///path/queue_dir
+    LocalBroker  — in-process queue for tests and single-node debugging.
+                   URL local://name
+A claimed job is a lease renewed by serve()'s heartbeat thread; jobs of a
+worker that stopped heartbeating go back to the queue, and failed or
+expired jobs are retried until they have had max_attempts claims, then
+stay failed.
+
+Usage:
+    from work_queue import connect, run_node
+    connect(url).put([{'azimuth': a} for a in range(0, 360, 5)])   # submit
+    run_node(url, simulate)                      # on every node: simulate(params, threads)
+    for params, arrays in connect(url).results(): ...               # collect
+
+Self-check (every broker, threads standing in for nodes, one dying):
+    python work_queue.py
+"""
+
+import hashlib
+import io
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from job_ledger import LEASE, MAX_ATTEMPTS, JobLedger, default_worker_name, params_key
+
+MAX_THREADS_PER_JOB = 8                 # openEMS stops scaling beyond a few threads (memory bound)
+
+
+def _pack(arrays):
+    buf = io.BytesIO()
+    np.savez(buf, **arrays)
+    return buf.getvalue()
+
+
+def _unpack(blob):
+    with np.load(io.BytesIO(blob)) as d:
+        return {k: d[k] for k in d.files}
+
+
+def available_cores():
+    """Cores this process may run on (its cgroup / SLURM / taskset allocation)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        return os.cpu_count() or 1
+
+
+def plan_workers(n_jobs=None, cores=None, threads=None):
+    """
+    (jobs_in_parallel, threads_per_job) for n_jobs simulations (None: an
+    open-ended queue) on `cores` cores (default: available_cores()). With
+    `threads`, as many jobs of that size as fit. Otherwise jobs are planned
+    at MAX_THREADS_PER_JOB threads, and the cores are then split evenly
+    between them, so a short sweep (or a core count that does not divide)
+    gives each job more threads than that — a single job gets every core.
+    """
+    cores = cores or available_cores()
+    n_jobs = n_jobs or cores
+    if threads:
+        return max(1, min(n_jobs, cores // threads)), threads
+    jobs = max(1, min(n_jobs, cores // min(MAX_THREADS_PER_JOB, cores)))
+    return jobs, cores // jobs
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Brokers
+# ═══════════════════════════════════════════════════════════════════════════
+
+class SQLiteBroker:
+    """
+    Queue `name` in the SQLite file `path` (job_ledger.py schema + results);
+    see JobLedger for the journal modes and network filesystems.
+    """
+
+    def __init__(self, path, name='default', lease=LEASE, max_attempts=MAX_ATTEMPTS, wal=False):
+        self.ledger = JobLedger(path, wal=wal)
+        self.name = name
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.ledger.db.execute('CREATE TABLE IF NOT EXISTS results (job_id INTEGER PRIMARY KEY, '
+                               'data BLOB NOT NULL)')
+
+    def fork(self):
+        """Broker on its own connection, for another thread."""
+        return SQLiteBroker(self.ledger.path, self.name, self.lease, self.max_attempts,
+                            self.ledger.wal)
+
+    def put(self, params_list):
+        return self.ledger.add_jobs(self.name, params_list)
+
+    def get(self, worker):
+        job = self.ledger.claim(self.name, worker, self.lease, self.max_attempts)
+        return None if job is None else (job.id, job.params)
+
+    def heartbeat(self, job_id, worker):
+        return self.ledger.heartbeat(job_id, worker)
+
+    def ack(self, job_id, worker, arrays):
+        blob = _pack(arrays)
+        with self.ledger.db:
+            self.ledger.db.execute('BEGIN IMMEDIATE')
+            ok = self.ledger.db.execute(
+                "UPDATE jobs SET state = 'done', finished = ?, output_hash = ?, error = NULL "
+                "WHERE id = ? AND worker = ? AND state = 'running'",
+                (time.time(), hashlib.sha256(blob).hexdigest(), job_id, worker)).rowcount == 1
+            if ok:
+                self.ledger.db.execute('INSERT OR REPLACE INTO results VALUES (?, ?)',
+                                       (job_id, sqlite3.Binary(blob)))
+        return ok
+
+    def nack(self, job_id, worker, error):
+        return self.ledger.fail(job_id, worker, error)
+
+    def results(self):
+        cur = self.ledger.db.execute('SELECT j.params, r.data FROM jobs j JOIN results r '
+                                     'ON r.job_id = j.id WHERE j.campaign = ? ORDER BY j.id',
+                                     (self.name,))
+        for params, blob in cur:
+            yield json.loads(params), _unpack(blob)
+
+    def summary(self):
+        return self.ledger.summary(self.name)
+
+    def close(self):
+        self.ledger.close()
+
+
+class FileBroker:
+    """Queue of JSON job files under `root` on a shared filesystem."""
+
+    STATES = ('pending', 'running', 'committing', 'done', 'failed', 'results')
+
+    def __init__(self, root, lease=LEASE, max_attempts=MAX_ATTEMPTS):
+        self.root = root
+        self.lease = lease
+        self.max_attempts = max_attempts
+        for d in self.STATES:
+            os.makedirs(os.path.join(root, d), exist_ok=True)
+
+    def fork(self):
+        return self
+
+    def _path(self, state, name):
+        return os.path.join(self.root, state, name)
+
+    def _list(self, state):
+        return [n for n in os.listdir(os.path.join(self.root, state)) if not n.endswith('.tmp')]
+
+    def _write(self, path, data):
+        tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _write_job(self, path, params, attempts):
+        self._write(path, json.dumps({'params': params, 'attempts': attempts}, sort_keys=True,
+                                     default=float).encode())
+
+    def _read_job(self, path):
+        with open(path) as f:
+            job = json.load(f)
+        return job['params'], job['attempts']
+
+    def _known(self, name):
+        """True if job file `name` is in any state (claimed ones carry an @worker suffix)."""
+        if any(os.path.exists(self._path(s, name)) for s in ('pending', 'done', 'failed')):
+            return True
+        return any(n.startswith(name + '@') for s in ('running', 'committing')
+                   for n in self._list(s))
+
+    def put(self, params_list):
+        n = 0
+        for params in params_list:
+            name = params_key(params) + '.json'
+            if self._known(name):
+                continue
+            self._write_job(self._path('pending', name), params, 0)
+            n += 1
+        return n
+
+    def _retire(self, src, name, attempts, error):
+        """Move a claimed job back to pending, or to failed once out of attempts."""
+        if attempts < self.max_attempts:
+            os.rename(src, self._path('pending', name))
+        else:
+            self._write(self._path('failed', name[:-5] + '.err'),
+                        f'{error} (attempt {attempts} of {self.max_attempts})'.encode())
+            os.rename(src, self._path('failed', name))
+
+    def _requeue_expired(self):
+        now = time.time()
+        for state in ('running', 'committing'):
+            for job_id in self._list(state):
+                path = self._path(state, job_id)
+                try:
+                    if now - os.stat(path).st_mtime > self.lease:
+                        _, attempts = self._read_job(path)
+                        self._retire(path, job_id.split('@')[0], attempts, 'lease expired')
+                except FileNotFoundError:
+                    pass                            # finished or requeued meanwhile
+
+    def get(self, worker):
+        self._requeue_expired()
+        for name in sorted(self._list('pending')):
+            # Claim: the rename succeeds for exactly one worker
+            job_id = f'{name}@{worker.replace(os.sep, "_")}'
+            try:
+                os.rename(self._path('pending', name), self._path('running', job_id))
+            except FileNotFoundError:
+                continue
+            params, attempts = self._read_job(self._path('running', job_id))
+            self._write_job(self._path('running', job_id), params, attempts + 1)
+            return job_id, params
+        return None
+
+    def heartbeat(self, job_id, worker):
+        try:
+            os.utime(self._path('running', job_id))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _take(self, job_id):
+        """Move a job this worker still owns out of running/; its path, or None if lost."""
+        staged = self._path('committing', job_id)
+        try:
+            os.rename(self._path('running', job_id), staged)
+        except FileNotFoundError:
+            return None                             # lease expired, job requeued
+        os.utime(staged)
+        return staged
+
+    def ack(self, job_id, worker, arrays):
+        staged = self._take(job_id)
+        if staged is None:
+            return False
+        name = job_id.split('@')[0]
+        self._write(self._path('results', name[:-5] + '.npz'), _pack(arrays))
+        os.rename(staged, self._path('done', name))
+        return True
+
+    def nack(self, job_id, worker, error):
+        staged = self._take(job_id)
+        if staged is None:
+            return False
+        _, attempts = self._read_job(staged)
+        self._retire(staged, job_id.split('@')[0], attempts, error)
+        return True
+
+    def requeue_failed(self):
+        """Return failed jobs to pending with fresh attempts."""
+        n = 0
+        for name in self._list('failed'):
+            if name.endswith('.json'):
+                params, _ = self._read_job(self._path('failed', name))
+                self._write_job(self._path('pending', name), params, 0)
+                os.remove(self._path('failed', name))
+                n += 1
+        return n
+
+    def results(self):
+        for name in sorted(self._list('done')):
+            params, _ = self._read_job(self._path('done', name))
+            with open(self._path('results', name[:-5] + '.npz'), 'rb') as f:
+                yield params, _unpack(f.read())
+
+    def summary(self):
+        counts = {s: sum('.json' in n for n in self._list(s)) for s in self.STATES[:5]}
+        counts['running'] += counts.pop('committing')
+        return {s: n for s, n in counts.items() if n}
+
+    def close(self):
+        pass
+
+
+class LocalBroker:
+    """In-process queue (threads only); brokers of the same name share state."""
+
+    _queues = {}
+    _lock = threading.Lock()
+
+    def __init__(self, name='default', lease=LEASE, max_attempts=MAX_ATTEMPTS):
+        self.lease = lease              # for serve()'s heartbeat; in-process jobs never expire
+        self.max_attempts = max_attempts
+        with self._lock:
+            self.state = self._queues.setdefault(name, {
+                'pending': queue.Queue(), 'running': {}, 'done': {}, 'failed': {},
+                'attempts': {}, 'keys': set(), 'lock': threading.Lock()})
+
+    def fork(self):
+        return self
+
+    def put(self, params_list):
+        n = 0
+        with self.state['lock']:
+            for params in params_list:
+                key = params_key(params)
+                if key not in self.state['keys']:
+                    self.state['keys'].add(key)
+                    self.state['pending'].put((key, params))
+                    n += 1
+        return n
+
+    def get(self, worker):
+        try:
+            key, params = self.state['pending'].get_nowait()
+        except queue.Empty:
+            return None
+        with self.state['lock']:
+            self.state['running'][key] = (worker, params)
+            self.state['attempts'][key] = self.state['attempts'].get(key, 0) + 1
+        return key, params
+
+    def heartbeat(self, job_id, worker):
+        return job_id in self.state['running']
+
+    def ack(self, job_id, worker, arrays):
+        with self.state['lock']:
+            _, params = self.state['running'].pop(job_id)
+            self.state['done'][job_id] = (params, _unpack(_pack(arrays)))
+        return True
+
+    def nack(self, job_id, worker, error):
+        with self.state['lock']:
+            _, params = self.state['running'].pop(job_id)
+            if self.state['attempts'][job_id] < self.max_attempts:
+                self.state['pending'].put((job_id, params))
+            else:
+                self.state['failed'][job_id] = (params, str(error))
+        return True
+
+    def results(self):
+        with self.state['lock']:
+            items = list(self.state['done'].values())
+        yield from items
+
+    def summary(self):
+        counts = {'pending': self.state['pending'].qsize(), 'running': len(self.state['running']),
+                  'done': len(self.state['done']), 'failed': len(self.state['failed'])}
+        return {s: n for s, n in counts.items() if n}
+
+    def close(self):
+        pass
+
+
+def connect(url, **kwargs):
+    """
+    Broker for sqlite:///path?queue=name, file:///path or local://name;
+    all three take lease= and max_attempts= (sqlite also wal=).
+    """
+    u = urlparse(url)
+    if u.scheme == 'sqlite':
+        return SQLiteBroker(u.path, parse_qs(u.query).get('queue', ['default'])[0], **kwargs)
+    if u.scheme == 'file':
+        return FileBroker(u.path, **kwargs)
+    if u.scheme == 'local':
+        return LocalBroker(u.netloc or 'default', **kwargs)
+    raise ValueError(f'unknown broker URL {url!r}')
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Workers
+# ═══════════════════════════════════════════════════════════════════════════
+
+def serve(broker, func, threads=1, worker=None, max_jobs=None):
+    """
+    Pull and run jobs until the queue is empty: func(params, threads) → dict
+    of arrays, pushed back with ack(). Returns the number of jobs run.
+    """
+    if isinstance(broker, str):
+        broker = connect(broker)
+    worker = worker or default_worker_name()
+    n = 0
+    while max_jobs is None or n < max_jobs:
+        job = broker.get(worker)
+        if job is None:
+            break
+        job_id, params = job
+        stop = threading.Event()
+
+        def beat(job_id=job_id):
+            beater = broker.fork()
+            try:
+                while not stop.wait(broker.lease / 4):
+                    if not beater.heartbeat(job_id, worker):
+                        break
+            finally:
+                if beater is not broker:
+                    beater.close()
+
+        thread = threading.Thread(target=beat, daemon=True)
+        thread.start()
+        try:
+            broker.ack(job_id, worker, func(params, threads))
+        except Exception as exc:
+            broker.nack(job_id, worker, f'{type(exc).__name__}: {exc}')
+        finally:
+            stop.set()
+            thread.join()
+        n += 1
+    return n
+
+
+def run_node(url, func, cores=None, threads=None):
+    """
+    Serve the queue at `url` from this node: plan_workers() jobs in parallel,
+    each with its share of this node's cores (separate processes; threads
+    for local:// brokers, which cannot cross processes).
+    """
+    jobs, threads = plan_workers(None, cores, threads)
+    print(f'{default_worker_name()}: {jobs} jobs × {threads} threads on {url}')
+    if urlparse(url).scheme == 'local':
+        pool = [threading.Thread(target=serve, args=(connect(url), func, threads))
+                for _ in range(jobs)]
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        return
+    with ProcessPoolExecutor(jobs) as pool:
+        for fut in [pool.submit(serve, url, func, threads) for _ in range(jobs)]:
+            fut.result()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Self-check: every broker, concurrent workers, failure, a dead worker
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _simulate(params, threads):
+    """Stand-in job: a 'far field' over frequency for one aspect."""
+    time.sleep(0.002)
+    if params['azimuth'] == 90:
+        raise RuntimeError('solver diverged')
+    freq = np.linspace(1e9, 2e9, 50)
+    return {'freq': freq, 'S': np.exp(1j * np.deg2rad(params['azimuth']) * freq / 1e9),
+            'threads': np.array(threads)}
+
+
+def _self_check():
+    import tempfile
+
+    tmp = tempfile.mkdtemp()
+    jobs = [{'azimuth': a} for a in range(0, 360, 5)]
+    for url in (f'sqlite://{tmp}/queue.sqlite?queue=sweep', f'file://{tmp}/queue', 'local://sweep'):
+        lease = 0.3
+        kw = {'lease': lease, 'max_attempts': 3}
+        broker = connect(url, **kw)
+        added = broker.put(jobs) + broker.put(jobs)
+        dead = broker.get('dead-node')                      # claimed, never finished
+        t0 = time.perf_counter()
+        workers = [threading.Thread(target=lambda i=i: serve(connect(url, **kw), _simulate, 2,
+                                                             worker=f'node{i}'))
+                   for i in range(6)]
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        dt = time.perf_counter() - t0
+        first = broker.summary()
+        if not url.startswith('local'):
+            time.sleep(lease + 0.1)                         # dead node's lease expires
+            serve(connect(url, **kw), _simulate, 2, worker='resume')
+        res = list(broker.results())
+        ok = all(np.allclose(r['S'], _simulate(p, 1)['S']) for p, r in res)
+        print(f'{url.split(":")[0]:6s}: {added} jobs, 6 workers in {dt:.2f} s → {first}; '
+              f'after resume {broker.summary()}; {len(res)} results, correct: {ok}'
+              + (f'; dead job {dead[1]} recovered' if not url.startswith('local') else ''))
+        broker.close()
+
+    checks = {}
+    for url in (f'sqlite://{tmp}/regress.sqlite?queue=q', f'file://{tmp}/regress', 'local://regress'):
+        scheme = url.split(':')[0]
+        a = connect(url, lease=0.1, max_attempts=2)
+        a.put([{'job': 'running'}])
+        a.get('A')
+        a.put([{'job': 'running'}])
+        checks[f'{scheme}: put while running queues nothing'] = a.summary() == {'running': 1}
+        if scheme == 'local':
+            continue                                        # in-process jobs never expire
+        # A worker whose lease expired cannot overwrite the new owner's result
+        a.put([{'job': 'stale'}])
+        stale = a.get('A')
+        time.sleep(0.15)
+        b = connect(url, lease=0.1, max_attempts=2)
+        fresh = b.get('B')
+        while fresh and fresh[1] != {'job': 'stale'}:
+            fresh = b.get('B')
+        b.ack(fresh[0], 'B', {'owner': np.array(2)})
+        late = a.ack(stale[0], 'A', {'owner': np.array(1)})
+        owner = [int(r['owner']) for p, r in a.results() if p == {'job': 'stale'}]
+        checks[f'{scheme}: stale ack rejected, result kept'] = not late and owner == [2]
+        # A job that kills its worker every time ends up failed after max_attempts
+        a.put([{'job': 'crash'}])
+        claims = 0
+        while (job := a.get(f'crash{claims}')) is not None:
+            claims += job[1] == {'job': 'crash'}
+            time.sleep(0.15)
+        checks[f'{scheme}: crashing job fails after 2 claims'] = claims == 2
+        a.close()
+        b.close()
+    for name, ok in checks.items():
+        print(f'  {"ok  " if ok else "FAIL"} {name}')
+    print(f'node plan here: {plan_workers()} (jobs, threads); '
+          f'64 cores: {plan_workers(cores=64)}, 3 jobs on 64: {plan_workers(3, 64)}')
+
+
+if __name__ == '__main__':
+    _self_check()
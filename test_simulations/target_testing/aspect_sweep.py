@@ -0,0 +1,353 @@
+# -*- coding: utf-8 -*-
+"""
+Parallel aspect-angle sweep for the STL target of target_run_sim_v2.py
+
+Expands an (azimuth, elevation, polarisation) grid into one simulation
+directory per aspect, with k_dir / E_dir from wave_calculations.py, and runs
+them concurrently: each openEMS job gets a share of the machine's cores
+(work_queue.plan_workers, as on a work-queue node) and the jobs run in separate processes. Every job saves its
+complex backscatter (S_theta, S_phi) over frequency (|S|^2 = RCS), and the
+sweep collects them into one array:
+
+    backscatter_sweep.npz
+        S          (n_azimuth, n_elevation, n_pol, 2, F) complex
+        azimuth, elevation, pol, freq
+
+Progress lives in a SQLite job ledger (common/job_ledger.py, default
+<out>/jobs.sqlite): rerunning the command restarts only jobs that are
+unfinished, failed, or were lost with a dead worker, and further nodes
+can share the sweep by pointing --ledger at the same file. With --polarimetric every aspect
+is run for both V and H and the pair is combined into the full scattering
+matrix (common/polarimetry.py), saved as scattering_matrix.npz with
+S (n_azimuth, n_elevation, F, 2, 2) in the (H, V) basis.
+
+Across nodes without a common sweep directory, --broker puts the grid on a
+work queue (common/work_queue.py: sqlite:// or file:// on a shared
+filesystem, local:// for testing). Each node started with --role work
+sizes its jobs to its own cores, simulates in node-local scratch and
+pushes back only the backscatter arrays; --role collect assembles them.
+
+With --adaptive TOL_DB the azimuth grid is only the coarse start: at each
+elevation common/adaptive_sampling.py bisects the intervals whose
+backscatter (any frequency / polarisation) is not reproduced to TOL_DB by
+linear interpolation in dB, each round one parallel batch through the
+ledger, and saves the non-uniform result as adaptive_el<elev>.npz.
+
+Usage:
+    python aspect_sweep.py --azimuth 0 360 10 --elevation 0 0 1 --pol V H
+    python aspect_sweep.py --azimuth 0 180 5 --cores 64 --threads 8
+    python aspect_sweep.py --azimuth 0 360 5 --polarimetric
+    python aspect_sweep.py --azimuth 0 360 4 --adaptive 1.0 --min-step 0.1
+    python aspect_sweep.py --azimuth 0 360 5 --broker sqlite:///shared/q.sqlite --role submit
+    python aspect_sweep.py --broker sqlite:///shared/q.sqlite --role work     # on every node
+    python aspect_sweep.py --azimuth 0 360 5 --broker sqlite:///shared/q.sqlite --role collect
+
+Tested with:
+ - Python 3.10
+ - openEMS v0.0.35+
+"""
+
+### Import Libraries
+import argparse
+import functools
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from wave_calculations import calculate_wave_direction, calculate_polarization
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from nf2ff_numpy import _directions, scattering_amplitude
+from polarimetry import ScatteringMatrix
+from job_ledger import JobLedger, run_worker
+from sim_cache import run_once, setup_key
+from work_queue import connect, plan_workers, run_node
+from adaptive_sampling import refine_aspects
+
+# Simulation settings (as target_run_sim_v2.py)
+stl_file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '../../test_targets/stl_test_target_ASCI.stl')
+SimBox = [2, 2, 2]      # meters
+PW_Box = [1, 1, 1]      # meters
+f_start = 50e6          # Hz
+f_stop = 1000e6         # Hz
+n_freq = 100
+transform = {
+    'Scale': [0.003, 0.003, 0.003],
+    'Rotate': [90.0, 0.0, 90.0],
+    'Translate': [-0.2, 0.0, 0.0],
+}
+
+
+def _angle(x):
+    """Shortest decimal that round-trips to float x: distinct angles never share a name."""
+    return np.format_float_positional(float(x), trim='-', sign=True)
+
+
+def aspect_dir(sweep_dir, azimuth, elevation, pol):
+    return os.path.join(sweep_dir, f'az{_angle(azimuth)}_el{_angle(elevation)}_{pol}')
+
+
+def backscatter_angles(azimuth, elevation):
+    """NF2FF (theta, phi) [deg] of the backscatter direction -k_dir."""
+    back = -np.asarray(calculate_wave_direction(azimuth, elevation))
+    return (np.rad2deg(np.arccos(np.clip(back[2], -1, 1))),
+            np.rad2deg(np.arctan2(back[1], back[0])))
+
+
+def run_aspect(sim_path, azimuth, elevation, pol, threads):
+    """Simulate one aspect; save and return its backscatter (2, F)."""
+    # openEMS is imported in the worker process, which builds its own CSX
+    from CSXCAD import ContinuousStructure
+    from openEMS import openEMS
+    from openEMS.physical_constants import C0
+    from openEMS.ports import UI_data
+    from stl_import import import_stl_into_openems, copy_stl_to_simulation_path
+
+    os.makedirs(sim_path, exist_ok=True)
+    k_dir = calculate_wave_direction(azimuth, elevation)
+    E_dir = calculate_polarization(azimuth, elevation, pol)
+
+    f0 = 0.5 * (f_start + f_stop)
+    fdtd_settings = {
+        'EndCriteria': 1e-3,
+        'GaussExcite': [f0, 0.5 * (f_stop - f_start)],
+        'BoundaryCond': ['PML_8'] * 6,
+    }
+    FDTD = openEMS(EndCriteria=fdtd_settings['EndCriteria'])
+    FDTD.SetGaussExcite(*fdtd_settings['GaussExcite'])
+    FDTD.SetBoundaryCond(fdtd_settings['BoundaryCond'])
+
+    CSX = ContinuousStructure()
+    FDTD.SetCSX(CSX)
+    mesh = CSX.GetGrid()
+    for axis, size in zip('xyz', SimBox):
+        mesh.SetLines(axis, [-size / 2, 0, size / 2])
+        mesh.SmoothMeshLines(axis, C0 / f_stop / 10)
+
+    import_stl_into_openems(CSX, copy_stl_to_simulation_path(stl_file_path, sim_path),
+                            material_name='stl_object', material_properties=None,
+                            priority=10, transform=transform)
+
+    pw_exc = CSX.AddExcitation('plane_wave', exc_type=10, exc_val=E_dir)
+    pw_exc.SetPropagationDir(k_dir)
+    pw_exc.SetFrequency(f0)
+    start = -0.5 * np.array(PW_Box)
+    pw_exc.AddBox(start, -start)
+    nf2ff = FDTD.CreateNF2FFBox()
+
+    CSX.Write2XML(os.path.join(sim_path, 'RCS_STL_Object.xml'))
+    # The solver is skipped if this directory already holds the same setup
+    run_once(FDTD, sim_path, setup_key(CSX, fdtd_settings), fdtd_settings,
+             cleanup=False, numThreads=threads)
+
+    # Backscatter: observe along -k_dir
+    theta, phi = backscatter_angles(azimuth, elevation)
+    freq = np.linspace(f_start, f_stop, n_freq)
+    ef_freq = UI_data('et', sim_path, freq)
+    res = nf2ff.CalcNF2FF(sim_path, freq, theta, phi)
+    S = np.stack([scattering_amplitude(freq, res.r, E, ef_freq.ui_f_val[0])[:, 0, 0]
+                  for E in (res.E_theta, res.E_phi)])
+
+    np.save(os.path.join(sim_path, 'freq.npy'), freq)
+    np.save(os.path.join(sim_path, 'E_dir.npy'), E_dir)
+    np.save(os.path.join(sim_path, 'backscatter_S.npy'), S)
+    return S
+
+
+def _ledger_task(sweep_dir, threads, params):
+    """Job body for the ledger: one aspect, returning its output file."""
+    g = (params['azimuth'], params['elevation'], params['pol'])
+    sim_path = aspect_dir(sweep_dir, *g)
+    run_aspect(sim_path, *g, threads)
+    return os.path.join(sim_path, 'backscatter_S.npy')
+
+
+def _queue_task(params, threads):
+    """
+    Work-queue job body: one aspect in node-local scratch, returning only the
+    reduced result; the field dumps never leave the node.
+    """
+    sim_path = tempfile.mkdtemp(prefix='aspect_')
+    try:
+        S = run_aspect(sim_path, params['azimuth'], params['elevation'], params['pol'], threads)
+        return {'S': S, 'freq': np.linspace(f_start, f_stop, n_freq)}
+    finally:
+        shutil.rmtree(sim_path, ignore_errors=True)
+
+
+def aspect_grid(azimuth, elevation, pols):
+    return [{'azimuth': float(az), 'elevation': float(el), 'pol': pol}
+            for az, el, pol in itertools.product(azimuth, elevation, pols)]
+
+
+def run_sweep(sweep_dir, azimuth, elevation, pols=('V',), cores=None, threads=None,
+              ledger_path=None):
+    """
+    Register the grid in the job ledger (default sweep_dir/jobs.sqlite) and
+    work through every job not yet done, then collect the sweep. Other
+    nodes can join by running the same command against the same ledger.
+    """
+    os.makedirs(sweep_dir, exist_ok=True)
+    ledger_path = ledger_path or os.path.join(sweep_dir, 'jobs.sqlite')
+    campaign = os.path.abspath(sweep_dir)
+    ledger = JobLedger(ledger_path)
+    ledger.add_jobs(campaign, aspect_grid(azimuth, elevation, pols))
+    counts = ledger.summary(campaign)
+    todo = sum(counts.values()) - counts.get('done', 0)
+    jobs, threads = plan_workers(todo, cores, threads)
+    print(f'{sum(counts.values())} aspects, {counts}; running as {jobs} jobs × {threads} threads')
+
+    task = functools.partial(_ledger_task, sweep_dir, threads)
+    with ProcessPoolExecutor(jobs) as pool:
+        for fut in [pool.submit(run_worker, ledger_path, campaign, task) for _ in range(jobs)]:
+            fut.result()
+
+    print(f'Sweep ledger: {ledger.summary(campaign)}')
+    for row in ledger.jobs(campaign, 'failed'):
+        p = row['params']
+        print(f"  az {p['azimuth']:g}°, el {p['elevation']:g}°, {p['pol']}: {row['error']}")
+    ledger.close()
+    return collect_sweep(sweep_dir, azimuth, elevation, pols)
+
+
+def run_adaptive_sweep(sweep_dir, start, stop, step, elevation, pols=('V',), tol_db=1.0,
+                       min_step=0.1, cores=None, threads=None, ledger_path=None):
+    """
+    Adaptive azimuth sampling on [start, stop) at each elevation, starting
+    from a `step` grid; a full turn wraps around. Returns {elevation:
+    AdaptiveSweep with S (N, n_pol, 2, F)}, each saved as adaptive_el<elev>.npz.
+    """
+    periodic = np.isclose((stop - start) % 360.0, 0.0) and stop > start
+    sweeps = {}
+    for el in elevation:
+        def sample(azimuth):
+            return run_sweep(sweep_dir, azimuth, [el], pols, cores, threads, ledger_path)[:, 0]
+
+        print(f'Adaptive sweep at elevation {el:g}°, tolerance {tol_db:g} dB')
+        stop_el = stop if periodic else stop - step     # CLI azimuth stop is exclusive
+        sweep = refine_aspects(sample, start, stop_el, step, tol_db, min_step, periodic=periodic)
+        sweep.save(os.path.join(sweep_dir, f'adaptive_el{_angle(el)}.npz'))
+        sweeps[float(el)] = sweep
+    return sweeps
+
+
+def collect_sweep(sweep_dir, azimuth, elevation, pols, results=None):
+    """
+    Stack the per-aspect backscatter into S (n_az, n_el, n_pol, 2, F);
+    aspects without results stay NaN. Saved as backscatter_sweep.npz.
+    `results` maps (azimuth, elevation, pol) to S (2, F), e.g. from a work
+    queue; by default they are read from the aspect directories.
+    """
+    freq = np.linspace(f_start, f_stop, n_freq)
+    S = np.full((len(azimuth), len(elevation), len(pols), 2, n_freq), np.nan, dtype=complex)
+    for (i, az), (j, el), (l, pol) in itertools.product(enumerate(azimuth),
+                                                         enumerate(elevation),
+                                                         enumerate(pols)):
+        if results is not None:
+            if (float(az), float(el), pol) in results:
+                S[i, j, l] = results[float(az), float(el), pol]
+            continue
+        path = os.path.join(aspect_dir(sweep_dir, az, el, pol), 'backscatter_S.npy')
+        if os.path.exists(path):
+            S[i, j, l] = np.load(path)
+    os.makedirs(sweep_dir, exist_ok=True)
+    np.savez(os.path.join(sweep_dir, 'backscatter_sweep.npz'), S=S, azimuth=azimuth,
+             elevation=elevation, pol=np.array(pols), freq=freq)
+    return S
+
+
+def collect_scattering_matrix(sweep_dir, azimuth, elevation, results=None):
+    """
+    ScatteringMatrix (n_az, n_el, F, 2, 2) of a sweep run with both V and H;
+    saved as scattering_matrix.npz.
+    """
+    S = collect_sweep(sweep_dir, azimuth, elevation, ('H', 'V'), results)
+    grid = list(itertools.product(azimuth, elevation))
+    shape = (len(azimuth), len(elevation), 3)
+    theta_hat, phi_hat = np.empty(shape), np.empty(shape)
+    h_dir, v_dir = np.empty(shape), np.empty(shape)
+    for n, (az, el) in enumerate(grid):
+        idx = np.unravel_index(n, shape[:2])
+        _, theta_hat[idx], phi_hat[idx] = (d[0] for d in _directions(*backscatter_angles(az, el)))
+        h_dir[idx] = calculate_polarization(az, el, 'H')
+        v_dir[idx] = calculate_polarization(az, el, 'V')
+    sm = ScatteringMatrix.from_runs(np.linspace(f_start, f_stop, n_freq), S[:, :, 0], S[:, :, 1],
+                                    theta_hat, phi_hat, h_dir, v_dir)
+    sm.save(os.path.join(sweep_dir, 'scattering_matrix.npz'))
+    return sm
+
+
+def queue_results(url):
+    """{(azimuth, elevation, pol): S (2, F)} of the finished jobs on a work queue."""
+    broker = connect(url)
+    try:
+        return {(p['azimuth'], p['elevation'], p['pol']): r['S'] for p, r in broker.results()}
+    finally:
+        broker.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Parallel aspect-angle RCS sweep.')
+    parser.add_argument('--azimuth', type=float, nargs=3, default=[0, 360, 10],
+                        metavar=('START', 'STOP', 'STEP'), help='Heading [deg], stop exclusive.')
+    parser.add_argument('--elevation', type=float, nargs=3, default=[0, 0, 1],
+                        metavar=('START', 'STOP', 'STEP'), help='Elevation [deg], stop inclusive.')
+    parser.add_argument('--pol', nargs='+', default=['V'], choices=['V', 'H'])
+    parser.add_argument('--polarimetric', action='store_true',
+                        help='Run V and H and save the full scattering matrix.')
+    parser.add_argument('--out', default=os.path.join(tempfile.gettempdir(), 'RCS_Aspect_Sweep'))
+    parser.add_argument('--cores', type=int, default=None)
+    parser.add_argument('--threads', type=int, default=None, help='openEMS threads per job.')
+    parser.add_argument('--ledger', default=None, help='Job ledger (default <out>/jobs.sqlite).')
+    parser.add_argument('--broker', default=None,
+                        help='Work queue URL (sqlite:///path?queue=name, file:///dir, local://).')
+    parser.add_argument('--adaptive', type=float, default=None, metavar='TOL_DB',
+                        help='Refine the azimuth grid until linear-in-dB interpolation '
+                             'error is below TOL_DB.')
+    parser.add_argument('--min-step', type=float, default=0.1,
+                        help='Smallest adaptive azimuth step [deg].')
+    parser.add_argument('--role', default='all', choices=['submit', 'work', 'collect', 'all'],
+                        help='With --broker: enqueue the grid, serve it, assemble it, or all.')
+    args = parser.parse_args()
+    if args.adaptive is not None and args.broker is not None:
+        parser.error('--adaptive runs through the ledger; it cannot be combined with --broker')
+
+    azimuth = np.arange(*args.azimuth)
+    elevation = np.arange(args.elevation[0], args.elevation[1] + 0.5 * args.elevation[2],
+                          args.elevation[2])
+    pols = ['H', 'V'] if args.polarimetric else args.pol
+    results = None
+    if args.adaptive is not None:
+        sweeps = run_adaptive_sweep(args.out, *args.azimuth, elevation, pols, args.adaptive,
+                                    args.min_step, args.cores, args.threads, args.ledger)
+        for el, sweep in sweeps.items():
+            print(f'Elevation {el:g}°: {len(sweep.angles)} aspects in {len(sweep.rounds)} rounds, '
+                  f'worst interval error {sweep.rounds[-1][1]:.2f} dB')
+        if len(elevation) > 1:
+            sys.exit(0)
+        azimuth = next(iter(sweeps.values())).angles
+        S = collect_sweep(args.out, azimuth, elevation, pols)
+    elif args.broker is None:
+        S = run_sweep(args.out, azimuth, elevation, pols, args.cores, args.threads, args.ledger)
+    else:
+        broker = connect(args.broker)
+        if args.role in ('submit', 'all'):
+            print(f'Queued {broker.put(aspect_grid(azimuth, elevation, pols))} new aspects')
+        if args.role in ('work', 'all'):
+            run_node(args.broker, _queue_task, args.cores, args.threads)
+        print(f'Queue: {broker.summary()}')
+        broker.close()
+        if args.role in ('submit', 'work'):
+            sys.exit(0)
+        results = queue_results(args.broker)
+        S = collect_sweep(args.out, azimuth, elevation, pols, results)
+    if args.polarimetric:
+        collect_scattering_matrix(args.out, azimuth, elevation, results)
+        print(f'Scattering matrix saved to {os.path.join(args.out, "scattering_matrix.npz")}')
+    print(f'Backscatter sweep {S.shape} saved to {os.path.join(args.out, "backscatter_sweep.npz")}')
@@ -14,20 +14,30 @@ Tested with:
 
 ### Import Libraries
 import os
+import sys
+import tempfile
 import numpy as np
 import pickle  # For saving simulation parameters
 from CSXCAD import ContinuousStructure
 from openEMS import openEMS
 from openEMS.physical_constants import *
 from openEMS.ports import UI_data
-import tempfile
 
 # Import the helper function to import STL files
 from stl_import import import_stl_into_openems, copy_stl_to_simulation_path
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from nf2ff_numpy import scattering_amplitude
+from reference_library import reference_path, run_reference
+
 ### Setup the simulation
-# Define the simulation path
-Sim_Path = os.path.join(tempfile.gettempdir(), 'No_target_0_calib')
+# The empty domain is a shared reference run (common/reference_library.py):
+# simulated once per mesh / excitation / boundaries / dumps and found by
+# target jobs with the same setup that use the same library — only across
+# machines if OPENEMS_REFERENCE_LIBRARY points at a shared directory (the
+# default is a per-machine temp directory). The library entry is only read
+# here; this script's own outputs go to Sim_Path under Sim_Root.
+Sim_Root = os.path.join(tempfile.gettempdir(), 'No_target_0_calib')
 post_proc_only = False  # Set to True to skip simulation run
 
 # All lengths in meters
@@ -47,15 +57,21 @@ PW_Box_y = 1  # meters
 PW_Box_z = 1  # meters
 
 ### Setup FDTD parameters & excitation function
-FDTD = openEMS(EndCriteria=1e-3)
-
 f_start = 50e6   # Start frequency in Hz
 f_stop = 1000e6  # Stop frequency in Hz
 f0 = 0.5 * (f_start + f_stop)  # Center frequency
 
-FDTD.SetGaussExcite(f0, 0.5 * (f_stop - f_start))
+# Solver settings outside the CSX XML; part of the sim directory key, so
+# FDTD is built from them rather than from separate literals
+fdtd_settings = {
+    'EndCriteria': 1e-3,
+    'GaussExcite': [f0, 0.5 * (f_stop - f_start)],
+    'BoundaryCond': ['PML_8'] * 6,
+}
 
-FDTD.SetBoundaryCond(['PML_8'] * 6)
+FDTD = openEMS(EndCriteria=fdtd_settings['EndCriteria'])
+FDTD.SetGaussExcite(*fdtd_settings['GaussExcite'])
+FDTD.SetBoundaryCond(fdtd_settings['BoundaryCond'])
 
 ### Setup Geometry & Mesh
 CSX = ContinuousStructure()
@@ -105,9 +121,12 @@ E_dump = CSX.AddDump('E_dump', dump_type=0, file_type=0, frequency=[f0])
 E_dump.AddBox(start=start, stop=stop)
 
 ### Save the simulation setup to an XML file
-# Create the simulation directory if it doesn't exist
-if not os.path.exists(Sim_Path):
-    os.makedirs(Sim_Path)
+# Reference-library directory keyed on the empty-domain setup; the target
+# job strips its 'stl_object' material to find it. Post-processing output
+# goes to a directory of this script with the same key.
+Ref_Path, setup_key = reference_path(CSX, fdtd_settings, target=['stl_object'])
+Sim_Path = os.path.join(Sim_Root, os.path.basename(Ref_Path))
+os.makedirs(Sim_Path, exist_ok=True)
 
 # Write the simulation setup to an XML file
 CSX_file = os.path.join(Sim_Path, 'RCS_STL_Object.xml')
@@ -123,11 +142,13 @@ except ImportError:
 
 ### Run the simulation
 if not post_proc_only:
-    FDTD.Run(Sim_Path, cleanup=False)  # Set cleanup=False to retain files
+    # Skipped if the library has it
+    run_reference(FDTD, CSX, fdtd_settings, target=['stl_object'], cleanup=False)
 
     ### Postprocessing & data saving
+    # Dumps are read from the library entry; results are written to Sim_Path
     # Get Gaussian pulse strength at frequency f0
-    ef = UI_data('et', Sim_Path, freq=f0)
+    ef = UI_data('et', Ref_Path, freq=f0)
     Pin = 0.5 * np.linalg.norm(E_dir) ** 2 / Z0 * abs(ef.ui_f_val[0]) ** 2
 
     # Save Pin
@@ -138,7 +159,8 @@ if not post_proc_only:
 
     # Calculate NF2FF at specific angles
     angles_phi = np.arange(-180, 180.1, 2)
-    nf2ff_res = nf2ff.CalcNF2FF(Sim_Path, f0, 90, angles_phi)
+    nf2ff_res = nf2ff.CalcNF2FF(Ref_Path, f0, 90, angles_phi,
+                                outfile=os.path.join(Sim_Path, 'nf2ff_f0.h5'))
 
     # Save NF2FF results at f0
     np.save(os.path.join(Sim_Path, 'nf2ff_phi.npy'), nf2ff_res.phi)
@@ -146,7 +168,7 @@ if not post_proc_only:
 
     # Calculate RCS over frequency
     freq = np.linspace(f_start, f_stop, 100)
-    ef_freq = UI_data('et', Sim_Path, freq)  # Time domain/freq domain voltage
+    ef_freq = UI_data('et', Ref_Path, freq)  # Time domain/freq domain voltage
     Pin_freq = 0.5 * np.linalg.norm(E_dir) ** 2 / Z0 * abs(np.array(ef_freq.ui_f_val[0])) ** 2
 
     # Save Pin_freq and freq
@@ -154,14 +176,20 @@ if not post_proc_only:
     np.save(os.path.join(Sim_Path, 'freq.npy'), freq)
 
     # Calculate NF2FF over frequency at specific angle
-    nf2ff_res_freq = nf2ff.CalcNF2FF(Sim_Path, freq, 90, 0)
+    nf2ff_res_freq = nf2ff.CalcNF2FF(Ref_Path, freq, 90, 0,
+                                     outfile=os.path.join(Sim_Path, 'nf2ff_freq.h5'))
 
     # Save NF2FF results over frequency
     np.save(os.path.join(Sim_Path, 'nf2ff_P_rad_freq.npy'), nf2ff_res_freq.P_rad)
+    # Complex (S_θ, S_φ) with |S|² = RCS, for range profiles (common/hrrp.py)
+    np.save(os.path.join(Sim_Path, 'nf2ff_S_freq.npy'),
+            np.stack([scattering_amplitude(freq, nf2ff_res_freq.r, E, ef_freq.ui_f_val[0])
+                      for E in (nf2ff_res_freq.E_theta, nf2ff_res_freq.E_phi)]))
 
     # Save simulation parameters for post-processing
     sim_params = {
         'Sim_Path': Sim_Path,
+        'Ref_Path': Ref_Path,
         'f_start': f_start,
         'f_stop': f_stop,
         'f0': f0,
@@ -14,6 +14,7 @@ Tested with:
 
 ### Import Libraries
 import os
+import sys
 import numpy as np
 import matplotlib
 matplotlib.use('Agg')  # Use non-interactive backend suitable for headless servers
@@ -22,6 +23,13 @@ import pickle  # For loading simulation parameters
 import tempfile
 from openEMS.physical_constants import Z0, C0
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from isar import ISARImage
+from hrrp import range_profiles
+from scattering_centers import ScatteringCenters, matrix_pencil
+from sim_cache import latest_sim_path
+from rational_fit import RationalModel
+
 def post_process(sim_path):
     # Load simulation parameters
     params_file = os.path.join(sim_path, 'sim_params.pkl')
@@ -71,6 +79,18 @@ def post_process(sim_path):
     # Save RCS vs frequency plot
     plt.figure()
     plt.plot(freq / 1e6, back_scat, linewidth=2)
+    # Pole-residue model (common/rational_fit.py) resolves resonances between samples
+    model_file = os.path.join(sim_path, 'rcs_model.npz')
+    if os.path.exists(model_file):
+        rcs_model = RationalModel.load(model_file)
+        freq_dense = np.linspace(freq[0], freq[-1], 10001)
+        plt.plot(freq_dense / 1e6, rcs_model.rcs(freq_dense)[0], 'k--', linewidth=1,
+                 label=f'rational model ({len(rcs_model.poles)} poles)')
+        plt.plot(freq / 1e6, back_scat, 'o', markersize=3, label='NF2FF samples')
+        plt.legend()
+        f_res, Q = rcs_model.resonances()
+        print(f"RCS model: estimated error {rcs_model.validation_error:.1e}; resonances "
+              + ', '.join(f'{f / 1e6:.1f} MHz (Q {q:.0f})' for f, q in zip(f_res, Q) if q > 5))
     plt.grid()
     plt.xlabel('Frequency (MHz)')
     plt.ylabel('RCS ($m^2$)')
@@ -91,9 +111,61 @@ def post_process(sim_path):
     plt.close()
     print(f"Normalized RCS plot saved as: {os.path.join(sim_path, 'Normalized_RCS.png')}")
 
+    # Backscatter range profile from the complex sweep, if the run saved it
+    S_file = os.path.join(sim_path, 'nf2ff_S_freq.npy')
+    if os.path.exists(S_file):
+        S_theta = np.load(S_file)[0, :, 0, 0]
+        prof = range_profiles(freq, S_theta)
+        plt.figure()
+        plt.plot(prof.range, prof.db(60), linewidth=2)
+        plt.grid()
+        plt.xlabel('Down-range (m, towards radar)')
+        plt.ylabel('Relative amplitude (dB)')
+        plt.title(f'Backscatter range profile, {prof.resolution * 100:.1f} cm resolution')
+        plt.savefig(os.path.join(sim_path, 'HRRP_backscatter.png'))
+        plt.close()
+        print(f"Range profile saved as: {os.path.join(sim_path, 'HRRP_backscatter.png')}")
+
+        # Dominant backscatter centres along the line of sight (matrix pencil)
+        rc = matrix_pencil(freq, S_theta)
+        print("Backscatter centres (down-range, RCS, frequency exponent):")
+        for x, a, alpha in zip(rc.range, rc.amplitude, rc.alpha):
+            if np.isfinite(x):
+                print(f"  {x:+.3f} m  {10 * np.log10(abs(a) ** 2):6.1f} dBsm  α = {alpha:+.2f}")
+
+    # ISAR image, if the run formed one (target_run_little_plane_backscatter.py)
+    isar_file = os.path.join(sim_path, 'isar_image.npz')
+    if os.path.exists(isar_file):
+        isar = ISARImage.load(isar_file)
+        plt.figure()
+        plt.pcolormesh(isar.cross_range, isar.down_range, isar.db(40), cmap='jet', shading='auto')
+        plt.colorbar(label='dB')
+        # CLEAN scattering centres, if extracted, in image coordinates
+        sc_file = os.path.join(sim_path, 'scattering_centers.npz')
+        if os.path.exists(sc_file):
+            sc = ScatteringCenters.load(sc_file)
+            los = np.deg2rad(isar.los_deg)
+            x, y = sc.position.T
+            plt.scatter(-x * np.sin(los) + y * np.cos(los), x * np.cos(los) + y * np.sin(los),
+                        s=80, facecolors='none', edgecolors='w')
+            print("ISAR scattering centres (x, y, RCS, frequency exponent):")
+            for (xi, yi), a, alpha in zip(sc.position, sc.amplitude, sc.alpha):
+                print(f"  ({xi:+.3f}, {yi:+.3f}) m  {10 * np.log10(abs(a) ** 2):6.1f} dBsm  "
+                      f"α = {alpha:+.2f}")
+        plt.xlim([-1.5, 1.5])
+        plt.ylim([-1.5, 1.5])
+        plt.gca().set_aspect('equal')
+        plt.xlabel('Cross-range (m)')
+        plt.ylabel('Down-range (m, towards radar)')
+        plt.title(f'ISAR image, {isar.freq_center / 1e9:.2f} GHz centre, LOS {isar.los_deg:.0f}°')
+        plt.savefig(os.path.join(sim_path, 'ISAR_image.png'))
+        plt.close()
+        print(f"ISAR image saved as: {os.path.join(sim_path, 'ISAR_image.png')}")
+
 if __name__ == '__main__':
     # Set the simulation path
-    sim_path = os.path.join(tempfile.gettempdir(), 'RCS_Little_Plane_Al_hi_frq')
+    # Most recent keyed run of the little_plane script (common/sim_cache.py)
+    sim_path = latest_sim_path(os.path.join(tempfile.gettempdir(), 'RCS_Little_Plane_Al_hi_frq'))
 
     if not os.path.exists(sim_path):
         print(f"Simulation directory not found: {sim_path}")
@@ -14,6 +14,7 @@ Tested with:
 
 ### Import Libraries
 import os
+import sys
 import numpy as np
 import pickle  # For saving simulation parameters
 from CSXCAD import ContinuousStructure
@@ -25,10 +26,23 @@ import tempfile
 # Import the helper function to import STL files
 from stl_import import import_stl_into_openems, copy_stl_to_simulation_path
 
+# Far-field results are cached against the nf2ff dump files (see common/nf2ff_cache.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from nf2ff_cache import cached_nf2ff
+from nf2ff_chunked import far_field_to_h5
+from isar import isar_image
+from backprojection import image_far_field
+from scattering_centers import clean_isar
+from sim_cache import keyed_sim_path, run_once
+from rational_fit import fit_rational
+
 ### Setup the simulation
 # Define the simulation path
-Sim_Path = os.path.join(tempfile.gettempdir(), 'RCS_Little_Plane_Al_hi_frq')
+# Each distinct setup runs in Sim_Root/<setup hash> (common/sim_cache.py)
+Sim_Root = os.path.join(tempfile.gettempdir(), 'RCS_Little_Plane_Al_hi_frq')
 post_proc_only = False  # Set to True to skip simulation run
+calc_full_sphere = False  # 0.5° 4π bistatic patterns at every sweep frequency (large HDF5)
+calc_bp_volume = False  # 3-D back-projected scattering-centre volume (bp_volume.vtr)
 
 # All lengths in meters
 # Remove unit conversion; units are now in meters
@@ -36,7 +50,7 @@ post_proc_only = False  # Set to True to skip simulation run
 # Define the path to your STL file
 stl_file_path = '../../test_targets/little_plane_asci_mesh.stl'
 
-stl_file_path = copy_stl_to_simulation_path(stl_file_path, Sim_Path)
+stl_file_path = copy_stl_to_simulation_path(stl_file_path, Sim_Root)
 
 # Size of the simulation box in meters (set separately for x, y, z)
 SimBox_x = 2  # meters
@@ -49,15 +63,21 @@ PW_Box_y = 1  # meters
 PW_Box_z = 1  # meters
 
 ### Setup FDTD parameters & excitation function
-FDTD = openEMS(EndCriteria=1e-3)
-
 f_start = 50e6   # Start frequency in Hz
 f_stop = 5000e6  # Stop frequency in Hz
 f0 = 0.5 * (f_start + f_stop)  # Center frequency
 
-FDTD.SetGaussExcite(f0, 0.5 * (f_stop - f_start))
+# Solver settings outside the CSX XML; part of the sim directory key, so
+# FDTD is built from them rather than from separate literals
+fdtd_settings = {
+    'EndCriteria': 1e-3,
+    'GaussExcite': [f0, 0.5 * (f_stop - f_start)],
+    'BoundaryCond': ['PML_8'] * 6,
+}
 
-FDTD.SetBoundaryCond(['PML_8'] * 6)
+FDTD = openEMS(EndCriteria=fdtd_settings['EndCriteria'])
+FDTD.SetGaussExcite(*fdtd_settings['GaussExcite'])
+FDTD.SetBoundaryCond(fdtd_settings['BoundaryCond'])
 
 ### Setup Geometry & Mesh
 CSX = ContinuousStructure()
@@ -148,9 +168,8 @@ E_dump_outside.AddBox(start=thin_dump_start, stop=thin_dump_stop)
 H_dump_outside.AddBox(start=thin_dump_start, stop=thin_dump_stop)
 
 ### Save the simulation setup to an XML file
-# Create the simulation directory if it doesn't exist
-if not os.path.exists(Sim_Path):
-    os.makedirs(Sim_Path)
+# Key the simulation directory on the setup, so identical setups reuse one run
+Sim_Path, setup_key = keyed_sim_path(Sim_Root, CSX, fdtd_settings)
 
 # Write the simulation setup to an XML file
 CSX_file = os.path.join(Sim_Path, 'RCS_STL_Object.xml')
@@ -166,7 +185,7 @@ except ImportError:
 
 ### Run the simulation
 if not post_proc_only:
-    FDTD.Run(Sim_Path, cleanup=False)  # Set cleanup=False to retain files
+    run_once(FDTD, Sim_Path, setup_key, fdtd_settings, cleanup=False)  # Skipped if already simulated
 
     ### Postprocessing & data saving
     # Get Gaussian pulse strength at frequency f0
@@ -181,7 +200,8 @@ if not post_proc_only:
 
     # Calculate NF2FF at specific angles
     angles_phi = np.arange(-180, 180.1, 2)
-    nf2ff_res = nf2ff.CalcNF2FF(Sim_Path, f0, 90, angles_phi)
+    calc = lambda *args, **kw: nf2ff.CalcNF2FF(Sim_Path, *args, **kw)
+    nf2ff_res = cached_nf2ff(Sim_Path, f0, 90, angles_phi, method='openems', compute=calc)
 
     # Save NF2FF results at f0
     np.save(os.path.join(Sim_Path, 'nf2ff_phi.npy'), nf2ff_res.phi)
@@ -197,10 +217,56 @@ if not post_proc_only:
     np.save(os.path.join(Sim_Path, 'freq.npy'), freq)
 
     # Calculate NF2FF over frequency at specific angle
-    nf2ff_res_freq = nf2ff.CalcNF2FF(Sim_Path, freq, 90, 180)
+    nf2ff_res_freq = cached_nf2ff(Sim_Path, freq, 90, 180, method='openems', compute=calc)
 
     # Save NF2FF results over frequency
     np.save(os.path.join(Sim_Path, 'nf2ff_P_rad_freq.npy'), nf2ff_res_freq.P_rad)
+    # Complex (S_θ, S_φ) with |S|² = RCS, for range profiles (common/hrrp.py)
+    S_freq = np.stack(nf2ff_res_freq.scattering_amplitude(ef_freq.ui_f_val[0]))
+    np.save(os.path.join(Sim_Path, 'nf2ff_S_freq.npy'), S_freq)
+
+    # Pole-residue model of the sweep (common/rational_fit.py): RCS at any frequency
+    rcs_model = fit_rational(freq, S_freq[:, :, 0, 0])
+    rcs_model.save(os.path.join(Sim_Path, 'rcs_model.npz'))
+    print(f'RCS model: {len(rcs_model.poles)} poles, estimated error {rcs_model.validation_error:.1e}')
+
+    # ISAR image from the bistatic cut around backscatter (one illumination, so
+    # bistatic equivalence: ±20° observed ≈ ±10° of aspect, see common/isar.py).
+    # Upper half of the band only: the K-space rectangle shrinks with f_min.
+    isar_phi = np.arange(160, 200.1, 0.5)
+    isar_band = freq >= f0
+    nf2ff_res_isar = cached_nf2ff(Sim_Path, freq[isar_band], 90, isar_phi,
+                                  method='openems', compute=calc)
+    S_theta, _ = nf2ff_res_isar.scattering_amplitude(np.array(ef_freq.ui_f_val[0])[isar_band])
+    isar = isar_image(freq[isar_band], isar_phi, S_theta[:, 0, :], n_fft=512,
+                      bistatic_center=180)
+    isar.save(os.path.join(Sim_Path, 'isar_image.npz'))
+    # Dominant scattering centres of the same sweep: a compact model whose
+    # reconstruct() stands in for NF2FF across this band and aspect span
+    centers = clean_isar(freq[isar_band], isar_phi, S_theta[:, 0, :], bistatic_center=180)
+    centers.save(os.path.join(Sim_Path, 'scattering_centers.npz'))
+
+    if calc_bp_volume:
+        # 3° bistatic hemisphere facing the source (within 90° of backscatter),
+        # back-projected onto a 1 cm grid in simulation coordinates. Overlay
+        # bp_volume.vtr on the STL in ParaView with the `transform` above
+        # applied to the mesh (Transform filter).
+        bp_theta, bp_phi = np.arange(0, 180.1, 3), np.arange(90, 270.1, 3)
+        nf2ff_res_bp = cached_nf2ff(Sim_Path, freq, bp_theta, bp_phi,
+                                    method='openems', compute=calc)
+        S_theta, _ = nf2ff_res_bp.scattering_amplitude(ef_freq.ui_f_val[0])
+        bp = image_far_field(freq, bp_theta, bp_phi, S_theta, k_dir,
+                             x=np.arange(-0.6, 0.601, 0.01), y=np.arange(-0.6, 0.601, 0.01),
+                             z=np.arange(-0.3, 0.301, 0.01))
+        bp.save(os.path.join(Sim_Path, 'bp_volume.npz'))
+        bp.save_vtr(os.path.join(Sim_Path, 'bp_volume.vtr'))
+
+    if calc_full_sphere:
+        # Streamed to a chunked HDF5 under a RAM budget; read back per frequency
+        # with nf2ff_chunked.read_far_field_h5
+        far_field_to_h5(Sim_Path, freq, np.arange(0, 180.25, 0.5), np.arange(-180, 180, 0.5),
+                        os.path.join(Sim_Path, 'nf2ff_full_sphere.h5'),
+                        ram_bytes=8e9, workers=os.cpu_count())
 
     # Save simulation parameters for post-processing
     sim_params = {
@@ -14,6 +14,7 @@ Tested with:
 
 ### Import Libraries
 import os
+import sys
 import numpy as np
 import pickle  # For saving simulation parameters
 from CSXCAD import ContinuousStructure
@@ -25,9 +26,16 @@ import tempfile
 # Import the helper function to import STL files
 from stl_import import import_stl_into_openems, copy_stl_to_simulation_path
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from nf2ff_numpy import scattering_amplitude
+from sim_cache import keyed_sim_path, run_once
+from reference_library import find_reference
+from rational_fit import fit_rational
+
 ### Setup the simulation
 # Define the simulation path
-Sim_Path = os.path.join(tempfile.gettempdir(), 'RCS_STL_Target_Simulation')
+# Each distinct setup runs in Sim_Root/<setup hash> (common/sim_cache.py)
+Sim_Root = os.path.join(tempfile.gettempdir(), 'RCS_STL_Target_Simulation')
 post_proc_only = False  # Set to True to skip simulation run
 
 # All lengths in meters
@@ -36,7 +44,7 @@ post_proc_only = False  # Set to True to skip simulation run
 # Define the path to your STL file
 stl_file_path = '../../test_targets/stl_test_target_ASCI.stl'
 
-stl_file_path = copy_stl_to_simulation_path(stl_file_path, Sim_Path)
+stl_file_path = copy_stl_to_simulation_path(stl_file_path, Sim_Root)
 
 # Size of the simulation box in meters (set separately for x, y, z)
 SimBox_x = 2  # meters
@@ -49,15 +57,21 @@ PW_Box_y = 1  # meters
 PW_Box_z = 1  # meters
 
 ### Setup FDTD parameters & excitation function
-FDTD = openEMS(EndCriteria=1e-3)
-
 f_start = 50e6   # Start frequency in Hz
 f_stop = 1000e6  # Stop frequency in Hz
 f0 = 0.5 * (f_start + f_stop)  # Center frequency
 
-FDTD.SetGaussExcite(f0, 0.5 * (f_stop - f_start))
+# Solver settings outside the CSX XML; part of the sim directory key, so
+# FDTD is built from them rather than from separate literals
+fdtd_settings = {
+    'EndCriteria': 1e-3,
+    'GaussExcite': [f0, 0.5 * (f_stop - f_start)],
+    'BoundaryCond': ['PML_8'] * 6,
+}
 
-FDTD.SetBoundaryCond(['PML_8'] * 6)
+FDTD = openEMS(EndCriteria=fdtd_settings['EndCriteria'])
+FDTD.SetGaussExcite(*fdtd_settings['GaussExcite'])
+FDTD.SetBoundaryCond(fdtd_settings['BoundaryCond'])
 
 ### Setup Geometry & Mesh
 CSX = ContinuousStructure()
@@ -126,9 +140,12 @@ E_dump = CSX.AddDump('E_dump', dump_type=0, file_type=0, frequency=[f0])
 E_dump.AddBox(start=start, stop=stop)
 
 ### Save the simulation setup to an XML file
-# Create the simulation directory if it doesn't exist
-if not os.path.exists(Sim_Path):
-    os.makedirs(Sim_Path)
+# Key the simulation directory on the setup, so identical setups reuse one run
+Sim_Path, setup_key = keyed_sim_path(Sim_Root, CSX, fdtd_settings)
+# Empty-domain reference with the same mesh / excitation / dumps, if one has
+# been run (no_target_run_sim_v2.py) — for background subtraction
+Ref_Path = find_reference(CSX, fdtd_settings, target=['stl_object'])
+print(f"Empty-domain reference: {Ref_Path or 'none yet, run no_target_run_sim_v2.py'}")
 
 # Write the simulation setup to an XML file
 CSX_file = os.path.join(Sim_Path, 'RCS_STL_Object.xml')
@@ -144,7 +161,7 @@ except ImportError:
 
 ### Run the simulation
 if not post_proc_only:
-    FDTD.Run(Sim_Path, cleanup=False)  # Set cleanup=False to retain files
+    run_once(FDTD, Sim_Path, setup_key, fdtd_settings, cleanup=False)  # Skipped if already simulated
 
     ### Postprocessing & data saving
     # Get Gaussian pulse strength at frequency f0
@@ -179,10 +196,20 @@ if not post_proc_only:
 
     # Save NF2FF results over frequency
     np.save(os.path.join(Sim_Path, 'nf2ff_P_rad_freq.npy'), nf2ff_res_freq.P_rad)
+    # Complex (S_θ, S_φ) with |S|² = RCS, for range profiles (common/hrrp.py)
+    S_freq = np.stack([scattering_amplitude(freq, nf2ff_res_freq.r, E, ef_freq.ui_f_val[0])
+                       for E in (nf2ff_res_freq.E_theta, nf2ff_res_freq.E_phi)])
+    np.save(os.path.join(Sim_Path, 'nf2ff_S_freq.npy'), S_freq)
+
+    # Pole-residue model of the sweep (common/rational_fit.py): RCS at any frequency
+    rcs_model = fit_rational(freq, S_freq[:, :, 0, 0])
+    rcs_model.save(os.path.join(Sim_Path, 'rcs_model.npz'))
+    print(f'RCS model: {len(rcs_model.poles)} poles, estimated error {rcs_model.validation_error:.1e}')
 
     # Save simulation parameters for post-processing
     sim_params = {
         'Sim_Path': Sim_Path,
+        'Ref_Path': Ref_Path,
         'f_start': f_start,
         'f_stop': f_stop,
         'f0': f0,
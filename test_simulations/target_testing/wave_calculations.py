@@ -20,6 +20,31 @@ def calculate_wave_direction(heading, elevation):
 
     return [k_dir_x, k_dir_y, k_dir_z]
 
+def calculate_polarization(heading, elevation, pol):
+    """
+    Calculate the E-field direction (E_dir) for a wave from calculate_wave_direction.
+
+    Parameters:
+    - heading: Angle of the wave direction in the x-z plane (degrees).
+    - elevation: Angle of the wave direction relative to the horizontal plane (degrees).
+    - pol: 'V' (in the vertical plane containing k_dir, E_y >= 0 at zero elevation)
+           or 'H' (horizontal, perpendicular to k_dir, with H x V = k_dir so that
+           (H, V, k_dir) is right-handed as common/polarimetry.py expects).
+
+    Returns:
+    - E_dir: A 3-element list, a unit vector perpendicular to k_dir.
+    """
+    heading_rad = np.deg2rad(heading)
+    elevation_rad = np.deg2rad(elevation)
+
+    if pol == 'V':
+        return [-np.sin(elevation_rad) * np.cos(heading_rad),
+                np.cos(elevation_rad),
+                -np.sin(elevation_rad) * np.sin(heading_rad)]
+    if pol == 'H':
+        return [np.sin(heading_rad), 0.0, -np.cos(heading_rad)]
+    raise ValueError(f"pol must be 'V' or 'H', not {pol!r}")
+
 if __name__ == '__main__':
     # Define the heading and elevation of the incoming wave
     heading = 90  # Degrees, rotation in the x-z plane